@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from datetime import datetime
+import asyncio
+import threading
+
+from utils.auth import get_current_admin_user
+from utils.config import settings
+from utils.profiling import SamplingProfiler
+from models.user import User
+
+router = APIRouter()
+
+# One sampling run per worker at a time
+sampling_lock = threading.Lock()
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def sample_profile(
+    seconds: float = Query(10, gt=0),
+    interval_ms: float = Query(None, ge=1, le=1000),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Sample the stacks of every thread of this worker (route handlers, the
+    scheduler, thread pools) for the given number of seconds and return them
+    as collapsed stacks for flamegraph.pl or speedscope
+    """
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {settings.PROFILING_MAX_SECONDS}")
+    if not sampling_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A sampling profile is already running on this worker")
+    
+    try:
+        profiler = SamplingProfiler((interval_ms or settings.PROFILING_SAMPLE_INTERVAL_MS) / 1000)
+        profiler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.stop()
+    finally:
+        sampling_lock.release()
+    
+    filename = f"profile-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(profiler.samples)
+        }
+    )
@@ -1,11 +1,12 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr, Field
 
-from utils.auth import authenticate_user, create_access_token, get_password_hash, get_current_active_user
-from utils.database import get_db
+from utils.auth import authenticate_user, create_access_token, get_password_hash_async, get_current_active_user
+from utils.database import get_async_db
 from utils.config import settings
 from models.user import User
 
@@ -33,19 +34,21 @@ class UserResponse(BaseModel):
         orm_mode = True
 
 @router.post("/register", response_model=UserResponse)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Check if username exists
-    db_user = db.query(User).filter(User.username == user_data.username).first()
+    db_user = (await db.execute(select(User).where(User.username == user_data.username))).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Check if email exists
-    db_user = db.query(User).filter(User.email == user_data.email).first()
+    db_user = (await db.execute(select(User).where(User.email == user_data.email))).scalars().first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (ending the read transaction first, so no pooled
+    # connection is held while waiting on bcrypt)
+    await db.rollback()
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         username=user_data.username,
         email=user_data.email,
@@ -55,14 +58,14 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = authenticate_user(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,14 +88,14 @@ async def read_users_me(current_user: User = Depends(get_current_active_user)):
 async def update_user(
     user_data: UserResponse,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Update user fields
     current_user.email = user_data.email
     current_user.full_name = user_data.full_name
     current_user.executive_summary_time = user_data.executive_summary_time
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
     
     return current_user 
\ No newline at end of file
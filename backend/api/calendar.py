@@ -1,15 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime, timedelta
 from pydantic import BaseModel
 import uuid
 
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_active_user
+from utils.serialization import ListSerializer
 from models.user import User
 from models.calendar import Event, Tag, Reminder
+from models.archive import ArchivedEvent
 from services.ics_service import create_ics_file, import_ics_file, export_event_to_ics
+from services.archive_service import reaches_archive
+from services.read_models import fetch_events, fetch_archived_events
 
 router = APIRouter()
 
@@ -73,25 +79,63 @@ class EventResponse(BaseModel):
     class Config:
         orm_mode = True
 
+# Precompiled serializers for the list endpoints (see ListSerializer)
+event_list_serializer = ListSerializer(EventResponse)
+tag_list_serializer = ListSerializer(TagResponse)
+
+async def load_events(db: AsyncSession, *criteria) -> List[Event]:
+    """
+    Select events with their tags and reminders loaded up front
+
+    Relationships can't be lazy-loaded on an AsyncSession, and one IN query per
+    relationship is also cheaper than a query per event. populate_existing
+    refreshes events already in the session (e.g. after an update).
+    """
+    query = select(Event).where(*criteria).options(
+        selectinload(Event.tags),
+        selectinload(Event.reminders)
+    ).execution_options(populate_existing=True)
+    return list((await db.execute(query)).scalars().all())
+
+async def load_event(db: AsyncSession, event_id: int, user_id: int) -> Optional[Event]:
+    events = await load_events(db, Event.id == event_id, Event.user_id == user_id)
+    return events[0] if events else None
+
+async def load_archived_event(db: AsyncSession, event_id: int, user_id: int) -> Optional[ArchivedEvent]:
+    result = await db.execute(select(ArchivedEvent).where(
+        ArchivedEvent.id == event_id,
+        ArchivedEvent.user_id == user_id
+    ).options(selectinload(ArchivedEvent.tags)))
+    return result.scalars().first()
+
+async def load_tags(db: AsyncSession, tag_ids: List[int], user_id: int) -> List[Tag]:
+    """Get the user's tags among tag_ids, in one query"""
+    if not tag_ids:
+        return []
+    result = await db.execute(select(Tag).where(Tag.id.in_(tag_ids), Tag.user_id == user_id))
+    return list(result.scalars().all())
+
 # Tag endpoints
 @router.get("/tags", response_model=List[TagResponse])
 async def get_tags(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return db.query(Tag).filter(Tag.user_id == current_user.id).all()
+    result = await db.execute(select(Tag).where(Tag.user_id == current_user.id))
+    return tag_list_serializer.json_response(result.scalars().all())
 
 @router.post("/tags", response_model=TagResponse)
 async def create_tag(
     tag: TagCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check if tag already exists
-    existing_tag = db.query(Tag).filter(
+    result = await db.execute(select(Tag).where(
         Tag.name == tag.name,
         Tag.user_id == current_user.id
-    ).first()
+    ))
+    existing_tag = result.scalars().first()
     
     if existing_tag:
         raise HTTPException(status_code=400, detail="Tag already exists")
@@ -104,8 +148,8 @@ async def create_tag(
     )
     
     db.add(db_tag)
-    db.commit()
-    db.refresh(db_tag)
+    await db.commit()
+    await db.refresh(db_tag)
     
     return db_tag
 
@@ -113,20 +157,21 @@ async def create_tag(
 async def delete_tag(
     tag_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Get tag
-    tag = db.query(Tag).filter(
+    # Get tag (with its events, so the event_tag rows are removed too)
+    result = await db.execute(select(Tag).where(
         Tag.id == tag_id,
         Tag.user_id == current_user.id
-    ).first()
+    ).options(selectinload(Tag.events), selectinload(Tag.archived_events)))
+    tag = result.scalars().first()
     
     if not tag:
         raise HTTPException(status_code=404, detail="Tag not found")
     
     # Delete tag
-    db.delete(tag)
-    db.commit()
+    await db.delete(tag)
+    await db.commit()
     
     return {"message": "Tag deleted successfully"}
 
@@ -137,35 +182,43 @@ async def get_events(
     end_date: Optional[datetime] = Query(None),
     tag_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(Event).filter(Event.user_id == current_user.id)
+    criteria = [Event.user_id == current_user.id]
+    archived_criteria = [ArchivedEvent.user_id == current_user.id]
     
     # Filter by date range
     if start_date:
-        query = query.filter(Event.end_time >= start_date)
+        criteria.append(Event.end_time >= start_date)
+        archived_criteria.append(ArchivedEvent.end_time >= start_date)
     if end_date:
-        query = query.filter(Event.start_time <= end_date)
+        criteria.append(Event.start_time <= end_date)
+        archived_criteria.append(ArchivedEvent.start_time <= end_date)
     
     # Filter by tag
     if tag_id:
-        tag = db.query(Tag).filter(Tag.id == tag_id, Tag.user_id == current_user.id).first()
-        if not tag:
+        tags = await load_tags(db, [tag_id], current_user.id)
+        if not tags:
             raise HTTPException(status_code=404, detail="Tag not found")
-        query = query.filter(Event.tags.contains(tag))
+        criteria.append(Event.tags.contains(tags[0]))
+        archived_criteria.append(ArchivedEvent.tags.contains(tags[0]))
+    
+    # Read models rather than ORM instances (see services/read_models.py)
+    events = await fetch_events(db, *criteria)
     
-    return query.all()
+    # Old events live in the archive; only look there if the range reaches back that far
+    if reaches_archive(start_date):
+        events = await fetch_archived_events(db, *archived_criteria) + events
+    
+    return event_list_serializer.json_response(events)
 
 @router.get("/events/{event_id}", response_model=EventResponse)
 async def get_event(
     event_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = db.query(Event).filter(
-        Event.id == event_id,
-        Event.user_id == current_user.id
-    ).first()
+    event = await load_event(db, event_id, current_user.id) or await load_archived_event(db, event_id, current_user.id)
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -176,34 +229,31 @@ async def get_event(
 async def create_event(
     event: EventCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check for date validity
     if event.end_time < event.start_time:
         raise HTTPException(status_code=400, detail="End time must be after start time")
     
     # Check for conflicts
-    conflicts = db.query(Event).filter(
+    result = await db.execute(select(Event.id).where(
         Event.user_id == current_user.id,
         Event.start_time < event.end_time,
         Event.end_time > event.start_time
-    ).all()
+    ))
+    conflicts = result.scalars().all()
     
     if conflicts:
         # We could handle this better, but for now just warning
         pass  # In a real app, we might want to return conflict information
     
     # Get tags
-    tags = []
-    for tag_id in event.tag_ids:
-        tag = db.query(Tag).filter(Tag.id == tag_id, Tag.user_id == current_user.id).first()
-        if tag:
-            tags.append(tag)
+    tags = await load_tags(db, event.tag_ids, current_user.id)
     
     # Create ICS UID
     ics_uid = str(uuid.uuid4())
     
-    # Create new event
+    # Create new event with its reminders
     db_event = Event(
         title=event.title,
         description=event.description,
@@ -213,23 +263,16 @@ async def create_event(
         is_all_day=event.is_all_day,
         ics_uid=ics_uid,
         user_id=current_user.id,
-        tags=tags
+        tags=tags,
+        reminders=[
+            Reminder(minutes_before=reminder_data.minutes_before)
+            for reminder_data in event.reminders
+        ]
     )
     
     db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
-    
-    # Add reminders
-    for reminder_data in event.reminders:
-        reminder = Reminder(
-            minutes_before=reminder_data.minutes_before,
-            event_id=db_event.id
-        )
-        db.add(reminder)
-    
-    db.commit()
-    db.refresh(db_event)
+    await db.commit()
+    db_event = await load_event(db, db_event.id, current_user.id)
     
     # Generate ICS file (in a real app, this would be stored somewhere)
     create_ics_file(db_event)
@@ -241,17 +284,14 @@ async def update_event(
     event_id: int,
     event_data: EventCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Check date validity
     if event_data.end_time < event_data.start_time:
         raise HTTPException(status_code=400, detail="End time must be after start time")
     
     # Get event
-    event = db.query(Event).filter(
-        Event.id == event_id,
-        Event.user_id == current_user.id
-    ).first()
+    event = await load_event(db, event_id, current_user.id)
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -265,27 +305,16 @@ async def update_event(
     event.is_all_day = event_data.is_all_day
     
     # Update tags
-    new_tags = []
-    for tag_id in event_data.tag_ids:
-        tag = db.query(Tag).filter(Tag.id == tag_id, Tag.user_id == current_user.id).first()
-        if tag:
-            new_tags.append(tag)
-    event.tags = new_tags
-    
-    # Update reminders
-    # Delete existing reminders
-    db.query(Reminder).filter(Reminder.event_id == event.id).delete()
-    
-    # Add new reminders
-    for reminder_data in event_data.reminders:
-        reminder = Reminder(
-            minutes_before=reminder_data.minutes_before,
-            event_id=event.id
-        )
-        db.add(reminder)
-    
-    db.commit()
-    db.refresh(event)
+    event.tags = await load_tags(db, event_data.tag_ids, current_user.id)
+    
+    # Replace reminders (the old ones are deleted as orphans)
+    event.reminders = [
+        Reminder(minutes_before=reminder_data.minutes_before)
+        for reminder_data in event_data.reminders
+    ]
+    
+    await db.commit()
+    event = await load_event(db, event_id, current_user.id)
     
     # Update ICS file
     create_ics_file(event)
@@ -296,20 +325,17 @@ async def update_event(
 async def delete_event(
     event_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Get event
-    event = db.query(Event).filter(
-        Event.id == event_id,
-        Event.user_id == current_user.id
-    ).first()
+    # Get event (with the tags and reminders its deletion cascades to)
+    event = await load_event(db, event_id, current_user.id)
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
     
     # Delete event
-    db.delete(event)
-    db.commit()
+    await db.delete(event)
+    await db.commit()
     
     return {"message": "Event deleted successfully"}
 
@@ -317,13 +343,10 @@ async def delete_event(
 async def export_event_ics(
     event_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Get event
-    event = db.query(Event).filter(
-        Event.id == event_id,
-        Event.user_id == current_user.id
-    ).first()
+    event = await load_event(db, event_id, current_user.id) or await load_archived_event(db, event_id, current_user.id)
     
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
@@ -340,12 +363,20 @@ async def export_event_ics(
 async def import_ics(
     ics_file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Read ICS file content
     ics_content = await ics_file.read()
     
-    # Import events from ICS
-    imported_events = import_ics_file(ics_content, current_user.id, db)
+    # Import events from ICS (the importer is synchronous, so run it on the
+    # session's underlying Session in a greenlet)
+    imported_events = await db.run_sync(
+        lambda session: import_ics_file(ics_content, current_user.id, session)
+    )
     
-    return imported_events 
\ No newline at end of file
+    # Reload them with tags and reminders, in import order
+    event_ids = [event.id for event in imported_events]
+    if not event_ids:
+        return []
+    events_by_id = {event.id: event for event in await load_events(db, Event.id.in_(event_ids))}
+    return [events_by_id[event_id] for event_id in event_ids]
\ No newline at end of file
@@ -1,25 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal, Awaitable, TypeVar
 from pydantic import BaseModel
 from datetime import datetime, timedelta
+import asyncio
+import json
 import tempfile
 import os
 
-from utils.database import get_db
+from utils.database import get_async_db, AsyncSessionLocal
 from utils.config import settings
 from models.calendar import Event
 from models.todo import TodoItem
-from services.todo_service import create_todo_from_text
-from services.calendar_service import create_event_from_text
-from services.together_ai_service import process_chat_message
+from services.chat_item_service import create_items_from_chat
+from services.together_ai_service import process_chat_message, stream_chat_message, build_acknowledgement, completion_cache
+from services.quick_parser import parse_quick_intent
+from services.conversation_store import conversation_store
+from services.llm_client import LLMUnavailableError, circuit_breaker, get_llm_stats
 
 router = APIRouter()
 
-# In-memory conversation history store (simple implementation)
-# For production, this should be stored in database
-# Key is user_id, value is list of conversation messages
-conversation_history = {}
+# How often to check whether the client went away while waiting on the LLM
+DISCONNECT_POLL_SECONDS = 0.5
+
+T = TypeVar("T")
+
+async def run_until_disconnect(request: Request, coro: Awaitable[T]) -> T:
+    """
+    Await a coroutine, cancelling it if the HTTP client disconnects first
+
+    Avoids paying for LLM calls whose answer nobody will read.
+    """
+    task = asyncio.ensure_future(coro)
+    while True:
+        done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+        if done:
+            return task.result()
+        if await request.is_disconnected():
+            task.cancel()
+            raise HTTPException(status_code=499, detail="Client closed request")
+
+def llm_unavailable() -> HTTPException:
+    """503 telling the client when the LLM circuit breaker will try again"""
+    return HTTPException(
+        status_code=503,
+        detail="The AI service is temporarily unavailable",
+        headers={"Retry-After": str(circuit_breaker.retry_after())}
+    )
 
 # Pydantic models for request/response
 class ChatMessage(BaseModel):
@@ -32,6 +61,10 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     message: str
+    # Override settings.CHAT_ACK_MODE for this turn ("followup", "inline" or "template")
+    ack_mode: Optional[Literal["followup", "inline", "template"]] = None
+    # Always ask the LLM instead of reusing a cached completion
+    bypass_cache: bool = False
     
     class Config:
         from_attributes = True
@@ -39,6 +72,8 @@ class ChatRequest(BaseModel):
 class ChatResponse(BaseModel):
     response: str
     created_items: Optional[List[dict]] = None
+    # One entry per extracted item with its status ("created" or "error")
+    item_results: Optional[List[dict]] = None
     
     class Config:
         from_attributes = True
@@ -46,72 +81,172 @@ class ChatResponse(BaseModel):
 @router.post("/chat/text", response_model=ChatResponse)
 async def chat_text(
     chat_request: ChatRequest,
-    db: Session = Depends(get_db)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    if not settings.TOGETHER_API_KEY:
+    # Simple scheduling messages are handled locally without calling the LLM
+    quick_item = parse_quick_intent(chat_request.message) if settings.CHAT_QUICK_PARSE_ENABLED else None
+    
+    if not quick_item and not settings.TOGETHER_API_KEY:
         raise HTTPException(status_code=500, detail="Together API key is not configured")
     
     # Fixed user ID (single user system)
     user_id = 1
     
-    # Get or initialize conversation history for this user
-    if user_id not in conversation_history:
-        conversation_history[user_id] = []
+    user_message = {"role": "user", "content": chat_request.message}
     
-    # Add user message to history
-    conversation_history[user_id].append({"role": "user", "content": chat_request.message})
+    if quick_item:
+        response, generated_items = build_acknowledgement(quick_item), [quick_item]
+    else:
+        # Get conversation history for this user, plus the new message
+        history, summary = await db.run_sync(lambda session: conversation_store.get_context(user_id, session))
+        history.append(user_message)
+        # Don't hold a pooled connection while waiting on the LLM
+        await db.rollback()
+        
+        # Process message using Together AI with conversation history
+        try:
+            response, generated_items = await run_until_disconnect(request, process_chat_message(
+                chat_request.message, 
+                user_id,
+                db,
+                history,
+                ack_mode=chat_request.ack_mode,
+                summary=summary,
+                bypass_cache=chat_request.bypass_cache
+            ))
+        except LLMUnavailableError:
+            raise llm_unavailable()
     
-    # Process message using Together AI with conversation history
-    response, generated_items = await process_chat_message(
-        chat_request.message, 
-        user_id,
-        db,
-        conversation_history[user_id]
-    )
+    # Save both sides of the exchange (the store keeps the last CONVERSATION_MAX_MESSAGES)
+    await db.run_sync(lambda session: conversation_store.append(
+        user_id, [user_message, {"role": "assistant", "content": response}], session
+    ))
     
-    # Add AI response to history
-    conversation_history[user_id].append({"role": "assistant", "content": response})
-    
-    # Keep history to a reasonable size (last 10 messages)
-    if len(conversation_history[user_id]) > 20:
-        conversation_history[user_id] = conversation_history[user_id][-20:]
-    
-    # Directly create items based on LLM output without additional confirmation
-    created_items = []
-    if generated_items:
-        for item in generated_items:
-            try:
-                if item["type"] == "todo":
-                    todo_item = create_todo_from_text(item["data"], user_id, db)
-                    created_items.append({
-                        "type": "todo",
-                        "id": todo_item.id,
-                        "title": todo_item.title
-                    })
-                    print(f"Successfully created todo item: {todo_item.title} with ID: {todo_item.id}")
-                elif item["type"] == "event":
-                    event = create_event_from_text(item["data"], user_id, db)
-                    created_items.append({
-                        "type": "event",
-                        "id": event.id,
-                        "title": event.title
-                    })
-                    print(f"Successfully created event: {event.title} with ID: {event.id}")
-            except Exception as e:
-                print(f"Error creating item: {str(e)}")
-                # Continue even if one item fails
+    # Directly create items based on LLM output without additional confirmation,
+    # all in one transaction
+    item_results = await db.run_sync(
+        lambda session: create_items_from_chat(generated_items, user_id, session)
+    ) if generated_items else []
+    created_items = [
+        {"type": result["type"], "id": result["id"], "title": result["title"]}
+        for result in item_results if result["status"] == "created"
+    ]
     
     # Only return created_items if we actually created something
     has_created_items = len(created_items) > 0
     
     return {
         "response": response,
-        "created_items": created_items if has_created_items else None
+        "created_items": created_items if has_created_items else None,
+        "item_results": item_results if item_results else None
     }
 
+async def iter_events(events: List[dict]):
+    """Async iterator over already-known stream events"""
+    for event in events:
+        yield event
+
+def format_sse(event: str, data: dict) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(
+    chat_request: ChatRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Streaming variant of /chat/text (server-sent events)
+    
+    Events: "token" ({"content": ...}) as the reply is generated, "error" if
+    the LLM call fails, "items" ({"created_items": ..., "item_results": ...})
+    once extracted items are created, and a final "done" ({"response": ...}).
+    """
+    # Simple scheduling messages are handled locally without calling the LLM
+    quick_item = parse_quick_intent(chat_request.message) if settings.CHAT_QUICK_PARSE_ENABLED else None
+    
+    if not quick_item and not settings.TOGETHER_API_KEY:
+        raise HTTPException(status_code=500, detail="Together API key is not configured")
+    
+    # Fail before the stream starts, while a status code can still be sent
+    if not quick_item and circuit_breaker.state == "open":
+        raise llm_unavailable()
+    
+    # Fixed user ID (single user system)
+    user_id = 1
+    
+    user_message = {"role": "user", "content": chat_request.message}
+    
+    if quick_item:
+        acknowledgement = build_acknowledgement(quick_item)
+        events = iter_events([
+            {"type": "token", "content": acknowledgement},
+            {"type": "done", "response": acknowledgement, "generated_items": [quick_item]}
+        ])
+    else:
+        # Get conversation history for this user, plus the new message
+        history, summary = await db.run_sync(lambda session: conversation_store.get_context(user_id, session))
+        history.append(user_message)
+        await db.rollback()
+        events = stream_chat_message(
+            chat_request.message,
+            user_id,
+            history,
+            ack_mode=chat_request.ack_mode,
+            summary=summary
+        )
+    
+    async def event_stream():
+        async for event in events:
+            if event["type"] != "done":
+                yield format_sse(event["type"], {key: value for key, value in event.items() if key != "type"})
+                continue
+            
+            # The request's session may already be closed while streaming, so use our own
+            async with AsyncSessionLocal() as stream_db:
+                await stream_db.run_sync(lambda session: conversation_store.append(
+                    user_id, [user_message, {"role": "assistant", "content": event["response"]}], session
+                ))
+                item_results = await stream_db.run_sync(
+                    lambda session: create_items_from_chat(event["generated_items"], user_id, session)
+                ) if event["generated_items"] else []
+            
+            if item_results:
+                created_items = [
+                    {"type": result["type"], "id": result["id"], "title": result["title"]}
+                    for result in item_results if result["status"] == "created"
+                ]
+                yield format_sse("items", {
+                    "created_items": created_items or None,
+                    "item_results": item_results
+                })
+            
+            yield format_sse("done", {"response": event["response"]})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/cache-stats", response_model=dict)
+async def get_cache_stats():
+    """
+    Hit-rate statistics of the LLM completion cache for this worker
+    """
+    return completion_cache.stats()
+
+@router.get("/llm-stats", response_model=dict)
+async def get_llm_call_stats():
+    """
+    Call counts, token usage, latency percentiles and circuit breaker state of the LLM client for this worker
+    """
+    return get_llm_stats()
+
 @router.get("/daily-summary", response_model=dict)
 async def get_daily_summary(
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Fixed user ID (single user system)
     user_id = 1
@@ -121,18 +256,20 @@ async def get_daily_summary(
     today = datetime.now().date()
     tomorrow = today + timedelta(days=1)
     
-    # Get today's events
-    events = db.query(Event).filter(
+    # Get today's events (only the columns the summary uses, as named tuples)
+    result = await db.execute(select(Event.title, Event.start_time, Event.is_all_day).where(
         Event.user_id == user_id,
         Event.start_time >= today,
         Event.start_time < tomorrow
-    ).order_by(Event.start_time).all()
+    ).order_by(Event.start_time))
+    events = result.all()
     
     # Get incomplete todo items
-    todo_items = db.query(TodoItem).filter(
+    result = await db.execute(select(TodoItem.title, TodoItem.deadline).where(
         TodoItem.user_id == user_id,
         TodoItem.is_completed == False
-    ).order_by(TodoItem.deadline).all()
+    ).order_by(TodoItem.deadline))
+    todo_items = result.all()
     
     # Create simple summary
     summary = f"Daily Summary for {today.strftime('%A, %B %d, %Y')}:\n\n"
@@ -156,14 +293,15 @@ async def get_daily_summary(
     return {"summary": summary}
 
 @router.post("/chat/clear-history", response_model=dict)
-async def clear_chat_history():
+async def clear_chat_history(
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Clear the conversation history for the user
     """
     # Fixed user ID (single user system)
     user_id = 1
     
-    if user_id in conversation_history:
-        conversation_history[user_id] = []
+    await db.run_sync(lambda session: conversation_store.clear(user_id, session))
     
     return {"message": "Conversation history cleared successfully"} 
\ No newline at end of file
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
+from datetime import datetime
+from pydantic import BaseModel
+
+from utils.database import get_async_db
+from utils.auth import get_current_active_user
+from models.user import User
+from services.search_service import search_items
+
+router = APIRouter()
+
+class SearchResult(BaseModel):
+    type: Literal["event", "todo"]
+    id: int
+    title: str
+    snippet: Optional[str] = None
+    rank: float  # Higher is better; only comparable within one search
+    # Events
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    # Todo items
+    deadline: Optional[datetime] = None
+    is_completed: Optional[bool] = None
+
+class SearchResponse(BaseModel):
+    query: str
+    limit: int
+    offset: int
+    has_more: bool
+    results: List[SearchResult]
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    current_user: Optional[User] = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over the titles, descriptions and locations of events and todo items
+
+    Every word has to match, the last one as a prefix ("dent" finds
+    "dentist"). Title matches are ranked first. Archived events and todo
+    items are not searched.
+    """
+    # For development, if user is not authenticated, use a fixed user ID
+    user_id = current_user.id if current_user else 1
+    
+    page = await search_items(db, q, user_id, limit, offset)
+    
+    return {
+        "query": q,
+        "limit": limit,
+        "offset": offset,
+        "has_more": page["has_more"],
+        "results": page["results"]
+    }
@@ -1,14 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 from datetime import datetime, timedelta
 from enum import Enum
 from pydantic import BaseModel
 
-from utils.database import get_db
+from utils.database import get_async_db
 from utils.auth import get_current_active_user
+from utils.serialization import ListSerializer
 from models.user import User
 from models.todo import TodoItem, TodoReminder, PriorityLevel
+from services.read_models import fetch_todo_items
 
 router = APIRouter()
 
@@ -57,40 +61,59 @@ class SortOrder(str, Enum):
     PRIORITY = "priority"
     CREATED = "created"
 
+# Precompiled serializer for the list endpoints (see ListSerializer)
+todo_list_serializer = ListSerializer(TodoItemResponse)
+
+async def load_todo_items(db: AsyncSession, *criteria, order_by=()) -> List[TodoItem]:
+    """
+    Select todo items with their reminders loaded up front
+
+    Relationships can't be lazy-loaded on an AsyncSession. populate_existing
+    refreshes items already in the session (e.g. after an update).
+    """
+    query = select(TodoItem).where(*criteria).order_by(*order_by).options(
+        selectinload(TodoItem.reminders)
+    ).execution_options(populate_existing=True)
+    return list((await db.execute(query)).scalars().all())
+
+async def load_todo_item(db: AsyncSession, todo_id: int, user_id: int) -> Optional[TodoItem]:
+    items = await load_todo_items(db, TodoItem.id == todo_id, TodoItem.user_id == user_id)
+    return items[0] if items else None
+
 @router.get("/items", response_model=List[TodoItemResponse])
 async def get_todo_items(
     completed: Optional[bool] = Query(None),
     sort_by: Optional[SortOrder] = Query(SortOrder.CREATED),
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
     
-    query = db.query(TodoItem).filter(TodoItem.user_id == user_id)
+    criteria = [TodoItem.user_id == user_id]
     
     # Filter by completion status
     if completed is not None:
-        query = query.filter(TodoItem.is_completed == completed)
+        criteria.append(TodoItem.is_completed == completed)
     
     # Sort
     if sort_by == SortOrder.ALPHABETICAL:
-        query = query.order_by(TodoItem.title)
+        order_by = [TodoItem.title]
     elif sort_by == SortOrder.DEADLINE:
         # Handle null deadlines (put them at the end)
-        query = query.order_by(TodoItem.deadline.is_(None), TodoItem.deadline)
+        order_by = [TodoItem.deadline.is_(None), TodoItem.deadline]
     elif sort_by == SortOrder.PRIORITY:
         # High priority first
-        query = query.order_by(TodoItem.priority.desc())
+        order_by = [TodoItem.priority.desc()]
     else:  # CREATED (default)
-        query = query.order_by(TodoItem.created_at.desc())
+        order_by = [TodoItem.created_at.desc()]
     
-    return query.all()
+    return todo_list_serializer.json_response(await fetch_todo_items(db, *criteria, order_by=order_by))
 
 @router.get("/items/today", response_model=List[TodoItemResponse])
 async def get_today_todo_items(
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
@@ -100,7 +123,8 @@ async def get_today_todo_items(
     tomorrow = today + timedelta(days=1)
     
     # Query items with deadline today or no deadline but created today
-    query = db.query(TodoItem).filter(
+    items = await fetch_todo_items(
+        db,
         TodoItem.user_id == user_id,
         (
             (TodoItem.deadline >= today) & 
@@ -112,22 +136,18 @@ async def get_today_todo_items(
             (TodoItem.deadline.is_(None))
         )
     )
-    
-    return query.all()
+    return todo_list_serializer.json_response(items)
 
 @router.get("/items/{todo_id}", response_model=TodoItemResponse)
 async def get_todo_item(
     todo_id: int,
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
     
-    todo_item = db.query(TodoItem).filter(
-        TodoItem.id == todo_id,
-        TodoItem.user_id == user_id
-    ).first()
+    todo_item = await load_todo_item(db, todo_id, user_id)
     
     if not todo_item:
         raise HTTPException(status_code=404, detail="Todo item not found")
@@ -138,52 +158,41 @@ async def get_todo_item(
 async def create_todo_item(
     todo_item: TodoItemCreate,
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
     
-    # Create new todo item
+    # Create new todo item with its reminders
     db_todo_item = TodoItem(
         title=todo_item.title,
         description=todo_item.description,
         deadline=todo_item.deadline,
         priority=todo_item.priority,
-        user_id=user_id
+        user_id=user_id,
+        reminders=[
+            TodoReminder(minutes_before=reminder_data.minutes_before)
+            for reminder_data in todo_item.reminders
+        ]
     )
     
     db.add(db_todo_item)
-    db.commit()
-    db.refresh(db_todo_item)
-    
-    # Add reminders
-    for reminder_data in todo_item.reminders:
-        reminder = TodoReminder(
-            minutes_before=reminder_data.minutes_before,
-            todo_item_id=db_todo_item.id
-        )
-        db.add(reminder)
+    await db.commit()
     
-    db.commit()
-    db.refresh(db_todo_item)
-    
-    return db_todo_item
+    return await load_todo_item(db, db_todo_item.id, user_id)
 
 @router.put("/items/{todo_id}", response_model=TodoItemResponse)
 async def update_todo_item(
     todo_id: int,
     todo_data: TodoItemCreate,
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
     
     # Get todo item
-    todo_item = db.query(TodoItem).filter(
-        TodoItem.id == todo_id,
-        TodoItem.user_id == user_id
-    ).first()
+    todo_item = await load_todo_item(db, todo_id, user_id)
     
     if not todo_item:
         raise HTTPException(status_code=404, detail="Todo item not found")
@@ -194,37 +203,27 @@ async def update_todo_item(
     todo_item.deadline = todo_data.deadline
     todo_item.priority = todo_data.priority
     
-    # Update reminders
-    # Delete existing reminders
-    db.query(TodoReminder).filter(TodoReminder.todo_item_id == todo_item.id).delete()
-    
-    # Add new reminders
-    for reminder_data in todo_data.reminders:
-        reminder = TodoReminder(
-            minutes_before=reminder_data.minutes_before,
-            todo_item_id=todo_item.id
-        )
-        db.add(reminder)
+    # Replace reminders (the old ones are deleted as orphans)
+    todo_item.reminders = [
+        TodoReminder(minutes_before=reminder_data.minutes_before)
+        for reminder_data in todo_data.reminders
+    ]
     
-    db.commit()
-    db.refresh(todo_item)
+    await db.commit()
     
-    return todo_item
+    return await load_todo_item(db, todo_id, user_id)
 
 @router.patch("/items/{todo_id}/toggle", response_model=TodoItemResponse)
 async def toggle_todo_completion(
     todo_id: int,
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
     
     # Get todo item
-    todo_item = db.query(TodoItem).filter(
-        TodoItem.id == todo_id,
-        TodoItem.user_id == user_id
-    ).first()
+    todo_item = await load_todo_item(db, todo_id, user_id)
     
     if not todo_item:
         raise HTTPException(status_code=404, detail="Todo item not found")
@@ -232,31 +231,27 @@ async def toggle_todo_completion(
     # Toggle completion status
     todo_item.is_completed = not todo_item.is_completed
     
-    db.commit()
-    db.refresh(todo_item)
+    await db.commit()
     
-    return todo_item
+    return await load_todo_item(db, todo_id, user_id)
 
 @router.delete("/items/{todo_id}", response_model=dict)
 async def delete_todo_item(
     todo_id: int,
     current_user: Optional[User] = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # For development, if user is not authenticated, use a fixed user ID
     user_id = current_user.id if current_user else 1
     
-    # Get todo item
-    todo_item = db.query(TodoItem).filter(
-        TodoItem.id == todo_id,
-        TodoItem.user_id == user_id
-    ).first()
+    # Get todo item (with the reminders its deletion cascades to)
+    todo_item = await load_todo_item(db, todo_id, user_id)
     
     if not todo_item:
         raise HTTPException(status_code=404, detail="Todo item not found")
     
     # Delete todo item
-    db.delete(todo_item)
-    db.commit()
+    await db.delete(todo_item)
+    await db.commit()
     
-    return {"message": "Todo item deleted successfully"} 
\ No newline at end of file
+    return {"message": "Todo item deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Recent-range event reads before and after archiving old rows
+
+Seeds a temporary database with --years of history for one user (--per-day
+events a day plus as many completed todos), then times
+GET /api/calendar/events for the coming week and GET /api/todo/items
+in-process, runs the archive job and times them again.
+
+Usage (from the backend directory):
+    python benchmarks/archive_hot_reads.py --years 5 --per-day 20 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_utils import summarize
+
+async def measure(client, path: str, params: dict, headers: dict, total: int):
+    latencies = []
+    for _ in range(total):
+        start = time.perf_counter()
+        response = await client.get(path, params=params, headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+async def main(args, directory):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'archive.db')}"
+
+    from main import app
+    from models.user import User
+    from models.calendar import Event
+    from models.todo import TodoItem
+    from utils.auth import create_access_token
+    from utils.config import settings
+    from utils.database import Base, engine, SessionLocal, async_engine
+    from services.archive_service import archive_cold_rows
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    now = datetime.utcnow()
+    rows = []
+    for day in range(-args.years * 365, 30):
+        for slot in range(args.per_day):
+            start = now + timedelta(days=day, minutes=slot * 30)
+            rows.append({"title": f"Event {day}/{slot}", "start_time": start, "end_time": start + timedelta(minutes=25),
+                         "user_id": user.id, "is_all_day": False, "created_at": start, "updated_at": start})
+    db.execute(Event.__table__.insert(), rows)
+    db.execute(TodoItem.__table__.insert(), [
+        {"title": row["title"], "user_id": user.id, "is_completed": row["start_time"] < now, "priority": "LOW",
+         "created_at": row["start_time"], "updated_at": row["start_time"]}
+        for row in rows
+    ])
+    db.commit()
+    print(f"Seeded {len(rows)} events and {len(rows)} todo items")
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    week = {"start_date": now.isoformat(), "end_date": (now + timedelta(days=7)).isoformat()}
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=120) as client:
+        for label in ("before archiving", "after archiving"):
+            if label == "after archiving":
+                start = time.perf_counter()
+                archived = archive_cold_rows(db, settings.ARCHIVE_EVENTS_AFTER_DAYS, settings.ARCHIVE_TODOS_AFTER_DAYS, settings.ARCHIVE_BATCH_SIZE)
+                print(f"Archived {archived} in {time.perf_counter() - start:.1f} s")
+            events = await measure(client, "/api/calendar/events", week, headers, args.requests)
+            todos = await measure(client, "/api/todo/items", {"completed": "false"}, headers, args.requests)
+            print(f"{label}:")
+            print(f"    events (next week)    {summarize(events)}")
+            print(f"    todo items (open)     {summarize(todos)}")
+    db.close()
+    await async_engine.dispose()
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--per-day", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_directory:
+        asyncio.run(main(arguments, temp_directory))
@@ -0,0 +1,77 @@
+"""
+Throughput of a database-backed endpoint as in-flight requests increase
+
+Sends GET requests (GET /api/todo/items by default) from 1, 2, 4, ... up to
+--max-concurrency concurrent clients and reports requests per second and
+latency at each level. Since the routes use AsyncSession, a request waiting
+on the database no longer blocks the event loop, so throughput should keep
+rising until the database or the pool (DB_POOL_SIZE + DB_MAX_OVERFLOW) is the
+limit, instead of staying flat (or deadlocking on the pool) as with blocking
+sessions.
+
+Runs in-process by default; pass --base-url to measure a running server
+(e.g. uvicorn with DATABASE_URL pointing at PostgreSQL). Run init_db.py first
+so the sample user exists.
+
+Usage (from the backend directory):
+    python benchmarks/async_db_scaling.py --requests 1000 --max-concurrency 32
+    python benchmarks/async_db_scaling.py --base-url http://localhost:8000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.auth import create_access_token
+from bench_utils import summarize
+
+async def run(client: httpx.AsyncClient, path: str, headers: dict, total: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return total / (time.perf_counter() - start), latencies
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': args.username})}"}
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        from main import app
+        client = httpx.AsyncClient(app=app, base_url="http://bench", timeout=60)
+
+    async with client:
+        # Warm up the connection pool
+        await run(client, args.path, headers, 50, 4)
+        concurrency = 1
+        while concurrency <= args.max_concurrency:
+            throughput, latencies = await run(client, args.path, headers, args.requests, concurrency)
+            print(f"concurrency {concurrency:>3}  {throughput:8.1f} req/s  {summarize(latencies)}")
+            concurrency *= 2
+
+    if not args.base_url:
+        # Close the pooled connections (aiosqlite keeps a thread per connection)
+        from utils.database import async_engine
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--max-concurrency", type=int, default=32)
+    parser.add_argument("--username", default="sample")
+    parser.add_argument("--path", default="/api/todo/items", help="Authenticated GET endpoint to call")
+    parser.add_argument("--base-url", help="Server to call instead of running the app in-process")
+    asyncio.run(main(parser.parse_args()))
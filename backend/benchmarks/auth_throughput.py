@@ -0,0 +1,60 @@
+"""
+Authenticated request throughput with and without the user cache
+
+Calls a small authenticated endpoint (GET /api/calendar/tags by default)
+in-process (no network) from a number of concurrent clients with a bearer
+token for the sample user, once with AUTH_USER_CACHE_ENABLED off and once on,
+and reports requests per second and latency. Run init_db.py first so the sample user exists.
+
+Usage (from the backend directory):
+    python benchmarks/auth_throughput.py --requests 2000 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from utils.auth import create_access_token, user_cache
+from utils.config import settings
+from bench_utils import summarize
+
+async def run(client: httpx.AsyncClient, path: str, headers: dict, total: int, concurrency: int):
+    latencies = []
+    remaining = iter(range(total))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return total / (time.perf_counter() - start), latencies
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': args.username})}"}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        for enabled in (False, True):
+            settings.AUTH_USER_CACHE_ENABLED = enabled
+            user_cache.clear()
+            # Warm up (and fill the cache when enabled)
+            await run(client, args.path, headers, 50, 1)
+            throughput, latencies = await run(client, args.path, headers, args.requests, args.concurrency)
+            label = "user cache on" if enabled else "user cache off"
+            print(f"{label:<16} {throughput:8.1f} req/s  {summarize(latencies)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--username", default="sample")
+    parser.add_argument("--path", default="/api/calendar/tags", help="Authenticated GET endpoint to call")
+    asyncio.run(main(parser.parse_args()))
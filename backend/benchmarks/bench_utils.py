@@ -0,0 +1,13 @@
+"""Helpers shared by the benchmark scripts"""
+import statistics
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize(samples):
+    """Format p50/p95/max of millisecond samples on one line"""
+    return (f"p50={statistics.median(samples):8.2f} ms  p95={percentile(samples, 95):8.2f} ms  "
+            f"max={max(samples):8.2f} ms  n={len(samples)}")
@@ -0,0 +1,54 @@
+"""
+Load test: does chat traffic slow down calendar/todo requests?
+
+Measures todo list latency on its own, then again while a number of chat
+requests are in flight. With blocking LLM calls the second run degrades badly;
+with the async client the two should be close.
+
+Usage (against a running server):
+    python benchmarks/chat_load_test.py --base-url http://localhost:8000 --chat-concurrency 16
+"""
+import argparse
+import asyncio
+import time
+import httpx
+
+from bench_utils import summarize
+
+async def measure_reads(client: httpx.AsyncClient, count: int):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/api/todo/items")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+async def chat_worker(client: httpx.AsyncClient, stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await client.post("/api/chatbot/chat/text", json={"message": "What's on my calendar today?"})
+        except httpx.HTTPError:
+            pass
+
+async def main(args):
+    timeout = httpx.Timeout(120.0)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout) as client:
+        baseline = await measure_reads(client, args.reads)
+        print(f"{'todo reads (idle)':<24} {summarize(baseline)}")
+
+        stop = asyncio.Event()
+        workers = [asyncio.create_task(chat_worker(client, stop)) for _ in range(args.chat_concurrency)]
+        # Give the chat requests time to reach the LLM call
+        await asyncio.sleep(1)
+        loaded = await measure_reads(client, args.reads)
+        stop.set()
+        await asyncio.gather(*workers)
+        print(f"{'todo reads (chat load)':<24} {summarize(loaded)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--chat-concurrency", type=int, default=8)
+    asyncio.run(main(parser.parse_args()))
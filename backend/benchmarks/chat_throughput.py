@@ -0,0 +1,72 @@
+"""
+Throughput of /api/chatbot/chat/text
+
+Sends chat messages from a number of concurrent clients for a fixed duration
+and reports requests per second, latency and status codes. Messages are made
+unique and sent with bypass_cache so every request reaches the LLM. Run the
+server against benchmarks/mock_llm_server.py to measure without network
+access, e.g.:
+
+    python benchmarks/mock_llm_server.py --latency-ms 800 &
+    LLM_API_BASE=http://localhost:9000/v1 TOGETHER_API_KEY=mock CHAT_QUICK_PARSE_ENABLED=false uvicorn main:app &
+    python benchmarks/chat_throughput.py --concurrency 32 --duration 30
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import Counter
+import httpx
+
+from bench_utils import summarize
+
+MESSAGES = [
+    "What should I focus on this afternoon?",
+    "Remind me to send the invoice to Acme",
+    "Set up a planning session with the design team",
+    "How busy is my week looking?",
+]
+
+async def client_worker(client: httpx.AsyncClient, counter, deadline: float, latencies, statuses: Counter):
+    while time.perf_counter() < deadline:
+        number = next(counter)
+        message = f"{MESSAGES[number % len(MESSAGES)]} (#{number})"
+        start = time.perf_counter()
+        try:
+            response = await client.post("/api/chatbot/chat/text", json={"message": message, "bypass_cache": True})
+            statuses[response.status_code] += 1
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def main(args):
+    latencies = []
+    statuses = Counter()
+    counter = itertools.count()
+    limits = httpx.Limits(max_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=httpx.Timeout(120.0), limits=limits) as client:
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[
+            client_worker(client, counter, deadline, latencies, statuses)
+            for _ in range(args.concurrency)
+        ])
+        elapsed = time.perf_counter() - start
+
+        llm_stats = (await client.get("/api/chatbot/llm-stats")).json()
+
+    completed = sum(count for status, count in statuses.items() if status == 200)
+    print(f"concurrency: {args.concurrency}  duration: {elapsed:.1f} s")
+    print(f"throughput: {completed / elapsed:.1f} req/s  statuses: {dict(statuses)}")
+    if latencies:
+        print(f"latency: {summarize(latencies)}")
+    print(f"server LLM stats: {llm_stats}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds to send requests for")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,47 @@
+"""
+Chat turn latency per acknowledgement mode
+
+Runs the same sample messages through process_chat_message once per ack mode
+and reports p50/p95 turn latency, so the cost of the follow-up completion in
+"followup" mode can be compared against "inline" and "template". The
+completion cache is bypassed, since every mode sends the same first request.
+
+Usage (from the backend directory, with an API key or LLM_API_BASE pointing at a mock server):
+    python benchmarks/chat_turn_latency.py --rounds 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.together_ai_service import process_chat_message, ACK_MODES
+from services.llm_client import close_client
+from bench_utils import summarize
+
+SAMPLE_MESSAGES = [
+    "Remind me to call mom tomorrow at 5pm",
+    "Add a dentist appointment on Tuesday at 10am",
+    "I need to finish the quarterly report by Friday, it's important",
+    "Meeting with Bob on Friday from 2 to 3 in room 4B",
+    "Buy milk",
+    "Lunch with Sarah next Wednesday at noon",
+]
+
+async def main(args):
+    for mode in ACK_MODES:
+        latencies = []
+        for _ in range(args.rounds):
+            for message in SAMPLE_MESSAGES:
+                start = time.perf_counter()
+                await process_chat_message(message, 1, None, [{"role": "user", "content": message}], ack_mode=mode, bypass_cache=True)
+                latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{mode:<10} {summarize(latencies)}")
+    await close_client()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""
+CPU time vs bytes saved for each response encoding and level
+
+Builds realistic payloads (a month and a year of events as the events
+endpoint returns them, a month of events as ICS, and the month as an NDJSON
+stream compressed line by line with a flush after each, as
+CompressionMiddleware does for streamed responses) and compresses each one
+with gzip, brotli and zstd at several levels (Brotli and zstandard are in
+requirements.txt; a codec whose package is missing is skipped and named in
+the output). Reports the compressed size, the compression time and the time
+to deliver the response over a --link-mbps connection (compression +
+transfer).
+
+Usage (from the backend directory):
+    python benchmarks/compression_tradeoff.py --link-mbps 5 --rounds 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import settings
+from utils import compression
+from services.read_models import EventRow, TagRow, ReminderRow
+from services.ics_service import export_event_to_ics
+from utils.serialization import dumps
+from api.calendar import event_list_serializer
+
+LEVELS = {
+    "gzip": ("COMPRESSION_GZIP_LEVEL", [1, 6, 9]),
+    "br": ("COMPRESSION_BROTLI_QUALITY", [1, 4, 6, 11]),
+    "zstd": ("COMPRESSION_ZSTD_LEVEL", [1, 3, 9, 19]),
+}
+
+TITLES = ["Team standup", "1:1 with manager", "Dentist appointment", "Lunch with Sam", "Sprint planning",
+          "Gym", "Project review", "Call with client", "Flight to Denver", "Book club"]
+
+def build_events(days: int):
+    tags = [TagRow(1, "Work", "#3498db"), TagRow(2, "Personal", "#2ecc71"), TagRow(3, "Health", "#e74c3c")]
+    start_of_day = datetime(2024, 3, 1, 8, 0)
+    events = []
+    for index in range(days * 10):
+        start = start_of_day + timedelta(days=index // 10, minutes=50 * (index % 10))
+        events.append(EventRow(
+            id=1000 + index, title=TITLES[index % len(TITLES)],
+            description="Agenda and notes in the shared doc" if index % 3 == 0 else None,
+            start_time=start, end_time=start + timedelta(minutes=45),
+            location="Conference room B" if index % 2 == 0 else None, is_all_day=False,
+            ics_uid=f"{index:08d}-6a1f-4e7b-9d2c-3f5e8a7b1c0d", created_at=start - timedelta(days=7),
+            updated_at=start - timedelta(days=2), tags=tags[:index % 3],
+            reminders=[ReminderRow(5000 + index, 15, False)]
+        ))
+    return events
+
+def compress_once(encoding: str, chunks) -> (int, float):
+    start = time.perf_counter()
+    encoder = compression.create_encoder(encoding)
+    size = 0
+    for chunk in chunks[:-1]:
+        size += len(encoder.compress(chunk)) + len(encoder.flush())
+    size += len(encoder.compress(chunks[-1])) + len(encoder.finish())
+    return size, time.perf_counter() - start
+
+def main(args):
+    month, year = build_events(30), build_events(365)
+    ics_events = [EventRow(**{**{name: getattr(event, name) for name in EventRow.__slots__}, "reminders": []}) for event in month]
+    payloads = [
+        ("month of events (JSON)", [event_list_serializer.content(month)]),
+        ("year of events (JSON)", [event_list_serializer.content(year)]),
+        ("month of events (ICS)", ["".join(export_event_to_ics(event) for event in ics_events).encode()]),
+        ("month as NDJSON stream", [dumps(event_list_serializer.project(event)) + b"\n" for event in month]),
+    ]
+    link_bytes_per_second = args.link_mbps * 1e6 / 8
+    encodings = ["gzip"] + (["br"] if compression.brotli else []) + (["zstd"] if compression.zstandard else [])
+    missing = [name for name, module in (("brotli", compression.brotli), ("zstandard", compression.zstandard)) if module is None]
+
+    for label, chunks in payloads:
+        raw = sum(len(chunk) for chunk in chunks)
+        print(f"{label}: {raw / 1024:.0f} KiB in {len(chunks)} chunk(s), {raw / link_bytes_per_second * 1000:.0f} ms uncompressed at {args.link_mbps} Mbit/s")
+        for encoding in encodings:
+            setting, levels = LEVELS[encoding]
+            default = getattr(settings, setting)
+            for level in levels:
+                setattr(settings, setting, level)
+                size, seconds = min((compress_once(encoding, chunks) for _ in range(args.rounds)), key=lambda result: result[1])
+                delivered_ms = (seconds + size / link_bytes_per_second) * 1000
+                marker = " (default)" if level == default else ""
+                print(f"    {encoding:<4} level {level:<2} {size / 1024:8.1f} KiB  ratio {raw / size:5.1f}x  "
+                      f"cpu {seconds * 1000:7.2f} ms  delivered {delivered_ms:7.0f} ms{marker}")
+            setattr(settings, setting, default)
+    if missing:
+        print(f"({', '.join(missing)} not installed, so those encodings were skipped)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--link-mbps", type=float, default=5.0, help="Client bandwidth (e.g. a cellular link)")
+    parser.add_argument("--rounds", type=int, default=5, help="Best of this many runs per setting")
+    main(parser.parse_args())
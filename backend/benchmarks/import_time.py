@@ -0,0 +1,69 @@
+"""
+Time to import the application, checked against a budget
+
+Runs `python -X importtime -c "import main"` in fresh interpreters (best of
+--runs), then reports the total and the slowest modules by cumulative time.
+Exits with status 1 if the import takes longer than --budget-ms or loads a
+module that should only be imported on first use (LAZY_MODULES), so CI can
+catch regressions in worker boot time. The budget is machine-dependent; the
+lazy module check is not.
+
+Usage (from the backend directory):
+    python benchmarks/import_time.py --runs 5 --budget-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by some requests (ICS import/export, chat date parsing) or
+# features that are off by default (profiling)
+LAZY_MODULES = ["icalendar", "pytz", "dateutil", "cProfile", "pstats"]
+
+def measure_import() -> dict:
+    """{module: (self us, cumulative us)} for one `import main` in a new interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+def main(args):
+    runs = [measure_import() for _ in range(args.runs)]
+    modules = min(runs, key=lambda run: run["main"][1])
+    total_ms = modules["main"][1] / 1000
+
+    print(f"import main: {total_ms:.0f} ms (best of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print("Slowest top-level imports (cumulative):")
+    top_level = sorted(
+        ((cumulative, name) for name, (_, cumulative) in modules.items() if "." not in name and name != "main"),
+        reverse=True
+    )
+    for cumulative, name in top_level[:args.top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    failures = []
+    loaded_lazy = [name for name in LAZY_MODULES if name in modules]
+    if loaded_lazy:
+        failures.append(f"imported at startup but should be lazy: {', '.join(loaded_lazy)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1500.0)
+    parser.add_argument("--top", type=int, default=15, help="Modules to list")
+    main(parser.parse_args())
@@ -0,0 +1,97 @@
+"""
+Serializing a large event list: FastAPI's response path vs ListSerializer
+
+Seeds a temporary database with --events events (with tags and reminders)
+and as many todo items, loads them as the list endpoints do and times
+turning them into the JSON body: first through FastAPI's response_model
+validation and JSONResponse (what the routes did before), then with the
+precompiled projection + orjson. Also checks both bodies decode to the same
+data.
+
+Usage (from the backend directory):
+    python benchmarks/list_serialization.py --events 5000 --rounds 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_utils import summarize
+
+async def time_rounds(serialize, rounds: int):
+    latencies = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = await serialize()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, body
+
+async def main(args, directory):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'serialization.db')}"
+
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from models.user import User
+    from models.calendar import Event, Tag, Reminder
+    from models.todo import TodoItem, TodoReminder, PriorityLevel
+    from utils.database import Base, engine, SessionLocal, AsyncSessionLocal, async_engine
+    from api.calendar import EventResponse, load_events, event_list_serializer
+    from api.todo import TodoItemResponse, load_todo_items, todo_list_serializer
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    tags = [Tag(name=f"Tag {index}", user=user) for index in range(5)]
+    db.add_all([user] + tags)
+    now = datetime.utcnow()
+    for index in range(args.events):
+        start = now + timedelta(minutes=30 * index)
+        db.add(Event(title=f"Event {index}", description="Planning meeting with the team", location="Room 4",
+                     start_time=start, end_time=start + timedelta(minutes=25), user=user, tags=tags[:index % 4],
+                     reminders=[Reminder(minutes_before=15)]))
+        db.add(TodoItem(title=f"Todo {index}", user=user, priority=list(PriorityLevel)[index % len(PriorityLevel)], deadline=start,
+                        reminders=[TodoReminder(minutes_before=60)]))
+    db.commit()
+    user_id = user.id
+    db.close()
+
+    async with AsyncSessionLocal() as session:
+        cases = [
+            ("events", EventResponse, event_list_serializer, await load_events(session, Event.user_id == user_id)),
+            ("todo items", TodoItemResponse, todo_list_serializer, await load_todo_items(session, TodoItem.user_id == user_id)),
+        ]
+    await async_engine.dispose()
+
+    for label, model, serializer, rows in cases:
+        field = create_response_field(name=f"Response_{label}", type_=List[model], mode="serialization")
+
+        async def fastapi_path():
+            content = await serialize_response(field=field, response_content=rows, is_coroutine=True)
+            return JSONResponse(content).body
+
+        async def fast_path():
+            return serializer.content(rows)
+
+        before, expected = await time_rounds(fastapi_path, args.rounds)
+        after, body = await time_rounds(fast_path, args.rounds)
+        if json.loads(body) != json.loads(expected):
+            print(f"{label}: the bodies differ!")
+            sys.exit(1)
+        print(f"{len(rows)} {label} ({len(body) / 1024:.0f} KiB):")
+        print(f"    response_model + JSONResponse   {summarize(before)}")
+        print(f"    ListSerializer                  {summarize(after)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000, help="Events (and todo items) to serialize")
+    parser.add_argument("--rounds", type=int, default=10)
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(parser.parse_args(), directory))
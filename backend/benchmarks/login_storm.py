@@ -0,0 +1,72 @@
+"""
+Do calendar reads survive a login storm?
+
+Measures GET /api/calendar/tags latency in-process on its own, then again
+while a number of clients log in back to back (as after an outage, when every
+client re-authenticates at once). Password hashing runs in a bounded pool, so
+reads should stay close to the idle numbers. Logins beyond
+PASSWORD_HASH_MAX_PENDING are answered with 503 instead of queueing; the
+status counts are printed. Run init_db.py first so the sample user exists.
+
+Usage (from the backend directory):
+    python benchmarks/login_storm.py --login-concurrency 64 --reads 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from utils.auth import create_access_token
+from bench_utils import summarize
+
+async def measure_reads(client: httpx.AsyncClient, headers: dict, count: int):
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/api/calendar/tags", headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+async def login_worker(client: httpx.AsyncClient, args, stop: asyncio.Event, statuses: Counter):
+    while not stop.is_set():
+        response = await client.post("/api/auth/token", data={"username": args.username, "password": args.password})
+        statuses[response.status_code] += 1
+        if response.status_code == 503:
+            # Back off as a client honoring Retry-After would (shortened for the benchmark)
+            await asyncio.sleep(0.05)
+
+async def main(args):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': args.username})}"}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=httpx.Timeout(120.0)) as client:
+        await measure_reads(client, headers, 20)
+        baseline = await measure_reads(client, headers, args.reads)
+        print(f"{'reads (idle)':<22} {summarize(baseline)}")
+
+        stop = asyncio.Event()
+        statuses = Counter()
+        workers = [asyncio.create_task(login_worker(client, args, stop, statuses)) for _ in range(args.login_concurrency)]
+        # Let the logins pile up first
+        await asyncio.sleep(0.5)
+        start = time.perf_counter()
+        loaded = await measure_reads(client, headers, args.reads)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*workers)
+        print(f"{'reads (login storm)':<22} {summarize(loaded)}")
+        print(f"logins: {statuses[200] / elapsed:.1f}/s succeeded  statuses: {dict(statuses)}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reads", type=int, default=200)
+    parser.add_argument("--login-concurrency", type=int, default=64)
+    parser.add_argument("--username", default="sample")
+    parser.add_argument("--password", default="password")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""
+Cost of recording request metrics
+
+Times a minimal ASGI app called directly (no HTTP, no FastAPI routing) with
+and without MetricsMiddleware, plus the individual metric operations, in
+microseconds per request. Exits with status 1 if the middleware adds more
+than --budget-us per request.
+
+Usage (from the backend directory):
+    python benchmarks/metrics_overhead.py --iterations 200000 --budget-us 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import MetricsMiddleware, Counter, Histogram
+
+class Route:
+    path = "/api/calendar/events/{event_id}"
+
+async def plain_app(scope, receive, send):
+    scope["route"] = Route
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    pass
+
+async def time_app(app, iterations: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/api/calendar/events/1"}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+def time_call(function, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+async def main(args):
+    # Best of several rounds, to keep scheduling noise out of the difference
+    baseline = min([await time_app(plain_app, args.iterations) for _ in range(args.rounds)])
+    instrumented_app = MetricsMiddleware(plain_app)
+    instrumented = min([await time_app(instrumented_app, args.iterations) for _ in range(args.rounds)])
+    overhead = instrumented - baseline
+
+    counter = Counter("bench_total", "", ["method", "route", "status"])
+    histogram = Histogram("bench_seconds", "", ["method", "route"])
+    print(f"counter inc          {time_call(lambda: counter.inc('GET', '/x', '200'), args.iterations):6.2f} us")
+    print(f"histogram observe    {time_call(lambda: histogram.observe(0.012, 'GET', '/x'), args.iterations):6.2f} us")
+    print(f"app                  {baseline:6.2f} us/request")
+    print(f"app + middleware     {instrumented:6.2f} us/request")
+    print(f"overhead             {overhead:6.2f} us/request (budget {args.budget_us} us)")
+    if overhead > args.budget_us:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--budget-us", type=float, default=5.0, help="Allowed middleware overhead per request")
+    asyncio.run(main(parser.parse_args()))
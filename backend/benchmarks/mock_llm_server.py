@@ -0,0 +1,125 @@
+"""
+Local stand-in for the Together AI (OpenAI-compatible) chat completions API
+
+Answers POST /v1/chat/completions after a configurable delay, with a tool
+call (extract_todo_item or extract_calendar_event) for a configurable share
+of requests and a plain text reply otherwise. Supports stream=True and can
+inject upstream errors to exercise retries and the circuit breaker.
+
+Usage (from the backend directory):
+    python benchmarks/mock_llm_server.py --port 9000 --latency-ms 800 --tool-call-rate 0.5
+
+Then start the app against it:
+    LLM_API_BASE=http://localhost:9000/v1 TOGETHER_API_KEY=mock uvicorn main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Mock LLM API")
+options = argparse.Namespace(latency_ms=500.0, jitter_ms=0.0, tool_call_rate=0.5, error_rate=0.0, chunk_delay_ms=20.0)
+
+TEXT_REPLY = "Sure! Let me know if there's anything else you'd like to plan today."
+
+def count_tokens(text: str) -> int:
+    """Very rough token count, good enough for usage numbers"""
+    return max(1, len(text) // 4)
+
+def make_tool_call(messages) -> dict:
+    """A tool call for the last user message, alternating todos and events"""
+    last_message = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+    title = " ".join(last_message.split()[:6]) or "Mock item"
+    tomorrow = datetime.now() + timedelta(days=1)
+
+    if random.random() < 0.5:
+        name = "extract_todo_item"
+        arguments = {"title": title, "deadline": tomorrow.strftime("%Y-%m-%d"), "priority": "low"}
+    else:
+        name = "extract_calendar_event"
+        start = tomorrow.replace(hour=14, minute=0, second=0, microsecond=0)
+        arguments = {
+            "title": title,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(hours=1)).isoformat()
+        }
+    return {
+        "id": f"call_{uuid.uuid4().hex[:12]}",
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps(arguments)}
+    }
+
+def make_completion(body: dict) -> dict:
+    """Build the full (non-streamed) completion for a request"""
+    messages = body.get("messages") or []
+    message = {"role": "assistant", "content": TEXT_REPLY}
+    if body.get("tools") and random.random() < options.tool_call_rate:
+        message = {"role": "assistant", "content": "", "tool_calls": [make_tool_call(messages)]}
+
+    prompt_tokens = sum(count_tokens(m.get("content") or "") for m in messages)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(message["content"] or json.dumps(message.get("tool_calls"))),
+            "total_tokens": prompt_tokens + count_tokens(message["content"] or "")
+        }
+    }
+
+async def stream_completion(completion: dict):
+    """Replay a completion as OpenAI-style chunks"""
+    message = completion["choices"][0]["message"]
+    base = {"id": completion["id"], "object": "chat.completion.chunk", "created": completion["created"], "model": completion["model"]}
+
+    deltas = [{"content": word + " "} for word in (message["content"] or "").split()]
+    for index, tool_call in enumerate(message.get("tool_calls") or []):
+        deltas.append({"tool_calls": [{"index": index, "id": tool_call["id"], "type": "function",
+                                       "function": {"name": tool_call["function"]["name"], "arguments": ""}}]})
+        deltas.append({"tool_calls": [{"index": index, "function": {"arguments": tool_call["function"]["arguments"]}}]})
+
+    for delta in deltas:
+        yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+        await asyncio.sleep(options.chunk_delay_ms / 1000)
+
+    final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": completion["choices"][0]["finish_reason"]}],
+             "usage": completion["usage"]}
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+
+    delay = options.latency_ms + random.uniform(-options.jitter_ms, options.jitter_ms)
+    await asyncio.sleep(max(0.0, delay) / 1000)
+
+    if random.random() < options.error_rate:
+        return JSONResponse(status_code=503, content={"error": {"message": "Mock upstream error"}})
+
+    completion = make_completion(body)
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(completion), media_type="text/event-stream")
+    return completion
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Delay before each response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random +/- added to the delay")
+    parser.add_argument("--tool-call-rate", type=float, default=0.5, help="Share of tool-enabled requests answered with a tool call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--chunk-delay-ms", type=float, default=20.0, help="Delay between streamed chunks")
+    options = parser.parse_args()
+    uvicorn.run(app, host=options.host, port=options.port, log_level="warning")
@@ -0,0 +1,115 @@
+"""
+Queries per request for the main endpoints, checked against a budget
+
+Seeds a temporary database with --events events (each with tags and a
+reminder) and as many todo items, calls each endpoint in-process with
+SQL_INSTRUMENTATION on and reports the X-DB-* headers: statements run,
+database time and the most repeats of one statement. Exits with status 1
+if an endpoint runs more statements than its budget below or repeats one
+statement --max-repeats times or more, so it can run in CI to catch N+1
+regressions.
+
+Usage (from the backend directory):
+    python benchmarks/query_budget.py --events 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (method, path, statements allowed). Each endpoint is called twice and the
+# worse call counts; raise a budget only together with the change needing it.
+ENDPOINTS = [
+    ("GET", "/api/calendar/events", 3),
+    ("GET", "/api/calendar/events/{event_id}", 3),
+    ("GET", "/api/calendar/tags", 1),
+    ("POST", "/api/calendar/events", 7),
+    ("PUT", "/api/calendar/events/{event_id}", 10),
+    ("GET", "/api/todo/items", 2),
+    ("GET", "/api/todo/items/today", 2),
+    ("POST", "/api/todo/items", 4),
+    ("GET", "/api/search", 2),
+    ("GET", "/api/chatbot/daily-summary", 2),
+]
+
+def request_body(method: str, path: str, tag_ids, now: datetime):
+    if path.startswith("/api/calendar/events") and method in ("POST", "PUT"):
+        return {"title": "Budget check", "start_time": now.isoformat(), "end_time": (now + timedelta(hours=1)).isoformat(),
+                "tag_ids": tag_ids, "reminders": []}
+    if path == "/api/todo/items" and method == "POST":
+        return {"title": "Budget check", "deadline": now.isoformat(), "reminders": [{"minutes_before": 10}]}
+    return None
+
+async def main(args, directory):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'budget.db')}"
+    os.environ["SQL_INSTRUMENTATION"] = "true"
+
+    from main import app
+    from models.user import User
+    from models.calendar import Event, Tag, Reminder
+    from models.todo import TodoItem, PriorityLevel
+    from utils.auth import create_access_token
+    from utils.database import Base, engine, SessionLocal, async_engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    tags = [Tag(name=f"Tag {index}", user=user) for index in range(5)]
+    db.add_all([user] + tags)
+    now = datetime.utcnow()
+    for index in range(args.events):
+        start = now + timedelta(hours=index % 48)
+        event = Event(title=f"Event {index}", start_time=start, end_time=start + timedelta(hours=1), user=user,
+                      tags=tags[:index % 4])
+        event.reminders.append(Reminder(minutes_before=15))
+        db.add(event)
+        db.add(TodoItem(title=f"Todo {index}", user=user, priority=PriorityLevel.LOW, deadline=start))
+    db.commit()
+    event_id = db.query(Event.id).first()[0]
+    tag_ids = [tag.id for tag in tags[:3]]
+    db.close()
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    params = {
+        "/api/calendar/events": {"start_date": now.isoformat(), "end_date": (now + timedelta(days=2)).isoformat()},
+        "/api/search": {"q": "event"},
+    }
+    failures = []
+    try:
+        await check_endpoints(app, headers, params, event_id, tag_ids, now, args.max_repeats, failures)
+    finally:
+        await async_engine.dispose()
+
+    if failures:
+        print(f"Query budget exceeded by: {', '.join(failures)}")
+        sys.exit(1)
+
+async def check_endpoints(app, headers, params, event_id, tag_ids, now, max_repeats, failures):
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for method, template, budget in ENDPOINTS:
+            path = template.format(event_id=event_id)
+            worst = {"count": 0, "ms": 0.0, "repeats": 0}
+            for _ in range(2):
+                response = await client.request(method, path, headers=headers, params=params.get(template),
+                                                json=request_body(method, template, tag_ids, now))
+                response.raise_for_status()
+                worst["count"] = max(worst["count"], int(response.headers["X-DB-Query-Count"]))
+                worst["ms"] = max(worst["ms"], float(response.headers["X-DB-Time-Ms"]))
+                worst["repeats"] = max(worst["repeats"], int(response.headers["X-DB-Max-Repeats"]))
+            status = "ok"
+            if worst["count"] > budget or worst["repeats"] >= max_repeats:
+                status = "OVER BUDGET"
+                failures.append(f"{method} {template}")
+            print(f"{method:<6} {template:<36} queries={worst['count']:3d}/{budget:<3d} db={worst['ms']:7.2f} ms  "
+                  f"max repeats={worst['repeats']:3d}  {status}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200, help="Events (and todo items) to seed")
+    parser.add_argument("--max-repeats", type=int, default=5, help="Fail if one statement runs this often in a request")
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(parser.parse_args(), directory))
@@ -0,0 +1,113 @@
+"""
+Hit rate and latency savings of the local quick parser
+
+Runs parse_quick_intent over a corpus of sample chat messages and reports how
+many are answered locally, the parser's own latency, and the LLM time saved
+given the typical LLM turn latency (measure it with chat_turn_latency.py).
+Messages answered differently than expected (a hit among EXPECTED_MISSES or
+the reverse) are listed.
+
+Usage (from the backend directory):
+    python benchmarks/quick_parser_corpus.py --llm-turn-ms 1800 [--verbose]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.quick_parser import parse_quick_intent
+from bench_utils import summarize
+
+EXPECTED_HITS = [
+    # Simple todos
+    "remind me to call mom tomorrow at 5pm",
+    "Remind me to pay the electricity bill by Friday",
+    "todo: pay rent by Nov 1",
+    "add task water the plants",
+    "I need to finish the quarterly report by Friday, it's important",
+    "don't forget to pick up the dry cleaning tomorrow",
+    "remind me to take out the trash tonight",
+    "I have to submit my taxes by 4/15",
+    "remember to renew passport by December 1st",
+    "remind me to book flights asap",
+    # Simple events
+    "meeting with Bob Friday 2-3",
+    "Meeting with Bob on Friday from 2 to 3 in room 4B",
+    "Add a dentist appointment on Tuesday at 10am",
+    "Lunch with Sarah Wednesday at noon at Cafe Luna",
+    "schedule team sync tomorrow 11-12",
+    "dinner tonight at 7",
+    "call with Alice at 3pm tomorrow",
+    "doctor appointment 12/3 at 9:30am",
+    "coffee with Dan thursday at 4:30",
+    "book a meeting with the design team on Monday 10-11am",
+    "interview with Acme Corp on Nov 12 at 2pm",
+    "piano class Saturday 9am",
+]
+
+# Ambiguous, partly understood or conversational: should go to the LLM
+EXPECTED_MISSES = [
+    "Buy milk",
+    "what's on my calendar today?",
+    "Lunch with Sarah next Wednesday at noon",
+    "add dentist Tuesday and remind me to buy milk",
+    "Team standup every day at 9am",
+    "can you move my meeting with Bob to later?",
+    "I'm feeling overwhelmed this week, what should I prioritize?",
+    "book flight to Paris",
+    "schedule something with Jenny sometime next week",
+    "thanks!",
+    "cancel my dentist appointment",
+    "move my meeting with Bob to 3pm tomorrow",
+    "Summarize my week",
+    "standup tomorrow at 9:00 am and 4pm",
+    "call with Alice at 3pm tomorrow for 30 minutes",
+    "dinner tonight at 7, then movie",
+    # Edits, questions and small talk behind a todo prefix
+    "I need to cancel my dentist appointment tomorrow",
+    "I need to move lunch to 2pm",
+    "I have to think about it",
+    "I need to go now, bye",
+    "I need to know my schedule for tomorrow",
+    # Dates only partly understood
+    "remind me to pay rent on the 1st",
+    "remind me to call mom tomorrow morning",
+]
+
+CORPUS = EXPECTED_HITS + EXPECTED_MISSES
+
+def main(args):
+    now = datetime.now()
+    hits = 0
+    latencies = []
+    unexpected = []
+
+    for message in CORPUS:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            item = parse_quick_intent(message, now)
+        latencies.append((time.perf_counter() - start) * 1000 / args.repeat)
+        if item:
+            hits += 1
+        if bool(item) != (message in EXPECTED_HITS):
+            unexpected.append((message, item))
+        if args.verbose:
+            print(f"{'HIT ' if item else 'MISS'} {message!r} -> {item}")
+
+    hit_rate = hits / len(CORPUS)
+    print(f"messages: {len(CORPUS)}  handled locally: {hits} ({hit_rate:.0%})")
+    print(f"parser latency: {summarize(latencies)}")
+    for message, item in unexpected:
+        print(f"unexpected {'HIT ' if item else 'MISS'} {message!r} -> {item}")
+    print(f"LLM time saved: ~{hits * args.llm_turn_ms / 1000:.1f} s over the corpus "
+          f"(~{hit_rate * args.llm_turn_ms:.0f} ms per message on average)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--llm-turn-ms", type=float, default=1800.0, help="Typical LLM chat turn latency")
+    parser.add_argument("--repeat", type=int, default=100, help="Parses per message for timing")
+    parser.add_argument("--verbose", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,112 @@
+"""
+Loading list endpoint rows as ORM instances vs read models
+
+Seeds a temporary database with --events events (with tags and reminders)
+and as many todo items, then loads them the way the list endpoints used to
+(ORM instances with selectinload) and with services/read_models.py, and
+reports the time to load and serialize, and the memory the loaded rows
+hold on to (tracemalloc). Checks both give the same JSON, including with a
+tag filter.
+
+Usage (from the backend directory):
+    python benchmarks/read_models.py --events 5000 --rounds 5
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_utils import summarize
+
+async def measure(load, serializer, rounds: int):
+    """(latencies of load + serialize in ms, bytes retained by the loaded rows, JSON body)"""
+    from utils.database import AsyncSessionLocal
+
+    latencies = []
+    for _ in range(rounds):
+        async with AsyncSessionLocal() as session:
+            start = time.perf_counter()
+            body = serializer.content(await load(session))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async with AsyncSessionLocal() as session:
+        gc.collect()
+        tracemalloc.start()
+        rows = await load(session)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del rows
+    return latencies, retained, body
+
+async def main(args, directory):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'read_models.db')}"
+
+    from models.user import User
+    from models.calendar import Event, Tag, Reminder
+    from models.todo import TodoItem, TodoReminder, PriorityLevel
+    from utils.database import Base, engine, SessionLocal, async_engine
+    from api.calendar import load_events, event_list_serializer
+    from api.todo import load_todo_items, todo_list_serializer
+    from services.read_models import fetch_events, fetch_todo_items
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(username="bench", email="bench@example.com", hashed_password="x")
+    tags = [Tag(name=f"Tag {index}", user=user) for index in range(5)]
+    db.add_all([user] + tags)
+    now = datetime.utcnow()
+    for index in range(args.events):
+        start = now + timedelta(minutes=30 * index)
+        db.add(Event(title=f"Event {index}", description="Planning meeting with the team", location="Room 4",
+                     start_time=start, end_time=start + timedelta(minutes=25), user=user, tags=tags[:index % 4],
+                     reminders=[Reminder(minutes_before=15)] * (index % 2)))
+        db.add(TodoItem(title=f"Todo {index}", user=user, priority=list(PriorityLevel)[index % len(PriorityLevel)],
+                        deadline=start, reminders=[TodoReminder(minutes_before=60)]))
+    db.commit()
+    user_id = user.id
+    tag = tags[2]
+    db.refresh(tag)  # Loaded before the session closes, for the contains() filter
+    db.close()
+
+    def by_id(body):
+        return sorted(json.loads(body), key=lambda row: row["id"])
+
+    cases = [
+        ("events", event_list_serializer,
+         lambda session: load_events(session, Event.user_id == user_id),
+         lambda session: fetch_events(session, Event.user_id == user_id)),
+        ("events with a tag", event_list_serializer,
+         lambda session: load_events(session, Event.user_id == user_id, Event.tags.contains(tag)),
+         lambda session: fetch_events(session, Event.user_id == user_id, Event.tags.contains(tag))),
+        ("todo items", todo_list_serializer,
+         lambda session: load_todo_items(session, TodoItem.user_id == user_id),
+         lambda session: fetch_todo_items(session, TodoItem.user_id == user_id)),
+    ]
+    try:
+        for label, serializer, load_orm, load_rows in cases:
+            orm_latencies, orm_bytes, expected = await measure(load_orm, serializer, args.rounds)
+            row_latencies, row_bytes, body = await measure(load_rows, serializer, args.rounds)
+            if by_id(body) != by_id(expected):
+                print(f"{label}: read models give different JSON!")
+                sys.exit(1)
+            count = len(json.loads(body))
+            print(f"{count} {label}:")
+            print(f"    ORM + selectinload   {summarize(orm_latencies)}  {orm_bytes / count:6.0f} B/row")
+            print(f"    read models          {summarize(row_latencies)}  {row_bytes / count:6.0f} B/row")
+    finally:
+        await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000, help="Events (and todo items) to load")
+    parser.add_argument("--rounds", type=int, default=5)
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(main(parser.parse_args(), directory))
@@ -0,0 +1,135 @@
+"""
+Exercise read-replica routing against a replicated SQLite copy
+
+Creates a primary database in a temporary directory and "replicates" it by
+copying the file to a replica with the SQLite backup API every
+--copy-interval seconds, then runs the app in-process with
+DATABASE_REPLICA_URLS pointing at the copy and checks that:
+
+  - GET requests are served by the replica once it is up to date,
+  - a client reads its own write right after making it (read-your-writes),
+  - reads fall back to the primary when the copying stops and the replica
+    lags more than DB_REPLICA_MAX_LAG_SECONDS.
+
+To try a real setup instead, start the server with e.g.
+DATABASE_URL=postgresql://... DATABASE_REPLICA_URLS=postgresql://...replica...
+(a second Postgres container streaming from the first).
+
+Usage (from the backend directory):
+    python benchmarks/replica_routing.py --copy-interval 0.5 --reads 200
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def copy_database(source_path: str, target_path: str) -> None:
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+def replicate(source_path: str, target_path: str, interval: float, paused: threading.Event, stop: threading.Event):
+    while not stop.is_set():
+        if not paused.is_set():
+            copy_database(source_path, target_path)
+        stop.wait(interval)
+
+async def main(args, directory):
+    primary_path = os.path.join(directory, "primary.db")
+    replica_path = os.path.join(directory, "replica.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{primary_path}"
+    os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{replica_path}"
+
+    from utils.config import settings
+    settings.DB_REPLICA_MAX_LAG_SECONDS = args.max_lag
+    settings.DB_REPLICA_CHECK_SECONDS = 0.5
+    settings.DB_READ_YOUR_WRITES_SECONDS = args.sticky_seconds
+
+    from main import app
+    from models.user import User
+    from utils.auth import create_access_token
+    from utils.database import Base, engine, SessionLocal, async_engine, replica_set
+    from services.replica_monitor import start_replica_monitor
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(username="bench", email="bench@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+    copy_database(primary_path, replica_path)
+
+    paused, stop = threading.Event(), threading.Event()
+    copier = threading.Thread(target=replicate, args=(primary_path, replica_path, args.copy_interval, paused, stop), daemon=True)
+    copier.start()
+    monitor = start_replica_monitor()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+
+    def routed():
+        return dict(replica_set.stats()["routed"])
+
+    def difference(before, after):
+        return {key: after[key] - before[key] for key in after if after[key] != before[key]}
+
+    async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+        # Wait for the first lag measurement
+        while not replica_set.is_usable(0):
+            await asyncio.sleep(0.1)
+
+        before = routed()
+        for _ in range(args.reads):
+            (await client.get("/api/calendar/tags", headers=headers)).raise_for_status()
+        print(f"steady reads:      {difference(before, routed())}  lag={replica_set.lag_seconds}")
+
+        before = routed()
+        response = await client.post("/api/calendar/tags", headers=headers, json={"name": "Replica check"})
+        response.raise_for_status()
+        names = [tag["name"] for tag in (await client.get("/api/calendar/tags", headers=headers)).json()]
+        print(f"read-your-writes:  new tag visible={'Replica check' in names}  {difference(before, routed())}")
+
+        await asyncio.sleep(args.sticky_seconds + args.copy_interval + 0.5)
+        before = routed()
+        names = [tag["name"] for tag in (await client.get("/api/calendar/tags", headers=headers)).json()]
+        print(f"after the window:  new tag visible={'Replica check' in names}  {difference(before, routed())}")
+
+        paused.set()
+        await asyncio.sleep(args.max_lag + 1.5)
+        before = routed()
+        for _ in range(args.reads):
+            (await client.get("/api/calendar/tags", headers=headers)).raise_for_status()
+        print(f"replica stalled:   {difference(before, routed())}  lag={replica_set.lag_seconds}")
+
+        paused.clear()
+        await asyncio.sleep(args.copy_interval + 1.5)
+        before = routed()
+        for _ in range(args.reads):
+            (await client.get("/api/calendar/tags", headers=headers)).raise_for_status()
+        print(f"replica recovered: {difference(before, routed())}  lag={replica_set.lag_seconds}")
+
+    monitor.cancel()
+    stop.set()
+    copier.join()
+    await async_engine.dispose()
+    for replica_engine in replica_set.engines:
+        await replica_engine.dispose()
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copy-interval", type=float, default=0.5, help="Seconds between copies to the replica")
+    parser.add_argument("--reads", type=int, default=200, help="GET requests per phase")
+    parser.add_argument("--max-lag", type=float, default=3.0, help="DB_REPLICA_MAX_LAG_SECONDS for the run")
+    parser.add_argument("--sticky-seconds", type=float, default=1.0, help="DB_READ_YOUR_WRITES_SECONDS for the run")
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_directory:
+        asyncio.run(main(arguments, temp_directory))
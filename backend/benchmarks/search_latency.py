@@ -0,0 +1,98 @@
+"""
+Search latency for a user with many events and todo items
+
+Seeds a temporary SQLite database with --items rows (half events, half todo
+items, with text drawn from a Zipf-distributed vocabulary) for the
+benchmark user plus as many for another user, then times GET /api/search
+in-process for a few queries. "w0001" is the most common word and "w0" a
+prefix of a thousand distinct words, the worst cases.
+
+Usage (from the backend directory):
+    python benchmarks/search_latency.py --items 100000 --requests 200
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_utils import summarize
+
+# Filler vocabulary with a Zipf-like distribution (like natural text), plus
+# named words that each appear in a small share of the items
+FILLER = [f"w{rank:04d}" for rank in range(1, 5001)]
+FILLER_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, 5001)))
+WORDS = [
+    "dentist", "meeting", "review", "budget", "groceries", "flight", "gym", "report",
+    "invoice", "birthday", "doctor", "school", "payment", "presentation", "client", "library",
+]
+NAMED_WORD_SHARE = 0.03
+QUERIES = ["dentist", "client meeting", "pres", "quarterly invoice", "nonexistentword", "w0001", "w0"]
+
+def sentence(words: int) -> str:
+    return " ".join(
+        random.choice(WORDS) if random.random() < NAMED_WORD_SHARE
+        else random.choices(FILLER, cum_weights=FILLER_WEIGHTS)[0]
+        for _ in range(words)
+    )
+
+async def main(args, directory):
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'search.db')}"
+
+    from main import app
+    from models.user import User
+    from models.calendar import Event
+    from models.todo import TodoItem
+    from utils.auth import create_access_token
+    from utils.database import Base, engine, SessionLocal, async_engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    users = [User(username=name, email=f"{name}@example.com", hashed_password="x") for name in ("bench", "other")]
+    db.add_all(users)
+    db.commit()
+    start = time.perf_counter()
+    now = datetime.utcnow()
+    for user in users:
+        for _ in range(0, args.items // 2, 5000):
+            db.execute(Event.__table__.insert(), [
+                {"title": sentence(3), "description": sentence(12), "location": sentence(2), "user_id": user.id,
+                 "start_time": now + timedelta(hours=i), "end_time": now + timedelta(hours=i + 1), "is_all_day": False}
+                for i in range(5000)
+            ])
+            db.execute(TodoItem.__table__.insert(), [
+                {"title": sentence(3), "description": sentence(12), "user_id": user.id, "is_completed": False, "priority": "LOW"}
+                for _ in range(5000)
+            ])
+    db.commit()
+    db.close()
+    print(f"Seeded {args.items} items for each of 2 users in {time.perf_counter() - start:.1f} s (index maintained by triggers)")
+
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bench'})}"}
+    async with httpx.AsyncClient(app=app, base_url="http://bench", timeout=60) as client:
+        for query in QUERIES:
+            latencies = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                response = await client.get("/api/search", params={"q": query, "limit": 20}, headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - start) * 1000)
+            results = response.json()["results"]
+            print(f"{query!r:<20} {len(results):>3} results  {summarize(latencies)}")
+    await async_engine.dispose()
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100000, help="Items per user")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per query")
+    arguments = parser.parse_args()
+    with tempfile.TemporaryDirectory() as temp_directory:
+        asyncio.run(main(arguments, temp_directory))
@@ -0,0 +1,47 @@
+"""
+Cost of verifying a bearer token
+
+Times verify_token for the same access token with each JWT backend (PyJWT
+only if installed) and with the verified-token cache, in microseconds per
+call.
+
+Usage (from the backend directory):
+    python benchmarks/token_verify.py --iterations 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.auth import create_access_token, verify_token, token_cache
+from utils.config import settings
+from utils import jwt_backend
+
+def time_per_call(token: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        verify_token(token)
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+def main(args):
+    backends = ["jose"] + (["pyjwt"] if jwt_backend.pyjwt is not None else [])
+    for backend in backends:
+        settings.JWT_BACKEND = backend
+        token = create_access_token({"sub": "sample"})
+
+        settings.AUTH_TOKEN_CACHE_ENABLED = False
+        print(f"{backend:<6} decode        {time_per_call(token, args.iterations):8.2f} us/call")
+
+        settings.AUTH_TOKEN_CACHE_ENABLED = True
+        token_cache.clear()
+        print(f"{backend:<6} cached        {time_per_call(token, args.iterations):8.2f} us/call")
+
+    if jwt_backend.pyjwt is None:
+        print("(PyJWT is not installed, so its backend was skipped)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args())
@@ -6,6 +6,11 @@ from sqlalchemy.orm import sessionmaker
 from models.user import User
 from models.calendar import Event, Tag, Reminder
 from models.todo import TodoItem, TodoReminder, PriorityLevel
+from models.scheduler import SchedulerWorker, SchedulerLease, SummaryDelivery
+from models.conversation import ConversationMessage, ConversationSummary
+from models.replication import ReplicationHeartbeat
+from models.archive import ArchivedEvent, ArchivedTodoItem
+import models.search
 from utils.database import Base, get_db, engine
 from utils.auth import get_password_hash
 from datetime import datetime, timedelta
@@ -1,6 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from api import auth, calendar, todo, chatbot
+from api import auth, calendar, todo, chatbot, search, admin
+from services.llm_client import close_client
+from services.replica_monitor import start_replica_monitor
+from utils.database import async_engine, replica_set
+from utils.config import settings, load_api_key_file
+from utils.sql_instrumentation import SQLInstrumentationMiddleware
+from utils.metrics import registry, MetricsMiddleware
+from utils.profiling import ProfileRequestMiddleware
+from utils.compression import CompressionMiddleware
 
 app = FastAPI(title="Polaris Calendar API")
 
@@ -13,12 +21,58 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# gzip/brotli/zstd as negotiated with Accept-Encoding, including streams
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Query counts and N+1 detection per request (debug only, adds overhead)
+if settings.SQL_INSTRUMENTATION:
+    app.add_middleware(SQLInstrumentationMiddleware)
+
+# Admin profiling of single requests (X-Profile header); without it, no
+# per-request cost at all
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfileRequestMiddleware)
+
+# Request count, latency and in-flight requests for /metrics. Added last so
+# it is the outermost middleware and times the whole request.
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(calendar.router, prefix="/api/calendar", tags=["Calendar"])
 app.include_router(todo.router, prefix="/api/todo", tags=["Todo"])
 app.include_router(chatbot.router, prefix="/api/chatbot", tags=["Chatbot"])
+app.include_router(search.router, prefix="/api", tags=["Search"])
+if settings.PROFILING_ENABLED:
+    app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 @app.get("/")
 async def root():
-    return {"message": "Welcome to Polaris Calendar API"} 
\ No newline at end of file
+    return {"message": "Welcome to Polaris Calendar API"} 
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        # Prometheus text format; each worker process reports its own values
+        return Response(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("startup")
+async def startup():
+    # Side effects kept out of import time (see load_api_key_file)
+    load_api_key_file()
+    
+    # Measure read replica lag in the background (if any are configured)
+    app.state.replica_monitor = start_replica_monitor()
+
+@app.on_event("shutdown")
+async def shutdown():
+    if app.state.replica_monitor is not None:
+        app.state.replica_monitor.cancel()
+    
+    # Release pooled connections to the LLM API and the database
+    await close_client()
+    await async_engine.dispose()
+    for replica_engine in replica_set.engines:
+        await replica_engine.dispose()
\ No newline at end of file
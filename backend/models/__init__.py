@@ -1,3 +1,8 @@
 from models.user import User
 from models.calendar import Event, Tag, Reminder
-from models.todo import TodoItem, TodoReminder, PriorityLevel 
\ No newline at end of file
+from models.todo import TodoItem, TodoReminder, PriorityLevel
+from models.scheduler import SchedulerWorker, SchedulerLease, SummaryDelivery
+from models.conversation import ConversationMessage, ConversationSummary
+from models.replication import ReplicationHeartbeat
+from models.archive import ArchivedEvent, ArchivedTodoItem
+import models.search  # noqa: F401  (creates the full-text index with the tables)
\ No newline at end of file
@@ -0,0 +1,161 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum, Table, Index, event
+from sqlalchemy.schema import CreateTable, CreateIndex
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from utils.database import Base
+from models.todo import PriorityLevel
+
+# Cold storage for rows that almost no query needs: events that ended long
+# ago and todos completed long ago (see services/archive_service.py). Rows
+# keep their original id. Archived events are read-only; their reminders are
+# not kept since they can no longer fire. They are not in the search index
+# either (models/search.py): /api/search only finds live rows.
+
+# Association table for archived event tags
+archived_event_tag = Table(
+    'archived_event_tag',
+    Base.metadata,
+    Column('event_id', Integer, ForeignKey('archived_events.id'), primary_key=True),
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+)
+
+class ArchivedEvent(Base):
+    __tablename__ = "archived_events"
+    # For get_events ranges reaching into the archive
+    __table_args__ = (Index("ix_archived_events_user_end_time", "user_id", "end_time"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    description = Column(String, nullable=True)
+    start_time = Column(DateTime, index=True)
+    end_time = Column(DateTime, index=True)
+    location = Column(String, nullable=True)
+    is_all_day = Column(Boolean, default=False)
+    ics_uid = Column(String, nullable=True)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    
+    user_id = Column(Integer, ForeignKey("users.id"))
+    
+    # Relationship with tags
+    tags = relationship("Tag", secondary=archived_event_tag, back_populates="archived_events")
+    
+    @property
+    def reminders(self):
+        # Same shape as Event, so archived events serialize like live ones
+        return []
+
+class ArchivedTodoItem(Base):
+    __tablename__ = "archived_todo_items"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    description = Column(String, nullable=True)
+    deadline = Column(DateTime, nullable=True)
+    is_completed = Column(Boolean, default=True)
+    priority = Column(Enum(PriorityLevel), default=PriorityLevel.LOW)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime, index=True)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+    added_to_calendar = Column(Boolean, default=False)
+    event_id = Column(String, nullable=True)
+    
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+
+# Archived rows keep their id, and get_event falls back to the archive, so
+# the live tables must never hand out an id again: Event and TodoItem are
+# AUTOINCREMENT tables on SQLite. create_all doesn't change tables that
+# already exist, so older databases are migrated here (on the next
+# init_db.py run): the tables are rebuilt, rows that already took an
+# archived id are renumbered, and the id sequences are moved past the
+# archived ids.
+ARCHIVED_TABLES = {"events": "archived_events", "todo_items": "archived_todo_items"}
+
+# Columns pointing at a live row's id, renumbered along with it
+ID_REFERENCES = {
+    "events": [("event_tag", "event_id"), ("reminders", "event_id")],
+    "todo_items": [("todo_reminders", "todo_item_id")],
+}
+
+# search_index rowid of a live row (see models/search.py)
+SEARCH_ROWID_OFFSETS = {"events": 0, "todo_items": 1}
+
+def uses_autoincrement(connection, table_name: str) -> bool:
+    """Whether a SQLite table never reuses ids (True for missing tables and other databases)"""
+    if connection.dialect.name != "sqlite":
+        return True
+    sql = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+    ).scalar()
+    return sql is None or "AUTOINCREMENT" in sql.upper()
+
+def rebuild_with_autoincrement(connection, table) -> None:
+    """Recreate a SQLite table from its model (AUTOINCREMENT included), keeping its rows and ids"""
+    name = table.name
+    rebuilt = f"{name}_rebuild"
+    existing = {row[1] for row in connection.exec_driver_sql(f"PRAGMA table_info({name})")}
+    columns = ", ".join(column.name for column in table.columns if column.name in existing)
+
+    create = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(create.replace(f"TABLE {name} ", f"TABLE {rebuilt} ", 1))
+    connection.exec_driver_sql(f"INSERT INTO {rebuilt} ({columns}) SELECT {columns} FROM {name}")
+    # Indexes and triggers go with the old table
+    connection.exec_driver_sql(f"DROP TABLE {name}")
+    connection.exec_driver_sql(f"ALTER TABLE {rebuilt} RENAME TO {name}")
+    for index in table.indexes:
+        connection.exec_driver_sql(str(CreateIndex(index).compile(dialect=connection.dialect)))
+
+@event.listens_for(Base.metadata, "after_create")
+def migrate_autoincrement(target, connection, **kw):
+    if connection.dialect.name != "sqlite":
+        # Sequences never hand out an id twice
+        return
+
+    has_search_index = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+    ).first() is not None
+    rebuilt = False
+    for name, archived_name in ARCHIVED_TABLES.items():
+        if not uses_autoincrement(connection, name):
+            print(f"Rebuilding {name} so ids of deleted and archived rows are never reused")
+            rebuild_with_autoincrement(connection, target.tables[name])
+            rebuilt = True
+        if not uses_autoincrement(connection, name):
+            continue
+
+        top = connection.exec_driver_sql(
+            f"SELECT max(coalesce((SELECT max(id) FROM {name}), 0), coalesce((SELECT max(id) FROM {archived_name}), 0))"
+        ).scalar()
+
+        # Rows that took an archived id before the migration get a new one,
+        # so they can be opened (and archived themselves) later
+        reused_ids = [row[0] for row in connection.exec_driver_sql(
+            f"SELECT id FROM {name} WHERE id IN (SELECT id FROM {archived_name}) ORDER BY id"
+        )]
+        for old_id in reused_ids:
+            top += 1
+            print(f"Renumbering {name} row {old_id} to {top}: its id is also used by an archived row")
+            connection.exec_driver_sql(f"UPDATE {name} SET id = ? WHERE id = ?", (top, old_id))
+            for table_name, column in ID_REFERENCES[name]:
+                connection.exec_driver_sql(f"UPDATE {table_name} SET {column} = ? WHERE {column} = ?", (top, old_id))
+            if has_search_index:
+                offset = SEARCH_ROWID_OFFSETS[name]
+                connection.exec_driver_sql(
+                    "UPDATE search_index SET rowid = ? WHERE rowid = ?", (top * 2 + offset, old_id * 2 + offset)
+                )
+
+        # Never hand out an id still in use in the archive
+        updated = connection.exec_driver_sql(
+            "UPDATE sqlite_sequence SET seq = max(seq, ?) WHERE name = ?", (top, name)
+        ).rowcount
+        if not updated and top:
+            connection.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (name, top))
+
+    if rebuilt and has_search_index:
+        # The search triggers were dropped with the old tables (a new index
+        # gets them from models/search.py itself)
+        from models.search import SQLITE_SEARCH_DDL
+        for statement in SQLITE_SEARCH_DDL[1:]:
+            connection.exec_driver_sql(statement)
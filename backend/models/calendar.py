@@ -14,6 +14,8 @@ event_tag = Table(
 
 class Event(Base):
     __tablename__ = "events"
+    # Never reuse the id of a deleted (or archived) row
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -45,6 +47,7 @@ class Tag(Base):
     
     # Relationship with events
     events = relationship("Event", secondary=event_tag, back_populates="tags")
+    archived_events = relationship("ArchivedEvent", secondary="archived_event_tag", back_populates="tags")
     
     # Relationship with User
     user_id = Column(Integer, ForeignKey("users.id"))
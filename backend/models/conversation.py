@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+
+from utils.database import Base
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    role = Column(String)  # "user" or "assistant"
+    content = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class ConversationSummary(Base):
+    __tablename__ = "conversation_summaries"
+
+    # Rolling summary of the messages trimmed from a user's conversation
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    content = Column(String, default="")
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, DateTime
+from datetime import datetime
+
+from utils.database import Base
+
+class ReplicationHeartbeat(Base):
+    __tablename__ = "replication_heartbeats"
+
+    # Single row (id 1) whose timestamp is refreshed on the primary; how old
+    # it is on a replica tells how far that replica lags behind
+    id = Column(Integer, primary_key=True)
+    written_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey
+from datetime import datetime
+
+from utils.database import Base
+
+class SchedulerWorker(Base):
+    __tablename__ = "scheduler_workers"
+
+    # Unique per process (hostname:pid:random suffix)
+    worker_id = Column(String, primary_key=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    last_heartbeat = Column(DateTime, default=datetime.utcnow, index=True)
+
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+
+    # Name of the job the lease guards (e.g. "daily-summaries")
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=True)
+    expires_at = Column(DateTime, index=True)
+
+class SummaryDelivery(Base):
+    __tablename__ = "summary_deliveries"
+
+    # Date (UTC) of the last daily summary sent to each user, so a summary
+    # goes out at most once per day even if the summary lease changes hands
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    last_sent_date = Column(Date, nullable=False)
@@ -0,0 +1,113 @@
+from sqlalchemy import event
+
+from utils.database import Base
+
+# Full-text index over event titles/descriptions/locations and todo
+# titles/descriptions, kept up to date by the database itself on every write
+# (see services/search_service.py for the queries).
+#
+# SQLite: an FTS5 table filled by triggers. Its rowid encodes the source
+# row (event id * 2, todo id * 2 + 1) so a trigger updates exactly one
+# entry, and the owner column ("u<user_id>") lets MATCH itself restrict
+# results to one user. Rows moved to the archive (models/archive.py) leave
+# the index through the delete triggers, so search only covers live rows.
+#
+# PostgreSQL: a generated tsvector column on each table with a GIN index.
+
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+        owner, title, description, location,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_search_insert AFTER INSERT ON events BEGIN
+        INSERT INTO search_index (rowid, owner, title, description, location)
+        VALUES (new.id * 2, 'u' || new.user_id, new.title, new.description, new.location);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_search_update AFTER UPDATE OF title, description, location, user_id ON events BEGIN
+        UPDATE search_index SET owner = 'u' || new.user_id, title = new.title,
+            description = new.description, location = new.location
+        WHERE rowid = new.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS events_search_delete AFTER DELETE ON events BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_items_search_insert AFTER INSERT ON todo_items BEGIN
+        INSERT INTO search_index (rowid, owner, title, description, location)
+        VALUES (new.id * 2 + 1, 'u' || new.user_id, new.title, new.description, NULL);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_items_search_update AFTER UPDATE OF title, description, user_id ON todo_items BEGIN
+        UPDATE search_index SET owner = 'u' || new.user_id, title = new.title, description = new.description
+        WHERE rowid = new.id * 2 + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS todo_items_search_delete AFTER DELETE ON todo_items BEGIN
+        DELETE FROM search_index WHERE rowid = old.id * 2 + 1;
+    END
+    """,
+]
+
+# Index rows that existed before the search index was created
+SQLITE_SEARCH_BACKFILL = [
+    """
+    INSERT INTO search_index (rowid, owner, title, description, location)
+    SELECT id * 2, 'u' || user_id, title, description, location FROM events
+    """,
+    """
+    INSERT INTO search_index (rowid, owner, title, description, location)
+    SELECT id * 2 + 1, 'u' || user_id, title, description, NULL FROM todo_items
+    """,
+]
+
+# Generated columns fill in for existing rows when they are added
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(location, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_events_search_vector ON events USING GIN (search_vector)",
+    """
+    ALTER TABLE todo_items ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_todo_items_search_vector ON todo_items USING GIN (search_vector)",
+]
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """Create the search index (if missing) whenever the tables are created"""
+    if connection.dialect.name == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        ).first()
+        for statement in SQLITE_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            for statement in SQLITE_SEARCH_BACKFILL:
+                connection.exec_driver_sql(statement)
+    elif connection.dialect.name == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            connection.exec_driver_sql(statement)
+
+@event.listens_for(Base.metadata, "before_drop")
+def drop_search_index(target, connection, **kw):
+    # The triggers go with their tables; the SQLite index table has to be dropped itself
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("DROP TABLE IF EXISTS search_index")
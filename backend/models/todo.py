@@ -11,6 +11,8 @@ class PriorityLevel(enum.Enum):
 
 class TodoItem(Base):
     __tablename__ = "todo_items"
+    # Never reuse the id of a deleted (or archived) row
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from sqlalchemy import select, insert, delete, literal
+
+from utils.config import settings
+
+from models.calendar import Event, Reminder, event_tag
+from models.todo import TodoItem, TodoReminder
+from models.archive import ArchivedEvent, ArchivedTodoItem, archived_event_tag, ARCHIVED_TABLES, uses_autoincrement
+
+# Columns copied as-is from the live tables into the archive
+EVENT_COLUMNS = [
+    "id", "title", "description", "start_time", "end_time", "location",
+    "is_all_day", "ics_uid", "created_at", "updated_at", "user_id"
+]
+TODO_COLUMNS = [
+    "id", "title", "description", "deadline", "is_completed", "priority",
+    "created_at", "updated_at", "added_to_calendar", "event_id", "user_id"
+]
+
+def archive_events(db, ended_before: datetime, batch_size: int) -> int:
+    """
+    Move events that ended before a cutoff into archived_events
+
+    Tags move along; reminders are dropped. Each batch is copied and deleted
+    in its own transaction, so the job can stop at any point.
+
+    Args:
+        db: Database session
+        ended_before: Events whose end_time is earlier are archived
+        batch_size: Events moved per transaction
+
+    Returns:
+        Number of archived events
+    """
+    archived = 0
+    while True:
+        event_ids = [row[0] for row in db.execute(
+            select(Event.id).where(Event.end_time < ended_before).order_by(Event.id).limit(batch_size)
+        )]
+        if not event_ids:
+            return archived
+        
+        now = datetime.utcnow()
+        db.execute(insert(ArchivedEvent).from_select(
+            EVENT_COLUMNS + ["archived_at"],
+            select(*[getattr(Event, column) for column in EVENT_COLUMNS], literal(now)).where(Event.id.in_(event_ids))
+        ))
+        db.execute(insert(archived_event_tag).from_select(
+            ["event_id", "tag_id"],
+            select(event_tag.c.event_id, event_tag.c.tag_id).where(event_tag.c.event_id.in_(event_ids))
+        ))
+        db.execute(delete(event_tag).where(event_tag.c.event_id.in_(event_ids)))
+        db.execute(delete(Reminder).where(Reminder.event_id.in_(event_ids)))
+        db.execute(delete(Event).where(Event.id.in_(event_ids)))
+        db.commit()
+        archived += len(event_ids)
+
+def archive_todo_items(db, completed_before: datetime, batch_size: int) -> int:
+    """
+    Move todo items completed (last updated) before a cutoff into archived_todo_items
+
+    Args:
+        db: Database session
+        completed_before: Completed items last updated earlier are archived
+        batch_size: Items moved per transaction
+
+    Returns:
+        Number of archived todo items
+    """
+    archived = 0
+    while True:
+        todo_ids = [row[0] for row in db.execute(
+            select(TodoItem.id).where(
+                TodoItem.is_completed == True,
+                TodoItem.updated_at < completed_before
+            ).order_by(TodoItem.id).limit(batch_size)
+        )]
+        if not todo_ids:
+            return archived
+        
+        now = datetime.utcnow()
+        db.execute(insert(ArchivedTodoItem).from_select(
+            TODO_COLUMNS + ["archived_at"],
+            select(*[getattr(TodoItem, column) for column in TODO_COLUMNS], literal(now)).where(TodoItem.id.in_(todo_ids))
+        ))
+        db.execute(delete(TodoReminder).where(TodoReminder.todo_item_id.in_(todo_ids)))
+        db.execute(delete(TodoItem).where(TodoItem.id.in_(todo_ids)))
+        db.commit()
+        archived += len(todo_ids)
+
+def archive_cold_rows(db, event_days: int, todo_days: int, batch_size: int) -> dict:
+    """
+    Archive events that ended more than event_days ago and todos completed more than todo_days ago
+
+    Nothing is archived while the live tables can still reuse ids (a SQLite
+    database created before the archive that init_db.py hasn't migrated
+    yet): a new row could take an archived id.
+
+    Returns:
+        Number of archived rows per kind
+    """
+    if not all(uses_autoincrement(db.connection(), name) for name in ARCHIVED_TABLES):
+        print("Skipping archive: run init_db.py to migrate events and todo_items to AUTOINCREMENT first")
+        return {"events": 0, "todo_items": 0}
+
+    now = datetime.utcnow()
+    return {
+        "events": archive_events(db, now - timedelta(days=event_days), batch_size),
+        "todo_items": archive_todo_items(db, now - timedelta(days=todo_days), batch_size)
+    }
+
+def reaches_archive(start_date: Optional[datetime]) -> bool:
+    """
+    Whether a date range starting at start_date can include archived events
+
+    Only events that ended before now - ARCHIVE_EVENTS_AFTER_DAYS are ever
+    archived, so ranges starting after that need no archive query.
+    """
+    if start_date is None:
+        return True
+    if start_date.tzinfo is not None:
+        start_date = start_date.astimezone(timezone.utc).replace(tzinfo=None)
+    return start_date < datetime.utcnow() - timedelta(days=settings.ARCHIVE_EVENTS_AFTER_DAYS)
@@ -1,22 +1,21 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any
-import dateutil.parser
 import uuid
 
+from utils.dates import parse_datetime
 from models.calendar import Event, Reminder
 from services.ics_service import create_ics_file
 
-def create_event_from_text(event_data: Dict[str, Any], user_id: int, db) -> Event:
+def build_event_from_text(event_data: Dict[str, Any], user_id: int) -> Event:
     """
-    Create a calendar event from structured data extracted from text
+    Build an unsaved calendar event (with its default reminder) from structured data
     
     Args:
         event_data: Dictionary containing event data
         user_id: The ID of the user
-        db: Database session
         
     Returns:
-        The created Event
+        The new Event, not yet added to a session
     """
     # Extract fields from data
     title = event_data.get("title", "Untitled Event")
@@ -28,7 +27,7 @@ def create_event_from_text(event_data: Dict[str, Any], user_id: int, db) -> Even
     start_time = None
     if event_data.get("start_time"):
         try:
-            start_time = dateutil.parser.parse(event_data["start_time"])
+            start_time = parse_datetime(event_data["start_time"])
         except:
             # If parsing fails, use current time
             start_time = datetime.now()
@@ -39,7 +38,7 @@ def create_event_from_text(event_data: Dict[str, Any], user_id: int, db) -> Even
     end_time = None
     if event_data.get("end_time"):
         try:
-            end_time = dateutil.parser.parse(event_data["end_time"])
+            end_time = parse_datetime(event_data["end_time"])
         except:
             # If parsing fails, use start time + 1 hour
             end_time = start_time + timedelta(hours=1)
@@ -50,8 +49,8 @@ def create_event_from_text(event_data: Dict[str, Any], user_id: int, db) -> Even
     # Create ICS UID
     ics_uid = str(uuid.uuid4())
     
-    # Create new event
-    event = Event(
+    # Create new event with a default reminder
+    return Event(
         title=title,
         description=description,
         start_time=start_time,
@@ -59,19 +58,25 @@ def create_event_from_text(event_data: Dict[str, Any], user_id: int, db) -> Even
         location=location,
         is_all_day=is_all_day,
         ics_uid=ics_uid,
-        user_id=user_id
+        user_id=user_id,
+        reminders=[Reminder(minutes_before=15)]  # Default to 15 minutes before
     )
+
+def create_event_from_text(event_data: Dict[str, Any], user_id: int, db) -> Event:
+    """
+    Create a calendar event from structured data extracted from text
     
-    db.add(event)
-    db.commit()
-    db.refresh(event)
+    Args:
+        event_data: Dictionary containing event data
+        user_id: The ID of the user
+        db: Database session
+        
+    Returns:
+        The created Event
+    """
+    event = build_event_from_text(event_data, user_id)
     
-    # Add a default reminder
-    reminder = Reminder(
-        minutes_before=15,  # Default to 15 minutes before
-        event_id=event.id
-    )
-    db.add(reminder)
+    db.add(event)
     db.commit()
     db.refresh(event)
     
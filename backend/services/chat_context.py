@@ -0,0 +1,143 @@
+import re
+from typing import List, Dict, Optional
+
+# Words, numbers and single punctuation marks, roughly how BPE tokenizers split text
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Fixed cost of a chat message (role and separators) in the prompt template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Longest excerpt of a single turn kept in the rolling summary
+SUMMARY_EXCERPT_TOKENS = 40
+
+# Introduces the rolling summary in the prompt
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Estimate the number of model tokens in a text without a tokenizer
+
+    Each word or punctuation mark counts as one token, plus one more for every
+    4 characters beyond the first 4 (long words are split into several pieces).
+    """
+    if not text:
+        return 0
+    return sum(1 + max(0, len(piece) - 1) // 4 for piece in TOKEN_PATTERN.findall(text))
+
+def estimate_message_tokens(message: Dict[str, str]) -> int:
+    """Estimate the tokens a chat message takes in the prompt"""
+    return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content"))
+
+# Appended where a text was cut
+TRUNCATION_MARKER = " [...]"
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text down to at most max_tokens (marker included), marking the cut"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    # Leave room for the marker so the result stays within max_tokens
+    max_tokens -= estimate_tokens(TRUNCATION_MARKER)
+    total = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        piece = match.group()
+        total += 1 + max(0, len(piece) - 1) // 4
+        if total > max_tokens:
+            cut = text[:match.start()].rstrip()
+            return cut + TRUNCATION_MARKER if cut else ""
+    return text
+
+def fold_into_summary(summary: Optional[str], messages: List[Dict[str, str]], max_tokens: int) -> str:
+    """
+    Fold older turns into a rolling summary
+
+    Each turn contributes a short excerpt (its first sentence, capped at
+    SUMMARY_EXCERPT_TOKENS). When the summary grows past max_tokens the oldest
+    lines are dropped, so updating it costs only the new turns.
+
+    Args:
+        summary: Existing summary text, if any
+        messages: Turns to add, oldest first
+        max_tokens: Budget for the whole summary
+
+    Returns:
+        The updated summary
+    """
+    lines = summary.splitlines() if summary else []
+    for message in messages:
+        content = " ".join((message.get("content") or "").split())
+        if not content:
+            continue
+        first_sentence = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+        speaker = "User" if message.get("role") == "user" else "Assistant"
+        lines.append(f"{speaker}: {truncate_to_tokens(first_sentence, SUMMARY_EXCERPT_TOKENS)}")
+
+    while lines and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+def assemble_context(
+    system_message: str,
+    history: List[Dict[str, str]],
+    message: str,
+    summary: Optional[str],
+    budget: int,
+    summary_budget: int,
+    reserved_tokens: int = 0
+) -> List[Dict[str, str]]:
+    """
+    Build the prompt messages for a chat turn within a token budget
+
+    The system message and the current user message are always included (the
+    latter truncated if it alone would exceed the budget). Recent turns are
+    then added verbatim, newest first, while they fit. Older turns that don't
+    fit are folded into the rolling summary, which is sent as a second system
+    message. That fold is not saved; the conversation store already folds
+    turns beyond CHAT_HISTORY_TOKEN_BUDGET into the stored summary, so it
+    only happens when the current message is unusually long.
+
+    Args:
+        system_message: Instructions for the model
+        history: Previous turns, oldest first, not including the current message
+        message: The user's message
+        summary: Rolling summary of turns no longer in history, if any
+        budget: Maximum estimated prompt tokens
+        summary_budget: Maximum estimated tokens for the summary
+        reserved_tokens: Tokens used by other parts of the request (e.g. tool schemas)
+
+    Returns:
+        The messages list for the completion request
+    """
+    system = {"role": "system", "content": system_message}
+    remaining = budget - reserved_tokens - estimate_message_tokens(system)
+
+    # Keep room for a summary so the current message can't crowd it out entirely
+    summary_reserve = min(summary_budget, remaining // 4) if (summary or history) else 0
+    message_budget = max(1, remaining - summary_reserve - MESSAGE_OVERHEAD_TOKENS)
+    current = {"role": "user", "content": truncate_to_tokens(message, message_budget)}
+    remaining -= estimate_message_tokens(current) + summary_reserve
+
+    # Recent turns verbatim, newest first, while they fit
+    recent = []
+    index = len(history)
+    while index > 0:
+        cost = estimate_message_tokens(history[index - 1])
+        if cost > remaining:
+            break
+        remaining -= cost
+        index -= 1
+        recent.insert(0, history[index])
+
+    # Whatever didn't fit goes into the summary
+    summary_tokens = summary_reserve - MESSAGE_OVERHEAD_TOKENS - estimate_tokens(SUMMARY_HEADER)
+    if history[:index]:
+        summary = fold_into_summary(summary, history[:index], summary_tokens)
+    elif summary:
+        summary = fold_into_summary(summary, [], summary_tokens + remaining)
+
+    messages = [system]
+    if summary:
+        messages.append({"role": "system", "content": SUMMARY_HEADER + summary})
+    messages.extend(recent)
+    messages.append(current)
+    return messages
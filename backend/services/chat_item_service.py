@@ -0,0 +1,70 @@
+from typing import Dict, Any, List
+
+from services.todo_service import build_todo_from_text
+from services.calendar_service import build_event_from_text
+
+# Builder for each generated item type
+ITEM_BUILDERS = {
+    "todo": build_todo_from_text,
+    "event": build_event_from_text
+}
+
+def create_items_from_chat(generated_items: List[Dict[str, Any]], user_id: int, db) -> List[Dict[str, Any]]:
+    """
+    Create all todos and events generated by one chat turn in a single transaction
+
+    Items that can't be built are reported as errors and skipped; the rest are
+    flushed and committed together.
+
+    Args:
+        generated_items: Items from process_chat_message ({"type": ..., "data": ...})
+        user_id: The ID of the user
+        db: Database session
+
+    Returns:
+        One result per generated item, in order, with "type", "title" and
+        "status" ("created" or "error") plus "id" or "error"
+    """
+    results = []
+    created = []
+
+    for item in generated_items:
+        title = item.get("data", {}).get("title")
+        if item.get("error"):
+            # The model's tool call couldn't be parsed
+            results.append({"type": item.get("type"), "title": title, "status": "error", "error": item["error"]})
+            continue
+        try:
+            db_item = ITEM_BUILDERS[item["type"]](item["data"], user_id)
+        except Exception as e:
+            print(f"Error creating item: {str(e)}")
+            results.append({"type": item.get("type"), "title": title, "status": "error", "error": str(e)})
+            continue
+
+        db.add(db_item)
+        result = {"type": item["type"], "title": db_item.title, "status": "created"}
+        results.append(result)
+        created.append((result, db_item))
+
+    if not created:
+        return results
+
+    try:
+        # Flush once to get the new IDs, then commit once
+        db.flush()
+        for result, db_item in created:
+            result["id"] = db_item.id
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Error creating items: {str(e)}")
+        for result, _ in created:
+            result.pop("id", None)
+            result["status"] = "error"
+            result["error"] = str(e)
+        return results
+
+    for result, _ in created:
+        print(f"Successfully created {result['type']}: {result['title']} with ID: {result['id']}")
+
+    return results
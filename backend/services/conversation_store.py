@@ -0,0 +1,231 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import func
+
+from utils.config import settings
+from models.conversation import ConversationMessage, ConversationSummary
+from services.chat_context import fold_into_summary, estimate_message_tokens
+
+class ConversationStore:
+    """
+    Chat history per user, persisted in the conversation_messages table
+
+    The table is the source of truth, so history is shared by every worker
+    process and survives restarts. Messages trimmed from a conversation are
+    folded into its rolling summary. Each process keeps a bounded LRU of recent
+    conversations in memory; entries idle for longer than ttl_seconds are
+    dropped. Writes through this store update the cached entry, so reads need
+    no query. Only another worker can make an entry stale: once it is older
+    than validate_seconds, the next read checks that the newest message id in
+    the table still matches before reusing it.
+    """
+
+    def __init__(self, max_users: int, ttl_seconds: int, max_messages: int, summary_tokens: int,
+                 validate_seconds: float = 0, history_tokens: int = 0):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self.validate_seconds = validate_seconds
+        self.max_messages = max_messages
+        # Estimated tokens of the kept messages (0: no limit besides max_messages)
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        # user_id -> (last access time, validated at, newest message id, messages, summary)
+        self._cache: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_cached(self, user_id: int) -> Optional[tuple]:
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if now - entry[0] > self.ttl_seconds:
+                del self._cache[user_id]
+                return None
+            entry = self._cache[user_id] = (now,) + entry[1:]
+            self._cache.move_to_end(user_id)
+            return entry
+
+    def _put_cached(self, user_id: int, last_id: Optional[int], messages: List[Dict[str, str]], summary: str):
+        with self._lock:
+            now = time.monotonic()
+            self._cache[user_id] = (now, now, last_id, messages, summary)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_users:
+                self._cache.popitem(last=False)
+
+    def get_history(self, user_id: int, db) -> List[Dict[str, str]]:
+        """Get the most recent messages of a user's conversation (see get_context)"""
+        return self.get_context(user_id, db)[0]
+
+    def get_context(self, user_id: int, db) -> Tuple[List[Dict[str, str]], str]:
+        """
+        Get the most recent messages of a user's conversation and the summary of older ones
+
+        Args:
+            user_id: The ID of the user
+            db: Database session
+
+        Returns:
+            Tuple containing (list of {"role": ..., "content": ...} dicts, oldest
+            first, as a copy the caller may modify; rolling summary text)
+        """
+        entry = self._get_cached(user_id)
+        if entry is not None and time.monotonic() - entry[1] < self.validate_seconds:
+            return list(entry[3]), entry[4]
+
+        last_id = self._last_message_id(user_id, db)
+        if entry is not None and entry[2] == last_id:
+            self._put_cached(user_id, last_id, entry[3], entry[4])
+            return list(entry[3]), entry[4]
+
+        rows = db.query(ConversationMessage.role, ConversationMessage.content).filter(
+            ConversationMessage.user_id == user_id
+        ).order_by(ConversationMessage.id.desc()).limit(self.max_messages).all()
+        messages = [{"role": row.role, "content": row.content} for row in reversed(rows)]
+        summary = db.query(ConversationSummary.content).filter(
+            ConversationSummary.user_id == user_id
+        ).scalar() or ""
+
+        self._put_cached(user_id, last_id, messages, summary)
+        return list(messages), summary
+
+    def append(self, user_id: int, messages: List[Dict[str, str]], db) -> None:
+        """
+        Add messages to a user's conversation and trim it
+
+        The conversation keeps its newest messages while they fit in
+        max_messages and history_tokens. Trimmed messages are folded into the
+        conversation's rolling summary once, here, so building a prompt from
+        the history rarely has to fold anything.
+
+        Args:
+            user_id: The ID of the user
+            messages: List of {"role": ..., "content": ...} dicts
+            db: Database session
+        """
+        previous_last_id = self._last_message_id(user_id, db)
+
+        rows = [
+            ConversationMessage(user_id=user_id, role=message["role"], content=message["content"])
+            for message in messages
+        ]
+        db.add_all(rows)
+        db.flush()
+
+        newest = db.query(ConversationMessage.id, ConversationMessage.role, ConversationMessage.content).filter(
+            ConversationMessage.user_id == user_id
+        ).order_by(ConversationMessage.id.desc()).limit(self.max_messages).all()
+        kept = len(newest)
+        if self.history_tokens:
+            total = 0
+            for index, row in enumerate(newest):
+                total += estimate_message_tokens({"role": row.role, "content": row.content})
+                if total > self.history_tokens:
+                    # Always keep the newest message, however long
+                    kept = max(index, 1)
+                    break
+
+        # Drop everything older than the kept messages
+        summary = None
+        if kept < len(newest) or len(newest) == self.max_messages:
+            cutoff_id = newest[kept].id if kept < len(newest) else newest[-1].id - 1
+            trimmed = db.query(ConversationMessage.role, ConversationMessage.content).filter(
+                ConversationMessage.user_id == user_id,
+                ConversationMessage.id <= cutoff_id
+            ).order_by(ConversationMessage.id).all()
+            if trimmed:
+                summary = self._fold_summary(user_id, trimmed, db)
+                db.query(ConversationMessage).filter(
+                    ConversationMessage.user_id == user_id,
+                    ConversationMessage.id <= cutoff_id
+                ).delete(synchronize_session=False)
+
+        last_id = rows[-1].id if rows else None
+        db.commit()
+
+        # Extend the cached copy only if it was current; otherwise reload on next read
+        entry = self._get_cached(user_id)
+        if entry is not None and rows and entry[2] == previous_last_id:
+            history = entry[3] + [{"role": row.role, "content": row.content} for row in rows]
+            self._put_cached(user_id, last_id, history[len(history) - kept:], entry[4] if summary is None else summary)
+        elif entry is not None:
+            with self._lock:
+                self._cache.pop(user_id, None)
+
+    @staticmethod
+    def _last_message_id(user_id: int, db) -> Optional[int]:
+        return db.query(func.max(ConversationMessage.id)).filter(
+            ConversationMessage.user_id == user_id
+        ).scalar()
+
+    def _fold_summary(self, user_id: int, trimmed, db) -> str:
+        """Fold trimmed messages into the stored summary (incremental update)"""
+        summary_row = db.query(ConversationSummary).filter(
+            ConversationSummary.user_id == user_id
+        ).first()
+        if summary_row is None:
+            summary_row = ConversationSummary(user_id=user_id, content="")
+            db.add(summary_row)
+
+        summary_row.content = fold_into_summary(
+            summary_row.content,
+            [{"role": row.role, "content": row.content} for row in trimmed],
+            self.summary_tokens
+        )
+        return summary_row.content
+
+    def clear(self, user_id: int, db) -> None:
+        """Delete a user's conversation"""
+        db.query(ConversationMessage).filter(
+            ConversationMessage.user_id == user_id
+        ).delete(synchronize_session=False)
+        db.query(ConversationSummary).filter(
+            ConversationSummary.user_id == user_id
+        ).delete(synchronize_session=False)
+        db.commit()
+
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def purge_idle(self, db, retention_hours: int) -> int:
+        """
+        Delete conversations with no message in the last retention_hours
+
+        Args:
+            db: Database session
+            retention_hours: How long an idle conversation is kept
+
+        Returns:
+            Number of deleted messages
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=retention_hours)
+        idle_users = db.query(ConversationMessage.user_id).group_by(
+            ConversationMessage.user_id
+        ).having(func.max(ConversationMessage.created_at) < cutoff)
+
+        idle_user_ids = [row.user_id for row in idle_users.all()]
+        if not idle_user_ids:
+            return 0
+
+        deleted = db.query(ConversationMessage).filter(
+            ConversationMessage.user_id.in_(idle_user_ids)
+        ).delete(synchronize_session=False)
+        db.query(ConversationSummary).filter(
+            ConversationSummary.user_id.in_(idle_user_ids)
+        ).delete(synchronize_session=False)
+        db.commit()
+        return deleted
+
+# Shared store instance
+conversation_store = ConversationStore(
+    max_users=settings.CONVERSATION_CACHE_SIZE,
+    ttl_seconds=settings.CONVERSATION_CACHE_TTL_SECONDS,
+    validate_seconds=settings.CONVERSATION_CACHE_VALIDATE_SECONDS,
+    max_messages=settings.CONVERSATION_MAX_MESSAGES,
+    summary_tokens=settings.CHAT_SUMMARY_TOKEN_BUDGET,
+    history_tokens=settings.CHAT_HISTORY_TOKEN_BUDGET
+)
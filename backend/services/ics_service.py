@@ -1,8 +1,6 @@
-from icalendar import Calendar, Event as ICalEvent, vCalAddress, vText
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import List
 import uuid
-import pytz
 
 from models.calendar import Event, Reminder, Tag
 
@@ -16,6 +14,9 @@ def create_ics_file(event: Event) -> str:
     Returns:
         The ICS file content as a string
     """
+    # icalendar (and pytz with it) is imported on first use, to keep it out of worker startup
+    from icalendar import Calendar, Event as ICalEvent
+    
     cal = Calendar()
     cal.add('prodid', '-//Polaris Calendar//EN')
     cal.add('version', '2.0')
@@ -89,6 +90,8 @@ def import_ics_file(ics_content: bytes, user_id: int, db) -> List[Event]:
     Returns:
         List of created events
     """
+    from icalendar import Calendar
+    
     try:
         calendar = Calendar.from_ical(ics_content)
         imported_events = []
@@ -117,9 +120,9 @@ def import_ics_file(ics_content: bytes, user_id: int, db) -> List[Event]:
                 
                 # Make sure we have naive datetimes
                 if hasattr(start_time, 'tzinfo') and start_time.tzinfo:
-                    start_time = start_time.astimezone(pytz.utc).replace(tzinfo=None)
+                    start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
                 if hasattr(end_time, 'tzinfo') and end_time.tzinfo:
-                    end_time = end_time.astimezone(pytz.utc).replace(tzinfo=None)
+                    end_time = end_time.astimezone(timezone.utc).replace(tzinfo=None)
                 
                 location = str(component.get('location', ''))
                 uid = str(component.get('uid', str(uuid.uuid4())))
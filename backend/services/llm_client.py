@@ -0,0 +1,313 @@
+import json
+import time
+import asyncio
+import httpx
+from collections import deque
+from typing import Dict, Any, Optional, AsyncIterator
+
+from utils.config import settings
+from utils.metrics import llm_request_duration, llm_tokens, llm_rejected
+
+# Shared HTTP client, created on first use so every chat request reuses the
+# same connection pool instead of opening a new TLS connection per message
+_client: Optional[httpx.AsyncClient] = None
+
+class LLMUnavailableError(Exception):
+    """Raised without calling upstream while the circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Fail fast while the LLM API is degraded
+
+    After failure_threshold consecutive failures the breaker opens and calls
+    are rejected for reset_seconds. It then lets a single trial call through
+    (half-open): success closes it again, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def retry_after(self) -> int:
+        """Seconds until the breaker lets a trial call through"""
+        if self.opened_at is None:
+            return 0
+        return max(1, int(self.reset_seconds - (time.monotonic() - self.opened_at) + 0.999))
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_progress:
+            self.trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self):
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_progress = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.trial_in_progress = False
+        if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Give back a half-open trial slot when the call ended without an outcome (e.g. cancelled)"""
+        self.trial_in_progress = False
+
+class LLMStats:
+    """Counters for LLM calls plus latencies of the most recent ones"""
+
+    def __init__(self, window: int = 1000):
+        self.calls = 0
+        self.errors = 0
+        self.rejected = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tool_calls = 0
+        self.latencies_ms = deque(maxlen=window)
+
+    def record(self, metrics: Dict[str, Any]):
+        self.calls += 1
+        self.retries += metrics["retries"]
+        if metrics["status"] != "ok":
+            self.errors += 1
+        self.prompt_tokens += metrics.get("prompt_tokens") or 0
+        self.completion_tokens += metrics.get("completion_tokens") or 0
+        self.tool_calls += metrics.get("tool_calls") or 0
+        self.latencies_ms.append(metrics["latency_ms"])
+
+    def snapshot(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies_ms)
+
+        def percentile(pct):
+            return latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))] if latencies else None
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "tool_calls": self.tool_calls,
+            "latency_p50_ms": percentile(50),
+            "latency_p95_ms": percentile(95),
+            "circuit_state": circuit_breaker.state
+        }
+
+circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.LLM_BREAKER_RESET_SECONDS
+)
+llm_stats = LLMStats()
+
+def get_client() -> httpx.AsyncClient:
+    """Return the process-wide async HTTP client for the LLM API"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=settings.LLM_API_BASE,
+            headers={"Authorization": f"Bearer {settings.TOGETHER_API_KEY}"},
+            timeout=httpx.Timeout(
+                settings.LLM_TIMEOUT_SECONDS,
+                connect=settings.LLM_CONNECT_TIMEOUT_SECONDS
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS
+            )
+        )
+    return _client
+
+async def close_client():
+    """Close the shared client (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_llm_stats() -> Dict[str, Any]:
+    """Aggregated metrics of the LLM calls made by this worker"""
+    return llm_stats.snapshot()
+
+def is_upstream_failure(error: Exception) -> bool:
+    """Timeouts, connection errors, 429, 5xx and unreadable bodies mean upstream trouble; other 4xx are our fault"""
+    if isinstance(error, ValueError):
+        # A response (or streamed chunk) that isn't valid JSON
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+def record_call(metrics: Dict[str, Any]):
+    """Add one call's metrics to the totals and the Prometheus metrics"""
+    llm_stats.record(metrics)
+    model = metrics.get("model") or "unknown"
+    llm_request_duration.observe(metrics["latency_ms"] / 1000, model, metrics["status"], str(bool(metrics.get("stream"))).lower())
+    for kind in ("prompt_tokens", "completion_tokens"):
+        if metrics.get(kind):
+            llm_tokens.inc(model, kind.split("_")[0], amount=metrics[kind])
+
+def check_circuit():
+    """Raise LLMUnavailableError if the circuit breaker rejects the call"""
+    if not circuit_breaker.allow_request():
+        llm_stats.rejected += 1
+        llm_rejected.inc()
+        raise LLMUnavailableError("The AI service is temporarily unavailable")
+
+async def create_chat_completion(**payload) -> Dict[str, Any]:
+    """
+    Call the OpenAI-compatible chat completions endpoint
+
+    Transient failures are retried up to settings.LLM_MAX_RETRIES times with
+    exponential backoff.
+
+    Args:
+        payload: Request body fields (model, messages, tools, ...)
+
+    Returns:
+        The decoded JSON completion
+
+    Raises:
+        LLMUnavailableError: The circuit breaker is open
+        httpx.HTTPError: The call failed
+        ValueError: The response wasn't valid JSON
+    """
+    check_circuit()
+    start = time.perf_counter()
+    retries = 0
+
+    try:
+        while True:
+            try:
+                response = await get_client().post("/chat/completions", json=payload)
+                response.raise_for_status()
+                completion = response.json()
+                break
+            except (httpx.HTTPError, ValueError) as e:
+                if retries < settings.LLM_MAX_RETRIES and is_upstream_failure(e):
+                    retries += 1
+                    await asyncio.sleep(settings.LLM_RETRY_BACKOFF_SECONDS * 2 ** (retries - 1))
+                    continue
+                raise
+    except (httpx.HTTPError, ValueError) as e:
+        if is_upstream_failure(e):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.release_trial()
+        record_call({
+            "model": payload.get("model"),
+            "status": "error",
+            "error": type(e).__name__,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "retries": retries
+        })
+        raise
+    except BaseException:
+        # Cancelled or failed for a reason that says nothing about upstream
+        # health; free the half-open trial slot so the breaker can't get stuck
+        circuit_breaker.release_trial()
+        raise
+
+    circuit_breaker.record_success()
+    usage = completion.get("usage") or {}
+    message = (completion.get("choices") or [{}])[0].get("message") or {}
+    record_call({
+        "model": payload.get("model"),
+        "status": "ok",
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "retries": retries,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "tool_calls": len(message.get("tool_calls") or [])
+    })
+    return completion
+
+async def stream_chat_completion(**payload) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Call the chat completions endpoint with stream=True
+
+    Args:
+        payload: Request body fields (model, messages, tools, ...)
+
+    Yields:
+        Each decoded completion chunk as it arrives
+
+    Raises:
+        LLMUnavailableError: The circuit breaker is open
+        httpx.HTTPError: The call failed
+        ValueError: A chunk wasn't valid JSON
+    """
+    check_circuit()
+    start = time.perf_counter()
+    first_chunk_ms = None
+    usage = {}
+    tool_call_indexes = set()
+
+    try:
+        async with get_client().stream("POST", "/chat/completions", json={**payload, "stream": True}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+
+                if first_chunk_ms is None:
+                    first_chunk_ms = round((time.perf_counter() - start) * 1000, 1)
+                usage = chunk.get("usage") or usage
+                for choice in chunk.get("choices") or []:
+                    for fragment in (choice.get("delta") or {}).get("tool_calls") or []:
+                        tool_call_indexes.add(fragment.get("index", 0))
+
+                yield chunk
+    except (httpx.HTTPError, ValueError) as e:
+        if is_upstream_failure(e):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.release_trial()
+        record_call({
+            "model": payload.get("model"),
+            "status": "error",
+            "error": type(e).__name__,
+            "stream": True,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "retries": 0
+        })
+        raise
+    except BaseException:
+        # Cancelled, closed early by the consumer or failed for another reason
+        circuit_breaker.release_trial()
+        raise
+
+    circuit_breaker.record_success()
+    record_call({
+        "model": payload.get("model"),
+        "status": "ok",
+        "stream": True,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        "first_chunk_ms": first_chunk_ms,
+        "retries": 0,
+        "prompt_tokens": usage.get("prompt_tokens"),
+        "completion_tokens": usage.get("completion_tokens"),
+        "tool_calls": len(tool_call_indexes)
+    })
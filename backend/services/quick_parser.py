@@ -0,0 +1,346 @@
+import re
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from utils.dates import parse_datetime
+
+# Deterministic parser for simple scheduling messages ("remind me to call mom
+# tomorrow at 5pm", "meeting with Bob Friday 2-3"). It only answers when the
+# message matches a known shape exactly; anything ambiguous returns None so the
+# caller falls through to the LLM.
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tue": 1, "tues": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6
+}
+
+MONTHS = (
+    r"jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|"
+    r"sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?"
+)
+
+# A clock time with an explicit am/pm or minutes, e.g. "5pm", "5:30 pm", "17:00"
+CLOCK = r"\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\d{1,2}:\d{2}|noon|midnight"
+# A bare hour is only accepted inside a range ("2-3") or after "at" ("at 5")
+HOUR = r"\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?"
+
+TIME_RANGE_PATTERN = re.compile(
+    rf"\b(?:from\s+)?(?P<start>{HOUR}|noon)\s*(?:-|–|to|until|till)\s*(?P<end>{HOUR}|noon)(?=\s|$|[,.!])",
+    re.IGNORECASE
+)
+TIME_PATTERN = re.compile(rf"\b(?:at\s+)?(?P<time>{CLOCK})(?=\s|$|[,.!])", re.IGNORECASE)
+AT_HOUR_PATTERN = re.compile(r"\bat\s+(?P<time>\d{1,2})(?=\s|$|[,.!])", re.IGNORECASE)
+
+DATE_PREFIX = r"(?:(?:on|by|due|for)\s+)?"
+RELATIVE_DATE_PATTERN = re.compile(
+    rf"\b{DATE_PREFIX}(?P<day>today|tonight|tomorrow|tmrw|day after tomorrow)\b", re.IGNORECASE
+)
+WEEKDAY_PATTERN = re.compile(
+    rf"\b{DATE_PREFIX}(?P<this>this\s+)?(?P<weekday>{'|'.join(sorted(WEEKDAYS, key=len, reverse=True))})\b",
+    re.IGNORECASE
+)
+# "next friday" means different things to different people, and recurring
+# events need more than one item, so these are left to the LLM
+AMBIGUOUS_DATE_PATTERN = re.compile(
+    rf"\b(?:next|coming|last)\s+(?:{'|'.join(WEEKDAYS)}|week|month)\b|\bweekend\b|\bin\s+\d+\s+(?:days?|weeks?|hours?)\b|"
+    r"\b(?:every|daily|weekly|monthly|each)\b",
+    re.IGNORECASE
+)
+MONTH_DATE_PATTERN = re.compile(
+    rf"\b{DATE_PREFIX}(?P<date>(?:{MONTHS})\.?\s+\d{{1,2}}(?:st|nd|rd|th)?(?:,?\s+\d{{4}})?|\d{{1,2}}(?:st|nd|rd|th)?\s+(?:{MONTHS})(?:,?\s+\d{{4}})?)\b",
+    re.IGNORECASE
+)
+NUMERIC_DATE_PATTERN = re.compile(
+    rf"\b{DATE_PREFIX}(?P<date>\d{{4}}-\d{{2}}-\d{{2}}|\d{{1,2}}/\d{{1,2}}(?:/\d{{2,4}})?)\b", re.IGNORECASE
+)
+
+TODO_PATTERN = re.compile(
+    r"^(?:please\s+)?(?P<prefix>remind me to|remember to|don'?t forget to|do not forget to|i need to|i have to|"
+    r"to-?do:?|add (?:a )?(?:todo|task)(?: to)?:?|new (?:todo|task):?)\s+(?P<title>.+)$",
+    re.IGNORECASE
+)
+# "I need to ..." is as often conversation as a task, so these prefixes only
+# make a todo together with a date or time
+SOFT_TODO_PREFIX_PATTERN = re.compile(r"^(?:remember to|i need to|i have to)$", re.IGNORECASE)
+EVENT_PREFIX_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:schedule|book|add|put|create)\s+(?:an?\s+)?(?:(?:event|meeting)\s*:\s*)?(?P<title>.+)$",
+    re.IGNORECASE
+)
+# Words that make a message with a time clearly an event rather than a task
+EVENT_KEYWORDS = re.compile(
+    r"\b(?:meeting|meet|appointment|appt|lunch|dinner|breakfast|brunch|coffee|call with|interview|class|"
+    r"lecture|party|dentist|doctor|session|standup|stand-up|sync|1:1|one-on-one|date with|game|concert)\b",
+    re.IGNORECASE
+)
+HIGH_PRIORITY_PATTERN = re.compile(
+    r"[,\s]*(?:\b(?:it'?s|this is)\s+)?(?:very\s+)?\b(?:urgent(?:ly)?|important|asap|high priority)\b[!.,]*", re.IGNORECASE
+)
+LOCATION_PATTERN = re.compile(
+    r"\s+(?:at|in)\s+(?P<location>(?:(?:the|room)\s+)?[A-Z0-9][\w'-]*(?:\s+[A-Z0-9][\w'-]*)*)\s*$"
+)
+# Messages with several requests or questions go to the LLM
+COMPOUND_PATTERN = re.compile(
+    r"\?|\b(?:and|also|then)\s+(?:remind|add|schedule|book|put|create|set|i need)\b|[.!;]\s+\w", re.IGNORECASE
+)
+
+# Parts of a message the parser doesn't model: a duration ("for 30 minutes")
+# or a follow-on clause (", then movie"). If one is left after the date and
+# time are taken out, the message goes to the LLM instead of into the title.
+UNHANDLED_PATTERN = re.compile(
+    r"\b\d+(?:\.\d+)?\s*(?:minutes?|mins?|hours?|hrs?|h)\b|\b(?:an?|half an?)\s+(?:hour|minute)s?\b|"
+    r"\bthen\b|\bafter(?:wards| that)\b|,\s*and\b",
+    re.IGNORECASE
+)
+
+# Requests to change or look up existing items, not to create new ones
+NON_CREATE_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:can you\s+|could you\s+)?(?:cancel|move|reschedule|postpone|delete|remove|change|update|"
+    r"edit|show|list|what|when|where|who|how|why|is|are|do|does|did)\b",
+    re.IGNORECASE
+)
+
+# The same after a todo or event prefix ("I need to cancel ..."), plus things
+# that aren't tasks at all ("I have to think about it", "I need to go now")
+NON_TASK_PATTERN = re.compile(
+    r"^(?:cancel|move|reschedule|postpone|delete|remove|change|update|edit|know|find out|think|wonder|"
+    r"go\s+(?:now|away)|go$|leave now|check (?:my|the) (?:calendar|schedule))\b",
+    re.IGNORECASE
+)
+
+# Date and time words the patterns above didn't consume ("on the 1st",
+# "tomorrow morning"): the date is only partly understood
+LEFTOVER_DATE_PATTERN = re.compile(
+    r"\b\d{1,2}(?:st|nd|rd|th)\b|\b(?:today|tonight|tomorrow|tmrw|yesterday|morning|afternoon|evening|"
+    r"noon|midnight|eod|end of (?:the )?(?:day|week|month))\b|"
+    r"\b(?:mon|tues|wednes|thurs|fri|satur|sun)days?\b|\bmay\s+\d|"
+    r"\b(?:january|february|march|april|june|july|august|september|october|november|december)\b",
+    re.IGNORECASE
+)
+
+MAX_MESSAGE_LENGTH = 160
+MAX_TITLE_LENGTH = 80
+
+def _parse_clock(text: str) -> Optional[time]:
+    """Parse "5pm", "5:30 p.m.", "17:00", "noon" or a bare hour into a time"""
+    text = text.strip().lower().replace(".", "")
+    if text == "noon":
+        return time(12, 0)
+    if text == "midnight":
+        return time(0, 0)
+
+    match = re.fullmatch(r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?", text)
+    if not match:
+        return None
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if minute > 59:
+        return None
+
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    elif 1 <= hour <= 12:
+        # No am/pm: assume working hours (8-11 in the morning, 12-7 in the afternoon)
+        if hour == 12 or hour <= 7:
+            hour = hour % 12 + 12
+    elif match.group(2) is None or hour > 23:
+        # "0" or "15" without minutes isn't a time anyone writes
+        return None
+
+    return time(hour, minute)
+
+def _extract(pattern, text: str) -> Tuple[Optional[re.Match], str]:
+    """Find pattern in text and return the match and the text without it"""
+    match = pattern.search(text)
+    if not match:
+        return None, text
+    return match, (text[:match.start()] + " " + text[match.end():])
+
+def _extract_times(text: str) -> Tuple[Optional[time], Optional[time], str, bool]:
+    """
+    Pull a time or time range out of the text
+
+    Returns:
+        Tuple containing (start, end, remaining text, ok) where ok is False if a
+        time was present but couldn't be read unambiguously
+    """
+    match, rest = _extract(TIME_RANGE_PATTERN, text)
+    if match:
+        start_text, end_text = match.group("start"), match.group("end")
+        # "2-3pm": the end's am/pm applies to the start too
+        meridiem = re.search(r"(am|pm|a\.m\.|p\.m\.)\s*$", end_text, re.IGNORECASE)
+        if meridiem and not re.search(r"[ap]\.?m\.?|noon", start_text, re.IGNORECASE):
+            start_text += meridiem.group(1)
+        start, end = _parse_clock(start_text), _parse_clock(end_text)
+        if start is None or end is None:
+            return None, None, text, False
+        if end <= start:
+            # "11-1" means 11am to 1pm
+            if start.hour < 12 and end.hour + 12 < 24 and time(end.hour + 12, end.minute) > start:
+                end = time(end.hour + 12, end.minute)
+            else:
+                return None, None, text, False
+        return start, end, rest, True
+
+    match, rest = _extract(TIME_PATTERN, text)
+    if not match:
+        match, rest = _extract(AT_HOUR_PATTERN, text)
+    if match:
+        start = _parse_clock(match.group("time"))
+        if start is None:
+            return None, None, text, False
+        return start, None, rest, True
+
+    return None, None, text, True
+
+def _next_weekday(today: date, weekday: int) -> date:
+    """The next date falling on weekday (a week ahead if that's today)"""
+    days_ahead = (weekday - today.weekday()) % 7
+    return today + timedelta(days=days_ahead or 7)
+
+def _extract_date(text: str, now: datetime) -> Tuple[Optional[date], str, bool]:
+    """
+    Pull a date out of the text
+
+    Returns:
+        Tuple containing (date, remaining text, ok) where ok is False if a
+        date-like phrase was present but is ambiguous
+    """
+    if AMBIGUOUS_DATE_PATTERN.search(text):
+        return None, text, False
+
+    today = now.date()
+
+    match, rest = _extract(RELATIVE_DATE_PATTERN, text)
+    if match:
+        day = match.group("day").lower()
+        offset = {"today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1, "day after tomorrow": 2}[day]
+        return today + timedelta(days=offset), rest, True
+
+    match, rest = _extract(WEEKDAY_PATTERN, text)
+    if match:
+        weekday = WEEKDAYS[match.group("weekday").lower()]
+        if match.group("this") and weekday == today.weekday():
+            return today, rest, True
+        return _next_weekday(today, weekday), rest, True
+
+    for pattern in (MONTH_DATE_PATTERN, NUMERIC_DATE_PATTERN):
+        match, rest = _extract(pattern, text)
+        if match:
+            try:
+                parsed = parse_datetime(match.group("date"), default=datetime(today.year, 1, 1)).date()
+            except (ValueError, OverflowError):
+                return None, text, False
+            # A date without a year that has already passed means next year
+            if parsed < today and not re.search(r"\d{4}", match.group("date")):
+                parsed = parsed.replace(year=parsed.year + 1)
+            return parsed, rest, True
+
+    return None, text, True
+
+def _clean_title(text: str) -> str:
+    """Tidy the text left after removing dates and times"""
+    text = re.sub(r"\s+", " ", text).strip(" ,.!-:")
+    # Drop connecting words stranded at the edges ("call mom at", "on")
+    text = re.sub(r"(?:\s+(?:at|on|by|from|for|due|starting))+$", "", text, flags=re.IGNORECASE)
+    text = re.sub(r"^(?:(?:a|an|my|the|to)\s+)+", "", text, flags=re.IGNORECASE)
+    text = text.strip(" ,.!-:")
+    return text[:1].upper() + text[1:]
+
+def parse_quick_intent(message: str, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Try to turn a simple scheduling message into a todo or event without the LLM
+
+    Args:
+        message: The user's message
+        now: Reference time for relative dates (defaults to the current local time)
+
+    Returns:
+        A generated item ({"type": "todo" | "event", "data": ...}) in the format
+        create_todo_from_text/create_event_from_text expect, or None when the
+        message isn't a simple, unambiguous request
+    """
+    now = now or datetime.now()
+    text = " ".join(message.split())
+
+    if not text or len(text) > MAX_MESSAGE_LENGTH or COMPOUND_PATTERN.search(text.rstrip(".!")):
+        return None
+    if NON_CREATE_PATTERN.match(text):
+        return None
+
+    todo_match = TODO_PATTERN.match(text)
+    event_match = None if todo_match else EVENT_PREFIX_PATTERN.match(text)
+    body = (todo_match or event_match).group("title") if (todo_match or event_match) else text
+    if NON_TASK_PATTERN.match(body) or NON_CREATE_PATTERN.match(body):
+        return None
+
+    high_priority = bool(HIGH_PRIORITY_PATTERN.search(body))
+    body = HIGH_PRIORITY_PATTERN.sub(" ", body)
+
+    start, end, body, times_ok = _extract_times(body)
+    day, body, date_ok = _extract_date(body, now)
+    if not (times_ok and date_ok):
+        return None
+    
+    # Only one date and time are supported; a second one (or a duration or a
+    # follow-on clause) means the message is only partly understood
+    if (TIME_PATTERN.search(body) or AT_HOUR_PATTERN.search(body) or TIME_RANGE_PATTERN.search(body)
+            or UNHANDLED_PATTERN.search(body) or LEFTOVER_DATE_PATTERN.search(body)
+            or (day and _extract_date(body, now)[0])):
+        return None
+
+    if todo_match:
+        title = _clean_title(body)
+        if not title or len(title) > MAX_TITLE_LENGTH or end is not None:
+            return None
+        if day is None and start is None and SOFT_TODO_PREFIX_PATTERN.match(todo_match.group("prefix")):
+            return None
+
+        data = {"title": title, "priority": "high" if high_priority else "low"}
+        if day and start:
+            data["deadline"] = datetime.combine(day, start).isoformat()
+        elif day:
+            data["deadline"] = day.isoformat()
+        elif start:
+            # A time on its own means today (or tomorrow if it has passed)
+            deadline = datetime.combine(now.date(), start)
+            data["deadline"] = (deadline if deadline > now else deadline + timedelta(days=1)).isoformat()
+        return {"type": "todo", "data": data}
+
+    # Events need an explicit time and either a "schedule ..." prefix or an event word
+    if start is None or not (event_match or EVENT_KEYWORDS.search(body)):
+        return None
+
+    location = None
+    location_match = LOCATION_PATTERN.search(body)
+    if location_match:
+        location = location_match.group("location")
+        body = body[:location_match.start()]
+
+    title = _clean_title(body)
+    if not title or len(title) > MAX_TITLE_LENGTH:
+        return None
+
+    if day is None:
+        # A time on its own means today, unless it has already passed
+        start_time = datetime.combine(now.date(), start)
+        if start_time <= now:
+            return None
+    else:
+        start_time = datetime.combine(day, start)
+    end_time = datetime.combine(start_time.date(), end) if end else start_time + timedelta(hours=1)
+
+    data = {
+        "title": title,
+        "start_time": start_time.isoformat(),
+        "end_time": end_time.isoformat(),
+        "is_all_day": False
+    }
+    if location:
+        data["location"] = location
+    return {"type": "event", "data": data}
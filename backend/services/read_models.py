@@ -0,0 +1,142 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import select, literal, null, cast, Integer, String, Boolean
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.calendar import Event, Tag, Reminder, event_tag
+from models.archive import ArchivedEvent, archived_event_tag
+from models.todo import TodoItem, TodoReminder, PriorityLevel
+
+# Read models for the list endpoints. Loading ORM instances costs an identity
+# map entry, change tracking state and a Python object per relationship for
+# every row, only to serialize it once. These endpoints instead select the
+# columns they return into slotted dataclasses (same attribute names as the
+# models, so the response serializers accept both) and attach tags and
+# reminders from one extra query.
+
+@dataclass(slots=True)
+class TagRow:
+    id: int
+    name: str
+    color: str
+
+@dataclass(slots=True)
+class ReminderRow:
+    id: int
+    minutes_before: int
+    is_sent: bool
+
+@dataclass(slots=True)
+class EventRow:
+    id: int
+    title: str
+    description: Optional[str]
+    start_time: datetime
+    end_time: datetime
+    location: Optional[str]
+    is_all_day: bool
+    ics_uid: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    tags: List[TagRow] = field(default_factory=list)
+    reminders: List[ReminderRow] = field(default_factory=list)
+
+@dataclass(slots=True)
+class TodoItemRow:
+    id: int
+    title: str
+    description: Optional[str]
+    deadline: Optional[datetime]
+    is_completed: bool
+    priority: PriorityLevel
+    created_at: datetime
+    updated_at: datetime
+    reminders: List[ReminderRow] = field(default_factory=list)
+
+EVENT_COLUMNS = ("id", "title", "description", "start_time", "end_time", "location",
+                 "is_all_day", "ics_uid", "created_at", "updated_at")
+TODO_ITEM_COLUMNS = ("id", "title", "description", "deadline", "is_completed", "priority",
+                     "created_at", "updated_at")
+
+async def fetch_events(db: AsyncSession, *criteria, order_by=()) -> List[EventRow]:
+    """
+    Events matching criteria (expressions on Event) as EventRows
+
+    Tags and reminders come from a single UNION ALL query. It selects the
+    events again by id subquery instead of binding their ids, so ranges of
+    any size stay within the database's parameter limit.
+    """
+    result = await db.execute(
+        select(*[getattr(Event, name) for name in EVENT_COLUMNS]).where(*criteria).order_by(*order_by)
+    )
+    events = [EventRow(*row) for row in result]
+    if not events:
+        return events
+
+    # correlate(None): a tag filter in criteria uses event_tag, which the
+    # outer tag query selects from too
+    event_ids = select(Event.id).where(*criteria).correlate(None).scalar_subquery()
+    reminders = select(
+        Reminder.event_id.label("event_id"),
+        literal("reminder", String).label("kind"),
+        Reminder.id.label("id"),
+        Reminder.minutes_before.label("minutes_before"),
+        Reminder.is_sent.label("is_sent"),
+        cast(null(), String).label("name"),
+        cast(null(), String).label("color")
+    ).where(Reminder.event_id.in_(event_ids))
+    tags = select(
+        event_tag.c.event_id,
+        literal("tag", String),
+        Tag.id,
+        cast(null(), Integer),
+        cast(null(), Boolean),
+        Tag.name,
+        Tag.color
+    ).join(Tag, Tag.id == event_tag.c.tag_id).where(event_tag.c.event_id.in_(event_ids))
+
+    by_id: Dict[int, EventRow] = {event.id: event for event in events}
+    for event_id, kind, item_id, minutes_before, is_sent, name, color in await db.execute(reminders.union_all(tags)):
+        if kind == "tag":
+            by_id[event_id].tags.append(TagRow(item_id, name, color))
+        else:
+            by_id[event_id].reminders.append(ReminderRow(item_id, minutes_before, bool(is_sent)))
+    return events
+
+async def fetch_archived_events(db: AsyncSession, *criteria) -> List[EventRow]:
+    """Archived events matching criteria (expressions on ArchivedEvent), with their tags"""
+    result = await db.execute(
+        select(*[getattr(ArchivedEvent, name) for name in EVENT_COLUMNS]).where(*criteria)
+    )
+    events = [EventRow(*row) for row in result]
+    if not events:
+        return events
+
+    by_id: Dict[int, EventRow] = {event.id: event for event in events}
+    result = await db.execute(
+        select(archived_event_tag.c.event_id, Tag.id, Tag.name, Tag.color)
+        .join(Tag, Tag.id == archived_event_tag.c.tag_id)
+        .where(archived_event_tag.c.event_id.in_(select(ArchivedEvent.id).where(*criteria).correlate(None).scalar_subquery()))
+    )
+    for event_id, tag_id, name, color in result:
+        by_id[event_id].tags.append(TagRow(tag_id, name, color))
+    return events
+
+async def fetch_todo_items(db: AsyncSession, *criteria, order_by=()) -> List[TodoItemRow]:
+    """Todo items matching criteria (expressions on TodoItem) as TodoItemRows, with their reminders"""
+    result = await db.execute(
+        select(*[getattr(TodoItem, name) for name in TODO_ITEM_COLUMNS]).where(*criteria).order_by(*order_by)
+    )
+    items = [TodoItemRow(*row) for row in result]
+    if not items:
+        return items
+
+    by_id: Dict[int, TodoItemRow] = {item.id: item for item in items}
+    result = await db.execute(
+        select(TodoReminder.todo_item_id, TodoReminder.id, TodoReminder.minutes_before, TodoReminder.is_sent)
+        .where(TodoReminder.todo_item_id.in_(select(TodoItem.id).where(*criteria).correlate(None).scalar_subquery()))
+    )
+    for todo_item_id, reminder_id, minutes_before, is_sent in result:
+        by_id[todo_item_id].reminders.append(ReminderRow(reminder_id, minutes_before, is_sent))
+    return items
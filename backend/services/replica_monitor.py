@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import select, update
+
+from utils.config import settings
+from utils.database import AsyncSessionLocal, replica_set
+from models.replication import ReplicationHeartbeat
+
+HEARTBEAT_ID = 1
+
+async def write_heartbeat() -> None:
+    """Refresh the heartbeat row on the primary"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(ReplicationHeartbeat).where(ReplicationHeartbeat.id == HEARTBEAT_ID).values(written_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.add(ReplicationHeartbeat(id=HEARTBEAT_ID, written_at=datetime.utcnow()))
+        await db.commit()
+
+async def measure_lag(engine) -> Optional[float]:
+    """
+    Seconds since the heartbeat seen by a replica was written on the primary
+
+    This includes up to DB_REPLICA_CHECK_SECONDS of heartbeat age, so
+    DB_REPLICA_MAX_LAG_SECONDS should be well above the check interval.
+    """
+    async with engine.connect() as connection:
+        result = await connection.execute(
+            select(ReplicationHeartbeat.written_at).where(ReplicationHeartbeat.id == HEARTBEAT_ID)
+        )
+        written_at = result.scalar()
+    if written_at is None:
+        return None
+    return max(0.0, (datetime.utcnow() - written_at).total_seconds())
+
+async def check_replicas() -> None:
+    """Write the heartbeat, then record how far behind each replica is"""
+    await write_heartbeat()
+    for index, engine in enumerate(replica_set.engines):
+        try:
+            lag = await measure_lag(engine)
+        except Exception as e:
+            print(f"Error checking read replica {index}: {str(e)}")
+            lag = None
+        replica_set.record_lag(index, lag)
+
+async def monitor_replicas() -> None:
+    """Check replica lag every DB_REPLICA_CHECK_SECONDS"""
+    while True:
+        try:
+            await check_replicas()
+        except Exception as e:
+            print(f"Error in replica monitor: {str(e)}")
+        await asyncio.sleep(settings.DB_REPLICA_CHECK_SECONDS)
+
+def start_replica_monitor() -> Optional[asyncio.Task]:
+    """Start monitoring replica lag if read replicas are configured"""
+    if not replica_set.engines:
+        return None
+    print(f"Routing GET requests to {len(replica_set.engines)} read replica(s)")
+    return asyncio.create_task(monitor_replicas())
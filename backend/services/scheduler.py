@@ -1,25 +1,94 @@
 import schedule
 import time
 import threading
+import atexit
+import functools
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 
 from utils.database import SessionLocal
 from utils.config import settings
+from utils.metrics import scheduler_job_duration, scheduler_job_lag, scheduler_job_errors
 from models.calendar import Event, Reminder
 from models.todo import TodoItem, TodoReminder
 from models.user import User
+from services.conversation_store import conversation_store
+from services.archive_service import archive_cold_rows
+from services.worker_coordination import (
+    generate_worker_id, send_heartbeat, remove_worker, get_shard, acquire_lease, release_lease, claim_summary
+)
+
+# Identity of this process among all scheduler workers
+WORKER_ID = generate_worker_id()
+
+# Lease that elects the single worker allowed to send daily summaries
+SUMMARY_LEASE_NAME = "daily-summaries"
+
+# Lease for the conversation history cleanup job
+CONVERSATION_PURGE_LEASE_NAME = "conversation-purge"
+
+# Lease for the job moving old events and todos to the archive tables
+ARCHIVE_LEASE_NAME = "archive"
+
+def timed_job(job):
+    """Record a job's run time and failures in the scheduler metrics"""
+    @functools.wraps(job)
+    def run():
+        start = time.perf_counter()
+        try:
+            return job()
+        except Exception:
+            scheduler_job_errors.inc(job.__name__)
+            raise
+        finally:
+            scheduler_job_duration.observe(time.perf_counter() - start, job.__name__)
+    return run
+
+def record_job_lag():
+    """Record how late each job that is about to run is (long jobs delay the ones after them)"""
+    now = datetime.now()
+    for job in schedule.jobs:
+        if job.should_run:
+            scheduler_job_lag.observe((now - job.next_run).total_seconds(), job.job_func.__name__)
+
+def heartbeat():
+    """Refresh this worker's heartbeat so it keeps its reminder shard"""
+    db = SessionLocal()
+    try:
+        send_heartbeat(WORKER_ID, db)
+    finally:
+        db.close()
+
+def claim_reminder(model, reminder_id: int, db: Session) -> bool:
+    """
+    Atomically mark a reminder as sent
+
+    Only the worker whose UPDATE flips is_sent gets True, so a reminder fires
+    exactly once even if shards overlap while workers join or leave.
+    """
+    claimed = db.query(model).filter(
+        model.id == reminder_id,
+        model.is_sent == False
+    ).update({model.is_sent: True}, synchronize_session=False)
+    db.commit()
+    return claimed == 1
 
 def check_event_reminders():
     """Check for event reminders that need to be sent"""
     db = SessionLocal()
     try:
+        # Only look at the reminders in this worker's shard
+        shard_index, shard_count = get_shard(WORKER_ID, db, settings.SCHEDULER_WORKER_TTL_SECONDS)
+        if shard_count == 0:
+            return
+        
         # Get current time
         now = datetime.utcnow()
         
         # Find unsent reminders where the event start time minus reminder minutes is within the next minute
         reminders = db.query(Reminder).filter(
-            Reminder.is_sent == False
+            Reminder.is_sent == False,
+            Reminder.id % shard_count == shard_index
         ).join(Event).filter(
             Event.start_time > now,  # Event hasn't started yet
             Event.start_time <= now + timedelta(minutes=5)  # Event is within the next 5 minutes (batch check)
@@ -30,12 +99,10 @@ def check_event_reminders():
             reminder_time = event.start_time - timedelta(minutes=reminder.minutes_before)
             
             # If it's time to send the reminder
-            if reminder_time <= now:
+            if reminder_time <= now and claim_reminder(Reminder, reminder.id, db):
                 # Here we would integrate with a notification service
-                # For now, just mark as sent
+                # For now, just log it
                 print(f"Sending reminder for event: {event.title} - starts at {event.start_time}")
-                reminder.is_sent = True
-                db.commit()
         
     finally:
         db.close()
@@ -44,12 +111,18 @@ def check_todo_reminders():
     """Check for todo reminders that need to be sent"""
     db = SessionLocal()
     try:
+        # Only look at the reminders in this worker's shard
+        shard_index, shard_count = get_shard(WORKER_ID, db, settings.SCHEDULER_WORKER_TTL_SECONDS)
+        if shard_count == 0:
+            return
+        
         # Get current time
         now = datetime.utcnow()
         
         # Find unsent reminders where the todo deadline minus reminder minutes is within the next minute
         reminders = db.query(TodoReminder).filter(
-            TodoReminder.is_sent == False
+            TodoReminder.is_sent == False,
+            TodoReminder.id % shard_count == shard_index
         ).join(TodoItem).filter(
             TodoItem.deadline > now,  # Todo hasn't passed deadline yet
             TodoItem.deadline <= now + timedelta(minutes=5),  # Todo is due within the next 5 minutes (batch check)
@@ -61,12 +134,10 @@ def check_todo_reminders():
             reminder_time = todo.deadline - timedelta(minutes=reminder.minutes_before)
             
             # If it's time to send the reminder
-            if reminder_time <= now:
+            if reminder_time <= now and claim_reminder(TodoReminder, reminder.id, db):
                 # Here we would integrate with a notification service
-                # For now, just mark as sent
+                # For now, just log it
                 print(f"Sending reminder for todo: {todo.title} - due at {todo.deadline}")
-                reminder.is_sent = True
-                db.commit()
         
     finally:
         db.close()
@@ -75,6 +146,11 @@ def send_daily_summaries():
     """Send daily executive summaries to users"""
     db = SessionLocal()
     try:
+        # Only the lease holder sends summaries; claim_summary guards against
+        # a second send when the lease changes hands within the same minute
+        if not acquire_lease(SUMMARY_LEASE_NAME, WORKER_ID, db, settings.SCHEDULER_LEASE_TTL_SECONDS):
+            return
+        
         # Get current time
         now = datetime.utcnow()
         current_hour = now.hour
@@ -90,8 +166,9 @@ def send_daily_summaries():
                 summary_hour = int(summary_time[0])
                 summary_minute = int(summary_time[1] if len(summary_time) > 1 else "0")
                 
-                # If it's time to send the summary
-                if summary_hour == current_hour and summary_minute == current_minute:
+                # If it's time to send the summary (and no worker sent it today yet)
+                if (summary_hour == current_hour and summary_minute == current_minute
+                        and claim_summary(user.id, now.date(), db)):
                     # Here we would generate and send the summary
                     print(f"Sending daily summary to user: {user.username}")
                     # In a real implementation, this would call the summary service
@@ -102,21 +179,75 @@ def send_daily_summaries():
     finally:
         db.close()
 
+def purge_idle_conversations():
+    """Delete chat histories that have been idle past the retention period"""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(CONVERSATION_PURGE_LEASE_NAME, WORKER_ID, db, settings.SCHEDULER_LEASE_TTL_SECONDS):
+            return
+        
+        deleted = conversation_store.purge_idle(db, settings.CONVERSATION_RETENTION_HOURS)
+        if deleted:
+            print(f"Purged {deleted} idle conversation messages")
+    finally:
+        db.close()
+
+def archive_old_rows():
+    """Move old events and long-completed todos out of the live tables"""
+    db = SessionLocal()
+    try:
+        if not acquire_lease(ARCHIVE_LEASE_NAME, WORKER_ID, db, settings.SCHEDULER_LEASE_TTL_SECONDS):
+            return
+        
+        archived = archive_cold_rows(
+            db,
+            settings.ARCHIVE_EVENTS_AFTER_DAYS,
+            settings.ARCHIVE_TODOS_AFTER_DAYS,
+            settings.ARCHIVE_BATCH_SIZE
+        )
+        if archived["events"] or archived["todo_items"]:
+            print(f"Archived {archived['events']} events and {archived['todo_items']} todo items")
+    except Exception as e:
+        # Batches already committed stay archived; the rest is retried next time
+        db.rollback()
+        print(f"Error archiving old rows: {str(e)}")
+    finally:
+        db.close()
+
+def shutdown_worker():
+    """Leave the worker pool so the remaining workers pick up our shard"""
+    db = SessionLocal()
+    try:
+        release_lease(SUMMARY_LEASE_NAME, WORKER_ID, db)
+        release_lease(CONVERSATION_PURGE_LEASE_NAME, WORKER_ID, db)
+        release_lease(ARCHIVE_LEASE_NAME, WORKER_ID, db)
+        remove_worker(WORKER_ID, db)
+    finally:
+        db.close()
+
 def scheduler_thread():
     """Thread function for running the scheduler"""
+    # Join the worker pool before the first reminder check
+    heartbeat()
+    
     # Schedule periodic checks
-    schedule.every(1).minutes.do(check_event_reminders)
-    schedule.every(1).minutes.do(check_todo_reminders)
-    schedule.every(1).minutes.do(send_daily_summaries)
+    schedule.every(settings.SCHEDULER_HEARTBEAT_SECONDS).seconds.do(timed_job(heartbeat))
+    schedule.every(1).minutes.do(timed_job(check_event_reminders))
+    schedule.every(1).minutes.do(timed_job(check_todo_reminders))
+    schedule.every(1).minutes.do(timed_job(send_daily_summaries))
+    schedule.every(1).hours.do(timed_job(purge_idle_conversations))
+    schedule.every(settings.ARCHIVE_INTERVAL_HOURS).hours.do(timed_job(archive_old_rows))
     
     # Run the schedule
     while True:
+        record_job_lag()
         schedule.run_pending()
         time.sleep(1)
 
 def start_scheduler():
     """Start the scheduler in a separate thread"""
-    thread = threading.Thread(target=scheduler_thread)
+    thread = threading.Thread(target=scheduler_thread, name="scheduler")
     thread.daemon = True  # Thread will exit when the main program exits
     thread.start()
-    print("Scheduler started") 
\ No newline at end of file
+    atexit.register(shutdown_worker)
+    print(f"Scheduler started (worker {WORKER_ID})") 
\ No newline at end of file
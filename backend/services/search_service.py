@@ -0,0 +1,166 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import select, text
+
+from utils.database import async_engine
+from models.calendar import Event
+from models.todo import TodoItem
+
+# Characters of context shown around the first match
+SNIPPET_LENGTH = 120
+
+# On SQLite, title matches come first, then matches in the description or
+# location, newest first within each group. Unlike bm25, this doesn't have
+# to score every match before returning the first page, so it stays fast for
+# common words. Each group is one query that stops after the page.
+SQLITE_SEARCH_QUERY = text("""
+    SELECT rowid FROM search_index
+    WHERE search_index MATCH :match
+    ORDER BY rowid DESC
+    LIMIT :limit OFFSET :offset
+""")
+
+SQLITE_COUNT_QUERY = text("SELECT count(*) FROM search_index WHERE search_index MATCH :match")
+
+POSTGRES_SEARCH_QUERY = text("""
+    WITH query AS (SELECT to_tsquery('simple', :match) AS q)
+    SELECT 'event' AS kind, events.id, ts_rank_cd(events.search_vector, query.q) AS rank
+    FROM events, query
+    WHERE events.user_id = :user_id AND events.search_vector @@ query.q
+    UNION ALL
+    SELECT 'todo' AS kind, todo_items.id, ts_rank_cd(todo_items.search_vector, query.q) AS rank
+    FROM todo_items, query
+    WHERE todo_items.user_id = :user_id AND todo_items.search_vector @@ query.q
+    ORDER BY rank DESC, kind, id
+    LIMIT :limit OFFSET :offset
+""")
+
+def tokenize_query(query: str) -> List[str]:
+    """
+    Split a search query into lowercase words
+
+    Only word characters are kept, so user input can't inject FTS5 or
+    tsquery syntax.
+    """
+    return [token.lower() for token in re.findall(r"\w+", query)]
+
+def build_terms(tokens: List[str], quote: str, prefix: str, separator: str) -> str:
+    # The last word is matched as a prefix, so results follow the user's typing
+    terms = [f"{quote}{token}{quote}" for token in tokens[:-1]] + [f"{quote}{tokens[-1]}{quote}{prefix}"]
+    return separator.join(terms)
+
+def build_sqlite_matches(tokens: List[str], user_id: int) -> Tuple[str, str]:
+    """MATCH expressions for this user's rows with every word in the title, and in the other columns only"""
+    terms = build_terms(tokens, '"', "*", " AND ")
+    owner = f'owner : "u{user_id}"'
+    title_match = f"{owner} AND {{title}} : ({terms})"
+    other_match = f"{owner} AND {{title description location}} : ({terms}) NOT {{title}} : ({terms})"
+    return title_match, other_match
+
+def build_postgres_match(tokens: List[str]) -> str:
+    return build_terms(tokens, "", ":*", " & ")
+
+def make_snippet(value: Optional[str], tokens: List[str]) -> Optional[str]:
+    """Cut SNIPPET_LENGTH characters of value around the first matching word"""
+    if not value:
+        return None
+    lowered = value.lower()
+    positions = [position for position in (lowered.find(token) for token in tokens) if position >= 0]
+    start = max(0, min(positions) - SNIPPET_LENGTH // 4) if positions else 0
+    snippet = value[start:start + SNIPPET_LENGTH]
+    if start > 0:
+        snippet = "…" + snippet
+    if start + SNIPPET_LENGTH < len(value):
+        snippet += "…"
+    return snippet
+
+async def find_matches(db, tokens: List[str], user_id: int, limit: int, offset: int) -> List[Tuple[str, int, float]]:
+    """Ranked (kind, id, rank) of one page of matches, best first (rank is higher for better matches)"""
+    if async_engine.dialect.name == "postgresql":
+        rows = await db.execute(POSTGRES_SEARCH_QUERY, {
+            "match": build_postgres_match(tokens), "user_id": user_id, "limit": limit, "offset": offset
+        })
+        return [(row.kind, row.id, float(row.rank)) for row in rows]
+    
+    title_match, other_match = build_sqlite_matches(tokens, user_id)
+    title_rowids = (await db.execute(SQLITE_SEARCH_QUERY, {
+        "match": title_match, "limit": limit, "offset": offset
+    })).scalars().all()
+    other_rowids = []
+    if len(title_rowids) < limit:
+        # The page continues into the second group, after all title matches
+        if title_rowids or offset == 0:
+            title_total = offset + len(title_rowids)
+        else:
+            title_total = (await db.execute(SQLITE_COUNT_QUERY, {"match": title_match})).scalar()
+        other_rowids = (await db.execute(SQLITE_SEARCH_QUERY, {
+            "match": other_match, "limit": limit - len(title_rowids), "offset": max(0, offset - title_total)
+        })).scalars().all()
+    
+    # Even rowids are events, odd ones todo items (see models/search.py)
+    return [
+        ("event" if rowid % 2 == 0 else "todo", rowid // 2, rank)
+        for rowids, rank in ((title_rowids, 1.0), (other_rowids, 0.5))
+        for rowid in rowids
+    ]
+
+async def search_items(db, query: str, user_id: int, limit: int, offset: int) -> Dict[str, Any]:
+    """
+    Search the user's events and todo items
+
+    Args:
+        db: Async database session
+        query: Words to look for (the last one matches as a prefix)
+        user_id: The ID of the user
+        limit: Results per page
+        offset: Results to skip
+
+    Returns:
+        The page of results, best match first, and whether more follow
+    """
+    tokens = tokenize_query(query)
+    if not tokens:
+        return {"results": [], "has_more": False}
+    
+    # One extra row tells whether there is a next page
+    matches = await find_matches(db, tokens, user_id, limit + 1, offset)
+    has_more = len(matches) > limit
+    matches = matches[:limit]
+    
+    event_ids = [item_id for kind, item_id, _ in matches if kind == "event"]
+    todo_ids = [item_id for kind, item_id, _ in matches if kind == "todo"]
+    events = {}
+    todo_items = {}
+    if event_ids:
+        result = await db.execute(select(Event).where(Event.id.in_(event_ids)))
+        events = {event.id: event for event in result.scalars()}
+    if todo_ids:
+        result = await db.execute(select(TodoItem).where(TodoItem.id.in_(todo_ids)))
+        todo_items = {item.id: item for item in result.scalars()}
+    
+    results = []
+    for kind, item_id, rank in matches:
+        if kind == "event" and item_id in events:
+            event = events[item_id]
+            results.append({
+                "type": "event",
+                "id": event.id,
+                "title": event.title,
+                "snippet": make_snippet(event.description or event.location, tokens),
+                "start_time": event.start_time,
+                "end_time": event.end_time,
+                "rank": rank
+            })
+        elif kind == "todo" and item_id in todo_items:
+            item = todo_items[item_id]
+            results.append({
+                "type": "todo",
+                "id": item.id,
+                "title": item.title,
+                "snippet": make_snippet(item.description, tokens),
+                "deadline": item.deadline,
+                "is_completed": item.is_completed,
+                "rank": rank
+            })
+    
+    return {"results": results, "has_more": has_more}
@@ -1,20 +1,19 @@
 from datetime import datetime
 from typing import Dict, Any
-import dateutil.parser
 
+from utils.dates import parse_datetime
 from models.todo import TodoItem, TodoReminder, PriorityLevel
 
-def create_todo_from_text(todo_data: Dict[str, Any], user_id: int, db) -> TodoItem:
+def build_todo_from_text(todo_data: Dict[str, Any], user_id: int) -> TodoItem:
     """
-    Create a todo item from structured data extracted from text
+    Build an unsaved todo item (with its default reminder) from structured data
     
     Args:
         todo_data: Dictionary containing todo item data
         user_id: The ID of the user
-        db: Database session
         
     Returns:
-        The created TodoItem
+        The new TodoItem, not yet added to a session
     """
     # Extract fields from data
     title = todo_data.get("title", "Untitled Todo")
@@ -24,7 +23,7 @@ def create_todo_from_text(todo_data: Dict[str, Any], user_id: int, db) -> TodoIt
     deadline = None
     if todo_data.get("deadline"):
         try:
-            deadline = dateutil.parser.parse(todo_data["deadline"])
+            deadline = parse_datetime(todo_data["deadline"])
         except:
             # If parsing fails, leave as None
             pass
@@ -48,20 +47,33 @@ def create_todo_from_text(todo_data: Dict[str, Any], user_id: int, db) -> TodoIt
         event_id=event_id
     )
     
+    # Add a default reminder if there's a deadline
+    if deadline:
+        todo_item.reminders.append(TodoReminder(
+            minutes_before=60  # Default to 1 hour before
+        ))
+    
     # Log the creation
     print(f"Creating todo item: {title} with deadline: {deadline}, priority: {priority_str}")
     
+    return todo_item
+
+def create_todo_from_text(todo_data: Dict[str, Any], user_id: int, db) -> TodoItem:
+    """
+    Create a todo item from structured data extracted from text
+    
+    Args:
+        todo_data: Dictionary containing todo item data
+        user_id: The ID of the user
+        db: Database session
+        
+    Returns:
+        The created TodoItem
+    """
+    todo_item = build_todo_from_text(todo_data, user_id)
+    
     db.add(todo_item)
     db.commit()
     db.refresh(todo_item)
     
-    # Add a default reminder if there's a deadline
-    if deadline:
-        reminder = TodoReminder(
-            minutes_before=60,  # Default to 1 hour before
-            todo_item_id=todo_item.id
-        )
-        db.add(reminder)
-        db.commit()
-    
     return todo_item 
\ No newline at end of file
@@ -1,17 +1,394 @@
 import json
-import together
-from typing import Tuple, List, Dict, Any, Optional
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Tuple, List, Dict, Any, Optional, AsyncIterator
 from datetime import datetime, timedelta
 
 from utils.config import settings
+from utils.dates import parse_datetime
+from services.llm_client import create_chat_completion, stream_chat_completion, LLMUnavailableError
+from services.chat_context import assemble_context, estimate_tokens
 
 MODEL_NAME = "meta-llama/Llama-3.3-70B-Instruct-Turbo"
 
+# System message with instructions
+SYSTEM_MESSAGE = """
+You are an AI assistant for Polaris Calendar, a calendar and todo app. 
+Your job is to help users manage their schedule and tasks.
+
+If the user's message contains information about:
+1. A task or todo item - Extract it and format it as a todo item
+2. An event or meeting - Extract it and format it as a calendar event
+
+Remember previous messages in the conversation when responding.
+Respond conversationally and be helpful.
+When you extract an item, also include a short, natural acknowledgement in the same reply.
+"""
+
+# Tools for function calling
+TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "extract_todo_item",
+            "description": "Extract a todo item from the user message",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string", "description": "The title of the todo item"},
+                    "description": {"type": "string", "description": "Optional description"},
+                    "deadline": {"type": "string", "description": "The deadline in ISO format (YYYY-MM-DD)"},
+                    "priority": {"type": "string", "enum": ["high", "low"], "description": "Priority level"}
+                },
+                "required": ["title"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "extract_calendar_event",
+            "description": "Extract a calendar event from the user message",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string", "description": "The title of the event"},
+                    "description": {"type": "string", "description": "Optional description"},
+                    "start_time": {"type": "string", "description": "The start time in ISO format (YYYY-MM-DDTHH:MM:SS)"},
+                    "end_time": {"type": "string", "description": "The end time in ISO format (YYYY-MM-DDTHH:MM:SS)"},
+                    "location": {"type": "string", "description": "Optional location"},
+                    "is_all_day": {"type": "boolean", "description": "Whether this is an all-day event"}
+                },
+                "required": ["title", "start_time"]
+            }
+        }
+    }
+]
+
+# Prompt space taken by the tool schemas
+TOOLS_TOKENS = estimate_tokens(json.dumps(TOOLS))
+
+# Item type produced by each tool
+TOOL_ITEM_TYPES = {
+    "extract_todo_item": "todo",
+    "extract_calendar_event": "event"
+}
+
+# How to phrase the reply when the model extracts an item:
+# - "followup": ask the model again for an acknowledgement (one extra completion)
+# - "inline": use the text the model returned alongside the tool call, falling back to the template
+# - "template": build the reply locally from the extracted fields
+ACK_MODES = ("followup", "inline", "template")
+
+class CompletionCache:
+    """
+    Cache of chat completions keyed by model, normalized messages and tool schema
+    
+    Keys also include a scope: the user and the local date (see cache_scope).
+    A completion can contain tool calls with absolute dates resolved from
+    "tomorrow" or "next Friday", which must not be replayed on another day or
+    for another user. Entries expire after ttl_seconds and the least recently used are evicted
+    beyond max_entries. Concurrent identical requests share one upstream call,
+    which is only cancelled once every caller waiting on it has gone away.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (expiry time, completion)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # key -> (upstream task, set of waiting caller ids)
+        self._inflight: Dict[str, Tuple[asyncio.Future, set]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    @staticmethod
+    def make_key(payload: Dict[str, Any], scope: str = "") -> str:
+        """
+        Hash a completion request, ignoring whitespace differences in messages
+        
+        Case is kept: tool call arguments (item titles) are copied from the
+        message, so "call bob" and "Call Bob" need their own completions.
+        """
+        normalized = dict(payload)
+        normalized["messages"] = [
+            {**message, "content": " ".join((message.get("content") or "").split())}
+            for message in payload.get("messages", [])
+        ]
+        normalized["scope"] = scope
+        encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+    
+    def _store(self, key: str, task: asyncio.Future):
+        """Done callback of an upstream call: cache successful completions"""
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, task.result())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def get_or_create(self, payload: Dict[str, Any], create, scope: str = "") -> Dict[str, Any]:
+        """
+        Return a cached completion for payload, or call create(**payload) once for all concurrent callers
+        
+        Args:
+            payload: Request body fields for the completion
+            create: Coroutine function making the upstream call
+            scope: Only completions cached with the same scope are reused
+            
+        Returns:
+            The completion
+        """
+        key = self.make_key(payload, scope)
+        
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+        
+        if key in self._inflight:
+            self.coalesced += 1
+            task, waiters = self._inflight[key]
+        else:
+            self.misses += 1
+            task, waiters = asyncio.ensure_future(create(**payload)), set()
+            self._inflight[key] = (task, waiters)
+            task.add_done_callback(lambda done: self._store(key, done))
+        
+        waiter = object()
+        waiters.add(waiter)
+        try:
+            # Shield so one caller disconnecting doesn't cancel the call for the others
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not (waiters - {waiter}):
+                task.cancel()
+            raise
+        finally:
+            waiters.discard(waiter)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate statistics since startup"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight)
+        }
+
+# Shared completion cache
+completion_cache = CompletionCache(
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.LLM_CACHE_TTL_SECONDS
+)
+
+def cache_scope(user_id: int) -> str:
+    """Completion cache scope of a user's requests today (local date)"""
+    return f"{user_id}:{datetime.now().date().isoformat()}"
+
+async def cached_chat_completion(bypass_cache: bool = False, scope: str = "", **payload) -> Dict[str, Any]:
+    """
+    create_chat_completion through the completion cache
+    
+    Args:
+        bypass_cache: Always call upstream (the result is not cached either)
+        scope: Cache scope of the request (see cache_scope)
+        payload: Request body fields (model, messages, tools, ...)
+        
+    Returns:
+        The decoded JSON completion
+    """
+    if bypass_cache or not settings.LLM_CACHE_ENABLED:
+        return await create_chat_completion(**payload)
+    return await completion_cache.get_or_create(payload, create_chat_completion, scope)
+
+def format_datetime_for_reply(value: Optional[str]) -> Optional[str]:
+    """Turn an ISO date/time string from the model into a readable phrase"""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except (ValueError, OverflowError):
+        return value
+    if parsed.hour == 0 and parsed.minute == 0 and "T" not in value:
+        return parsed.strftime('%A, %B %d')
+    return parsed.strftime('%A, %B %d at %I:%M %p')
+
+def build_acknowledgement(item: Dict[str, Any]) -> str:
+    """
+    Build a reply for an extracted item without calling the LLM
+    
+    Args:
+        item: Generated item with "type" and "data" keys
+        
+    Returns:
+        The acknowledgement text
+    """
+    data = item["data"]
+    title = data.get("title", "Untitled")
+    
+    if item["type"] == "todo":
+        reply = f"Got it! I've added \"{title}\" to your todo list"
+        deadline = format_datetime_for_reply(data.get("deadline"))
+        if deadline:
+            reply += f", due {deadline}"
+        if str(data.get("priority", "")).lower() == "high":
+            reply += " (high priority)"
+        return reply + "."
+    
+    reply = f"Done! \"{title}\" is on your calendar"
+    if data.get("is_all_day"):
+        start = format_datetime_for_reply((data.get("start_time") or "")[:10])
+    else:
+        start = format_datetime_for_reply(data.get("start_time"))
+    if start:
+        reply += f" for {start}"
+    if data.get("location"):
+        reply += f" at {data['location']}"
+    return reply + "."
+
+def build_messages(
+    message: str,
+    conversation_history: Optional[List[Dict[str, str]]],
+    summary: Optional[str] = None
+) -> List[Dict[str, str]]:
+    """
+    Assemble the messages sent to the model for a chat turn
+    
+    Args:
+        message: The user's message
+        conversation_history: List of previous messages in the conversation
+        summary: Rolling summary of older turns, if any
+        
+    Returns:
+        System message, summary, as many recent turns as fit in
+        settings.CHAT_CONTEXT_TOKEN_BUDGET and the current user message
+    """
+    history = list(conversation_history or [])
+    
+    # Skip the current message since assemble_context adds it
+    if history and history[-1]["role"] == "user":
+        history = history[:-1]
+    
+    return assemble_context(
+        SYSTEM_MESSAGE,
+        history,
+        message,
+        summary,
+        budget=settings.CHAT_CONTEXT_TOKEN_BUDGET,
+        summary_budget=settings.CHAT_SUMMARY_TOKEN_BUDGET,
+        reserved_tokens=TOOLS_TOKENS
+    )
+
+def parse_tool_calls(tool_calls: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Turn the model's tool calls into generated items ({"type": ..., "data": ...})
+    
+    A call whose arguments aren't a JSON object becomes an item with empty
+    data and an "error", so it is reported in item_results without losing the
+    other items of the turn.
+    """
+    generated_items = []
+    for tool_call in tool_calls or []:
+        function_name = tool_call["function"]["name"]
+        print(f"Tool call detected: {function_name}")
+        
+        if function_name in TOOL_ITEM_TYPES:
+            # Extract the function call results
+            try:
+                data = json.loads(tool_call["function"]["arguments"])
+                if not isinstance(data, dict):
+                    raise ValueError("arguments are not a JSON object")
+            except (TypeError, ValueError) as e:
+                print(f"Malformed arguments in tool call {function_name}: {str(e)}")
+                generated_items.append({
+                    "type": TOOL_ITEM_TYPES[function_name],
+                    "data": {},
+                    "error": f"Malformed tool call arguments: {str(e)}"
+                })
+                continue
+            generated_items.append({"type": TOOL_ITEM_TYPES[function_name], "data": data})
+    return generated_items
+
+def valid_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Generated items without a parse error (the ones worth acknowledging)"""
+    return [item for item in items if "error" not in item]
+
+def build_clarification_messages(items: List[Dict[str, Any]], messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Messages for the follow-up completion that phrases the acknowledgement"""
+    if len(items) == 1:
+        identified = "a todo item" if items[0]["type"] == "todo" else "a calendar event"
+        subject = "this todo item" if items[0]["type"] == "todo" else "this event"
+    else:
+        identified = f"{len(items)} items (todos and/or calendar events)"
+        subject = "these items"
+    clarification_messages = messages.copy()
+    clarification_messages.append({"role": "assistant", "content": f"I've identified {identified} in your message."})
+    clarification_messages.append({"role": "user", "content": f"Can you acknowledge {subject} in a natural, conversational way? Only ask if I want to add it when that's clearly appropriate based on context."})
+    return clarification_messages
+
+def build_acknowledgements(items: List[Dict[str, Any]]) -> str:
+    """Build one reply covering every extracted item"""
+    return " ".join(build_acknowledgement(item) for item in items)
+
+async def acknowledge_items(
+    items: List[Dict[str, Any]],
+    messages: List[Dict[str, str]],
+    inline_content: Optional[str],
+    ack_mode: str,
+    bypass_cache: bool = False,
+    scope: str = ""
+) -> str:
+    """
+    Produce the chatbot reply for the extracted items according to ack_mode
+    
+    Args:
+        items: Generated items with "type" and "data" keys
+        messages: Messages sent in the original completion
+        inline_content: Text the model returned alongside the tool calls, if any
+        ack_mode: One of ACK_MODES
+        bypass_cache: Skip the completion cache for the follow-up call
+        scope: Completion cache scope of the follow-up call
+        
+    Returns:
+        The acknowledgement text
+    """
+    if ack_mode == "template":
+        return build_acknowledgements(items)
+    
+    if ack_mode == "inline":
+        return inline_content.strip() if inline_content and inline_content.strip() else build_acknowledgements(items)
+    
+    # Get a user-friendly response with a follow-up call
+    clarification_completion = await cached_chat_completion(
+        bypass_cache=bypass_cache,
+        scope=scope,
+        model=MODEL_NAME,
+        messages=build_clarification_messages(items, messages),
+        temperature=0.7
+    )
+    
+    return clarification_completion["choices"][0]["message"]["content"]
+
 async def process_chat_message(
     message: str, 
     user_id: int, 
     db, 
-    conversation_history: Optional[List[Dict[str, str]]] = None
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    ack_mode: Optional[str] = None,
+    summary: Optional[str] = None,
+    bypass_cache: bool = False
 ) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
     """
     Process a chat message using Together AI LLM (Llama 3 model)
@@ -21,167 +398,56 @@ async def process_chat_message(
         user_id: The ID of the user
         db: Database session
         conversation_history: List of previous messages in the conversation
+        ack_mode: How to acknowledge extracted items (see ACK_MODES), defaults to settings.CHAT_ACK_MODE
+        summary: Rolling summary of turns older than conversation_history
+        bypass_cache: Always call the LLM instead of reusing a cached completion
         
     Returns:
         Tuple containing (chatbot response, list of generated items)
+        
+    Raises:
+        LLMUnavailableError: The circuit breaker is open
     """
+    ack_mode = ack_mode or settings.CHAT_ACK_MODE
+    
     try:
         # Debug log to check API key
         api_key = settings.TOGETHER_API_KEY
         if not api_key:
             print("WARNING: Together API key is not set!")
             return "I'm sorry, the AI service is not properly configured. Please contact the administrator.", None
-        else:
-            masked_key = api_key[:4] + "..." + api_key[-4:] if len(api_key) > 8 else "***"
-            print(f"Using Together API key: {masked_key}")
-        
-        # Create the system message with instructions
-        system_message = """
-        You are an AI assistant for Polaris Calendar, a calendar and todo app. 
-        Your job is to help users manage their schedule and tasks.
-        
-        If the user's message contains information about:
-        1. A task or todo item - Extract it and format it as a todo item
-        2. An event or meeting - Extract it and format it as a calendar event
-        
-        Remember previous messages in the conversation when responding.
-        Respond conversationally and be helpful.
-        """
-        
-        # Create Together client
-        client = together.Together(api_key=api_key)
-        
-        # Set up tools for function calling
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "extract_todo_item",
-                    "description": "Extract a todo item from the user message",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "The title of the todo item"},
-                            "description": {"type": "string", "description": "Optional description"},
-                            "deadline": {"type": "string", "description": "The deadline in ISO format (YYYY-MM-DD)"},
-                            "priority": {"type": "string", "enum": ["high", "low"], "description": "Priority level"}
-                        },
-                        "required": ["title"]
-                    }
-                }
-            },
-            {
-                "type": "function",
-                "function": {
-                    "name": "extract_calendar_event",
-                    "description": "Extract a calendar event from the user message",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "title": {"type": "string", "description": "The title of the event"},
-                            "description": {"type": "string", "description": "Optional description"},
-                            "start_time": {"type": "string", "description": "The start time in ISO format (YYYY-MM-DDTHH:MM:SS)"},
-                            "end_time": {"type": "string", "description": "The end time in ISO format (YYYY-MM-DDTHH:MM:SS)"},
-                            "location": {"type": "string", "description": "Optional location"},
-                            "is_all_day": {"type": "boolean", "description": "Whether this is an all-day event"}
-                        },
-                        "required": ["title", "start_time"]
-                    }
-                }
-            }
-        ]
         
-        # Make the API call using the SDK
+        # Make the API call through the shared async client (which records per-call metrics)
         try:
-            print(f"Sending request to Together AI...")
-            
             # Prepare messages list
-            messages = [{"role": "system", "content": system_message}]
-            
-            # Include conversation history if provided
-            if conversation_history and len(conversation_history) > 0:
-                # Use conversation history but limit to last 10 exchanges
-                # Skip adding the current message since it will be added below
-                history = conversation_history[:-1] if len(conversation_history) > 0 and conversation_history[-1]["role"] == "user" else conversation_history
-                # Take only the last 10 messages to avoid context window limits
-                messages.extend(history[-10:])
-            else:
-                # If no history, just add the current user message
-                messages.append({"role": "user", "content": message})
-            
-            # Make sure the most recent user message is included
-            if not conversation_history or messages[-1]["role"] != "user" or messages[-1]["content"] != message:
-                messages.append({"role": "user", "content": message})
+            messages = build_messages(message, conversation_history, summary)
+            scope = cache_scope(user_id)
             
-            # Log the conversation context being sent
-            print(f"Sending conversation with {len(messages)} messages")
-            
-            completion = client.chat.completions.create(
+            completion = await cached_chat_completion(
+                bypass_cache=bypass_cache,
+                scope=scope,
                 model=MODEL_NAME,
                 messages=messages,
                 temperature=0.7,
-                tools=tools,
+                tools=TOOLS,
                 tool_choice="auto"
             )
             
-            print(f"Got response from Together AI")
-            
             # Extract the response message
-            response_message = completion.choices[0].message
+            response_message = completion["choices"][0]["message"]
             
-            # Check if a tool was called
-            generated_items = []
-            if hasattr(response_message, 'tool_calls') and response_message.tool_calls:
-                tool_call = response_message.tool_calls[0]
-                print(f"Tool call detected: {tool_call.function.name}")
-                
-                # Extract the function call results
-                function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
-                
-                if function_name == "extract_todo_item":
-                    # Format as todo item
-                    generated_items.append({
-                        "type": "todo",
-                        "data": function_args
-                    })
-                    
-                    # Get a user-friendly response with a follow-up call
-                    clarification_messages = messages.copy()
-                    clarification_messages.append({"role": "assistant", "content": "I've identified a todo item in your message."})
-                    clarification_messages.append({"role": "user", "content": "Can you acknowledge this todo item in a natural, conversational way? Only ask if I want to add it when that's clearly appropriate based on context."})
-                    
-                    clarification_completion = client.chat.completions.create(
-                        model=MODEL_NAME,
-                        messages=clarification_messages,
-                        temperature=0.7
-                    )
-                    
-                    bot_response = clarification_completion.choices[0].message.content
-                
-                elif function_name == "extract_calendar_event":
-                    # Format as calendar event
-                    generated_items.append({
-                        "type": "event",
-                        "data": function_args
-                    })
-                    
-                    # Get a user-friendly response with a follow-up call
-                    clarification_messages = messages.copy()
-                    clarification_messages.append({"role": "assistant", "content": "I've identified a calendar event in your message."})
-                    clarification_messages.append({"role": "user", "content": "Can you acknowledge this event in a natural, conversational way? Only ask if I want to add it when that's clearly appropriate based on context."})
-                    
-                    clarification_completion = client.chat.completions.create(
-                        model=MODEL_NAME,
-                        messages=clarification_messages,
-                        temperature=0.7
-                    )
-                    
-                    bot_response = clarification_completion.choices[0].message.content
-                else:
-                    bot_response = response_message.content or "I've processed your request but couldn't generate a proper response."
+            # Collect every item the model extracted in this turn
+            generated_items = parse_tool_calls(response_message.get("tool_calls"))
+            
+            if valid_items(generated_items):
+                bot_response = await acknowledge_items(valid_items(generated_items), messages, response_message.get("content"), ack_mode, bypass_cache, scope)
+            elif response_message.get("tool_calls"):
+                bot_response = response_message.get("content") or "I've processed your request but couldn't generate a proper response."
             else:
-                bot_response = response_message.content or "I couldn't understand your request. Please try rephrasing."
+                bot_response = response_message.get("content") or "I couldn't understand your request. Please try rephrasing."
+        except LLMUnavailableError:
+            # Let the endpoint answer 503 instead of a chat reply
+            raise
         except Exception as e:
             print(f"API request error: {str(e)}")
             # Provide a simple response if API call failed
@@ -189,6 +455,105 @@ async def process_chat_message(
         
         return bot_response, generated_items if generated_items else None
     
+    except LLMUnavailableError:
+        raise
     except Exception as e:
         print(f"Error processing chat message: {str(e)}")
-        return f"I'm sorry, I encountered an error: {str(e)}", None 
\ No newline at end of file
+        return f"I'm sorry, I encountered an error: {str(e)}", None 
+
+async def stream_chat_message(
+    message: str,
+    user_id: int,
+    conversation_history: Optional[List[Dict[str, str]]] = None,
+    ack_mode: Optional[str] = None,
+    summary: Optional[str] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of process_chat_message
+    
+    The model's text is forwarded as it arrives. If it extracted items without
+    sending any text, the acknowledgement is streamed afterwards ("followup")
+    or built from the template (other modes).
+    
+    Args:
+        message: The user's message
+        user_id: The ID of the user
+        conversation_history: List of previous messages in the conversation
+        ack_mode: How to acknowledge extracted items (see ACK_MODES), defaults to settings.CHAT_ACK_MODE
+        summary: Rolling summary of turns older than conversation_history
+        
+    Yields:
+        {"type": "token", "content": ...} for each piece of reply text as it
+        arrives, {"type": "error", "detail": ...} if the call fails, then one
+        {"type": "done", "response": ..., "generated_items": ...}
+    """
+    ack_mode = ack_mode or settings.CHAT_ACK_MODE
+    
+    if not settings.TOGETHER_API_KEY:
+        print("WARNING: Together API key is not set!")
+        reply = "I'm sorry, the AI service is not properly configured. Please contact the administrator."
+        yield {"type": "token", "content": reply}
+        yield {"type": "done", "response": reply, "generated_items": None}
+        return
+    
+    messages = build_messages(message, conversation_history, summary)
+    content_parts = []
+    # Tool calls arrive as fragments keyed by index; arguments are concatenated
+    tool_calls: Dict[int, Dict[str, Any]] = {}
+    
+    try:
+        async for chunk in stream_chat_completion(
+            model=MODEL_NAME,
+            messages=messages,
+            temperature=0.7,
+            tools=TOOLS,
+            tool_choice="auto"
+        ):
+            if not chunk.get("choices"):
+                continue
+            delta = chunk["choices"][0].get("delta") or {}
+            
+            if delta.get("content"):
+                content_parts.append(delta["content"])
+                yield {"type": "token", "content": delta["content"]}
+            
+            for fragment in delta.get("tool_calls") or []:
+                call = tool_calls.setdefault(fragment.get("index", 0), {"function": {"name": "", "arguments": ""}})
+                function = fragment.get("function") or {}
+                call["function"]["name"] += function.get("name") or ""
+                call["function"]["arguments"] += function.get("arguments") or ""
+        
+        generated_items = parse_tool_calls([tool_calls[index] for index in sorted(tool_calls)])
+        
+        # Text that was already streamed can't be taken back, so the
+        # acknowledgement is only produced when the model sent no text
+        if valid_items(generated_items) and not "".join(content_parts).strip():
+            if ack_mode == "followup":
+                async for chunk in stream_chat_completion(
+                    model=MODEL_NAME,
+                    messages=build_clarification_messages(valid_items(generated_items), messages),
+                    temperature=0.7
+                ):
+                    if not chunk.get("choices"):
+                        continue
+                    delta = chunk["choices"][0].get("delta") or {}
+                    if delta.get("content"):
+                        content_parts.append(delta["content"])
+                        yield {"type": "token", "content": delta["content"]}
+            else:
+                acknowledgement = build_acknowledgements(valid_items(generated_items))
+                content_parts.append(acknowledgement)
+                yield {"type": "token", "content": acknowledgement}
+        
+        reply = "".join(content_parts).strip() or "I couldn't understand your request. Please try rephrasing."
+    except LLMUnavailableError:
+        reply = "The AI service is temporarily unavailable. Please try again in a moment."
+        yield {"type": "error", "detail": reply}
+        generated_items = []
+    except Exception as e:
+        print(f"API request error: {str(e)}")
+        reply = f"I'm having trouble connecting to the AI service. Error: {str(e)}"
+        yield {"type": "error", "detail": reply}
+        generated_items = []
+    
+    yield {"type": "done", "response": reply, "generated_items": generated_items or None}
\ No newline at end of file
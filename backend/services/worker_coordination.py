@@ -0,0 +1,147 @@
+import os
+import socket
+import uuid
+from datetime import datetime, date, timedelta
+from typing import Tuple
+from sqlalchemy.exc import IntegrityError
+
+from models.scheduler import SchedulerWorker, SchedulerLease, SummaryDelivery
+
+def generate_worker_id() -> str:
+    """Build an identifier that is unique per scheduler process"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def send_heartbeat(worker_id: str, db) -> None:
+    """
+    Record that a scheduler worker is alive
+
+    Args:
+        worker_id: The ID of the worker
+        db: Database session
+    """
+    now = datetime.utcnow()
+    updated = db.query(SchedulerWorker).filter(
+        SchedulerWorker.worker_id == worker_id
+    ).update({SchedulerWorker.last_heartbeat: now}, synchronize_session=False)
+
+    if not updated:
+        db.add(SchedulerWorker(worker_id=worker_id, started_at=now, last_heartbeat=now))
+
+    db.commit()
+
+def remove_worker(worker_id: str, db) -> None:
+    """Drop a worker from the live set (called on clean shutdown)"""
+    db.query(SchedulerWorker).filter(
+        SchedulerWorker.worker_id == worker_id
+    ).delete(synchronize_session=False)
+    db.commit()
+
+def get_shard(worker_id: str, db, ttl_seconds: int) -> Tuple[int, int]:
+    """
+    Work out which shard of the reminder id space this worker owns
+
+    Live workers are those with a heartbeat newer than ttl_seconds. They are
+    ordered by worker ID so every worker computes the same assignment.
+
+    Args:
+        worker_id: The ID of the worker
+        db: Database session
+        ttl_seconds: How long a heartbeat stays valid
+
+    Returns:
+        Tuple containing (shard index, shard count)
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    live_workers = [
+        row.worker_id for row in db.query(SchedulerWorker.worker_id).filter(
+            SchedulerWorker.last_heartbeat >= cutoff
+        ).order_by(SchedulerWorker.worker_id).all()
+    ]
+
+    if worker_id not in live_workers:
+        # Our own heartbeat is stale, so don't claim any shard until it is renewed
+        return 0, 0
+
+    return live_workers.index(worker_id), len(live_workers)
+
+def acquire_lease(name: str, worker_id: str, db, ttl_seconds: int) -> bool:
+    """
+    Acquire or renew a named lease
+
+    The lease is taken with a single conditional UPDATE, so only one worker can
+    hold it at a time even when several race for it.
+
+    Args:
+        name: The name of the lease
+        worker_id: The ID of the worker trying to take it
+        db: Database session
+        ttl_seconds: How long the lease is held without renewal
+
+    Returns:
+        True if this worker holds the lease
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+
+    updated = db.query(SchedulerLease).filter(
+        SchedulerLease.name == name,
+        (SchedulerLease.owner == worker_id) | (SchedulerLease.expires_at < now)
+    ).update({
+        SchedulerLease.owner: worker_id,
+        SchedulerLease.expires_at: expires_at
+    }, synchronize_session=False)
+
+    if updated:
+        db.commit()
+        return True
+
+    # Either another worker holds the lease or it has never been created
+    try:
+        db.add(SchedulerLease(name=name, owner=worker_id, expires_at=expires_at))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
+
+def release_lease(name: str, worker_id: str, db) -> None:
+    """Give up a lease held by this worker so another can take over immediately"""
+    db.query(SchedulerLease).filter(
+        SchedulerLease.name == name,
+        SchedulerLease.owner == worker_id
+    ).update({SchedulerLease.owner: None, SchedulerLease.expires_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+
+def claim_summary(user_id: int, day: date, db) -> bool:
+    """
+    Atomically record that a user's daily summary for a day is being sent
+
+    Like acquire_lease, a conditional UPDATE (or the first INSERT) decides the
+    winner, so a worker taking over the summary lease within the same minute
+    can't send the summary a second time.
+
+    Args:
+        user_id: The ID of the user
+        day: The (UTC) date of the summary
+        db: Database session
+
+    Returns:
+        True if this worker should send the summary
+    """
+    updated = db.query(SummaryDelivery).filter(
+        SummaryDelivery.user_id == user_id,
+        SummaryDelivery.last_sent_date < day
+    ).update({SummaryDelivery.last_sent_date: day}, synchronize_session=False)
+
+    if updated:
+        db.commit()
+        return True
+
+    # Either it was already sent today or this user never got one
+    try:
+        db.add(SummaryDelivery(user_id=user_id, last_sent_date=day))
+        db.commit()
+        return True
+    except IntegrityError:
+        db.rollback()
+        return False
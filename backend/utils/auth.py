@@ -1,33 +1,139 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+from jose import JWTError
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from typing import Optional
 
 from models.user import User
 from utils.config import settings
-from utils.database import get_db
+from utils.database import get_async_db
+from utils.ttl_cache import TTLCache
+from utils.jwt_backend import encode_token, decode_token
 
-# Setup password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Setup password hashing context. Hashes made with a different cost than
+# BCRYPT_ROUNDS count as outdated and are replaced on the next login.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a few threads keep hashing off the event loop
+# without blocking other requests. Beyond PASSWORD_HASH_MAX_PENDING waiting
+# or running jobs, new logins are turned away instead of queueing up.
+hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+pending_hash_jobs = 0
+pending_hash_lock = threading.Lock()
 
 # Setup OAuth2 with Password Bearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token", auto_error=False)
 
+# Detached User rows by token subject (username), so authenticating a request
+# doesn't need a database query. Updates made by this process invalidate the
+# entry right away; other workers pick them up after the TTL.
+user_cache = TTLCache(
+    max_entries=settings.AUTH_USER_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS
+)
+
+# Claims of tokens whose signature has already been verified, keyed by the
+# full token string, so a repeated bearer token costs a dict lookup. An entry
+# never outlives the token's exp.
+token_cache = TTLCache(
+    max_entries=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_TOKEN_CACHE_TTL_SECONDS
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    """Drop a user from the cache when the row changes (profile update, deactivation, deletion)"""
+    user_cache.pop(target.username)
+    # A concurrent request may re-cache the old committed row before this
+    # transaction commits, so drop the entry again once it has
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_usernames", set()).add(target.username)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_users(session):
+    for username in session.info.pop("changed_usernames", ()):
+        user_cache.pop(username)
+
+@event.listens_for(Session, "after_rollback")
+def forget_rolled_back_users(session):
+    session.info.pop("changed_usernames", None)
+
+async def load_user(db: AsyncSession, username: str) -> Optional[User]:
+    """
+    Get a user by username, using user_cache when enabled
+
+    The cached row is detached; a copy is merged into db without a query, so
+    the caller can modify and commit it like a freshly loaded row.
+    """
+    if not settings.AUTH_USER_CACHE_ENABLED:
+        return (await db.execute(select(User).where(User.username == username))).scalars().first()
+
+    cached_user = user_cache.get(username)
+    if cached_user is None:
+        cached_user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+        if cached_user is None:
+            return None
+        db.expunge(cached_user)
+        user_cache.put(username, cached_user)
+    return await db.merge(cached_user, load=False)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+def hash_job_done(future):
+    global pending_hash_jobs
+    with pending_hash_lock:
+        pending_hash_jobs -= 1
+
+async def run_hash_job(func, *args):
+    """Run a password hashing function in hash_executor, or 503 if too many are pending"""
+    global pending_hash_jobs
+    with pending_hash_lock:
+        if pending_hash_jobs >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many login attempts in progress, please try again",
+                headers={"Retry-After": "1"},
+            )
+        pending_hash_jobs += 1
+    # Count the job until it has actually finished in the pool, even if the
+    # request awaiting it is cancelled (e.g. the client disconnected)
+    future = hash_executor.submit(func, *args)
+    future.add_done_callback(hash_job_done)
+    return await asyncio.wrap_future(future)
+
+async def get_password_hash_async(password):
+    return await run_hash_job(pwd_context.hash, password)
+
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # End the read transaction so the connection goes back to the pool while we
+    # wait on bcrypt (detaching the user first, as a rollback would expire it)
+    db.expunge(user)
+    await db.rollback()
+    valid, new_hash = await run_hash_job(pwd_context.verify_and_update, password, user.hashed_password)
+    if not valid:
         return False
+    db.add(user)
+    if new_hash:
+        # Stored hash used another cost (BCRYPT_ROUNDS changed), upgrade it now that we know the password
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
@@ -37,10 +143,31 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = encode_token(to_encode)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def verify_token(token: str) -> dict:
+    """
+    Return the claims of a valid token, from token_cache when possible
+
+    Raises:
+        JWTError: The token is invalid or expired
+    """
+    if not settings.AUTH_TOKEN_CACHE_ENABLED:
+        return decode_token(token)
+
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = decode_token(token)
+        expires_in = payload["exp"] - time.time() if isinstance(payload.get("exp"), (int, float)) else None
+        token_cache.put(token, payload, ttl_seconds=expires_in)
+    elif isinstance(payload.get("exp"), (int, float)) and payload["exp"] <= time.time():
+        # Wall-clock check as well, in case the system clock jumped
+        token_cache.pop(token)
+        raise JWTError("Signature has expired.")
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     if token is None:
         return None
         
@@ -50,13 +177,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = verify_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.username == username).first()
+    user = await load_user(db, username)
     if user is None:
         raise credentials_exception
     return user
@@ -67,4 +194,20 @@ async def get_current_active_user(current_user: Optional[User] = Depends(get_cur
         
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user
+
+def is_admin(username: Optional[str]) -> bool:
+    """Whether the user may use the admin endpoints (ADMIN_USERNAMES)"""
+    admins = [name.strip() for name in settings.ADMIN_USERNAMES.split(",") if name.strip()]
+    return username is not None and username in admins
+
+async def get_current_admin_user(current_user: Optional[User] = Depends(get_current_active_user)):
+    if current_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if not is_admin(current_user.username):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -0,0 +1,194 @@
+import zlib
+from typing import List, Optional
+
+from utils.config import settings
+
+# brotli and zstandard are in requirements.txt, but the server still starts
+# without them: encodings whose package is missing are simply not offered
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Media types worth compressing (already-compressed formats like images are not)
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+)
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: zlib stream with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far, keeping the stream open"""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+def available_encodings() -> List[str]:
+    """COMPRESSION_ENCODINGS in order of preference, minus those whose package is missing"""
+    installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+    names = [name.strip() for name in settings.COMPRESSION_ENCODINGS.split(",")]
+    return [name for name in names if installed.get(name)]
+
+def create_encoder(encoding: str):
+    if encoding == "zstd":
+        return ZstdEncoder(settings.COMPRESSION_ZSTD_LEVEL)
+    if encoding == "br":
+        return BrotliEncoder(settings.COMPRESSION_BROTLI_QUALITY)
+    return GzipEncoder(settings.COMPRESSION_GZIP_LEVEL)
+
+def choose_encoding(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """
+    The offered encoding to use for an Accept-Encoding header, or None
+
+    Among the encodings the client accepts (q > 0, "*" included), ours are
+    tried in order of preference.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in offered:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def is_compressible(headers: List[tuple]) -> bool:
+    content_type = b""
+    for name, value in headers:
+        if name == b"content-encoding":
+            return False
+        if name == b"content-type":
+            content_type = value
+    return content_type.decode("latin-1").lower().startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding the client accepts (zstd, br, gzip)
+
+    Complete responses smaller than COMPRESSION_MIN_SIZE are sent as they
+    are. Streamed responses (more_body) are compressed chunk by chunk and
+    flushed after each one, so clients still receive every event or line as
+    soon as it is produced.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.offered = available_encodings()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.offered:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = choose_encoding(accept_encoding, self.offered) if accept_encoding else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                # Hold the headers back until the first body chunk tells us
+                # whether to compress
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = list(start_message.get("headers", []))
+                too_small = not more_body and len(body) < settings.COMPRESSION_MIN_SIZE
+                if start_message["status"] < 200 or start_message["status"] in (204, 304) or too_small or not is_compressible(headers):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                encoder = create_encoder(encoding)
+                headers = [(name, value) for name, value in headers if name != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode()))
+                vary = [value for name, value in headers if name == b"vary"]
+                if not any(b"accept-encoding" in value.lower() for value in vary):
+                    headers.append((b"vary", b"Accept-Encoding"))
+                if not more_body:
+                    compressed = encoder.compress(body) + encoder.finish()
+                    headers.append((b"content-length", str(len(compressed)).encode()))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send({**start_message, "headers": headers})
+
+            if more_body:
+                chunk = encoder.compress(body) + encoder.flush()
+            else:
+                chunk = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,19 +1,249 @@
-from sqlalchemy import create_engine
+import random
+import threading
+from typing import List, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-# For SQLite database
-SQLALCHEMY_DATABASE_URL = "sqlite:///./polaris_calendar.db"
+from utils.config import settings
+from utils.metrics import registry, Gauge
+from utils.ttl_cache import TTLCache
+
+def normalize_database_url(url: str) -> str:
+    """Accept the "postgres://" scheme used by many hosting providers"""
+    if url.startswith("postgres://"):
+        return "postgresql://" + url[len("postgres://"):]
+    return url
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection
+
+    WAL lets readers run while a write is in progress, synchronous=NORMAL is
+    safe with WAL and avoids an fsync per commit, and busy_timeout makes a
+    writer wait for the lock instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    if settings.SQLITE_MMAP_SIZE:
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+def create_db_engine(url: str) -> Engine:
+    """
+    Create an engine for SQLite or PostgreSQL with the pool settings from config
+
+    Args:
+        url: SQLAlchemy database URL
+
+    Returns:
+        The configured engine
+    """
+    url = normalize_database_url(url)
+    pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+    if not is_sqlite(url):
+        # pool_pre_ping replaces connections dropped by the server or a proxy
+        return create_engine(url, pool_pre_ping=True, **pool_options)
+
+    if url in ("sqlite://", "sqlite:///:memory:"):
+        # Every connection to an in-memory database is a separate database
+        return create_engine(url, connect_args={"check_same_thread": False})
+
+    db_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        **pool_options
+    )
+    event.listen(db_engine, "connect", set_sqlite_pragmas)
+    return db_engine
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio counterpart (aiosqlite / asyncpg)"""
+    url = normalize_database_url(url)
+    scheme, rest = url.split(":", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect == "sqlite":
+        return "sqlite+aiosqlite:" + rest
+    if dialect == "postgresql":
+        return "postgresql+asyncpg:" + rest
+    return url
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    """Async counterpart of create_db_engine, with the same pool settings and SQLite pragmas"""
+    url = to_async_url(url)
+    pool_options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+    if not is_sqlite(url):
+        return create_async_engine(url, pool_pre_ping=True, **pool_options)
+
+    if url in ("sqlite+aiosqlite://", "sqlite+aiosqlite:///:memory:"):
+        return create_async_engine(url)
+
+    # aiosqlite defaults to opening a new connection per checkout
+    db_engine = create_async_engine(
+        url,
+        connect_args={"timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        **pool_options
+    )
+    event.listen(db_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return db_engine
+
+# Database URL from settings (SQLite file by default, or postgresql://...)
+SQLALCHEMY_DATABASE_URL = normalize_database_url(settings.DATABASE_URL)
 
 # Create SQLAlchemy engine
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 
 # Create sessionmaker
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+class ReplicaSet:
+    """
+    Read replicas and how far each one lags behind the primary
+
+    A replica is only used while its last measured lag is within
+    DB_REPLICA_MAX_LAG_SECONDS; until the first measurement, or if it
+    can't be reached, reads go to the primary.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.urls = urls
+        self.engines = [create_async_db_engine(url) for url in urls]
+        self.lag_seconds: List[Optional[float]] = [None] * len(urls)
+        self._lock = threading.Lock()
+        # How reads were routed: "replica", "primary_sticky" (client wrote
+        # recently) or "primary_lag" (no replica up to date)
+        self.routed = {"replica": 0, "primary_sticky": 0, "primary_lag": 0}
+
+    def record_lag(self, index: int, lag_seconds: Optional[float]) -> None:
+        """Store a lag measurement (None if the replica couldn't be checked)"""
+        was_usable = self.is_usable(index)
+        self.lag_seconds[index] = lag_seconds
+        if was_usable != self.is_usable(index):
+            state = "in use" if not was_usable else "skipped"
+            print(f"Read replica {index} is now {state} (lag: {lag_seconds})")
+
+    def is_usable(self, index: int) -> bool:
+        lag = self.lag_seconds[index]
+        return lag is not None and lag <= settings.DB_REPLICA_MAX_LAG_SECONDS
+
+    def choose(self) -> Optional[AsyncEngine]:
+        """Pick one of the replicas that are up to date, or None"""
+        usable = [engine for index, engine in enumerate(self.engines) if self.is_usable(index)]
+        return random.choice(usable) if usable else None
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.routed[route] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            routed = dict(self.routed)
+        return {
+            "replicas": len(self.engines),
+            "lag_seconds": list(self.lag_seconds),
+            "routed": routed
+        }
+
+class RoutingSession(Session):
+    """
+    Session that reads from the replica in info["replica"], if one was assigned
+
+    Flushes, INSERT/UPDATE/DELETE statements and every statement after the
+    session has written go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing and not self.info.get("wrote") and not getattr(clause, "is_dml", False):
+            return replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_flush")
+def record_flush(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def record_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(RoutingSession, "after_commit")
+def remember_writer(session):
+    # Read-your-writes: the client's next reads go to the primary for a while,
+    # since the replicas may not have the change yet
+    if not session.info.pop("wrote", False):
+        return
+    session.info.pop("replica", None)
+    client_key = session.info.get("client_key")
+    if client_key is not None:
+        recent_writers.put(client_key, True)
+
+# Async engine and sessions for the API routes, so queries don't block the
+# event loop. The synchronous ones above remain for the scheduler thread and
+# scripts. expire_on_commit is off because expired attributes can't be
+# lazily reloaded outside of an await.
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+# Read replicas for GET requests (see get_async_db)
+replica_set = ReplicaSet([url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()])
+
+# Clients (by bearer token, or address if anonymous) that committed a write
+# in the last DB_READ_YOUR_WRITES_SECONDS. Kept per worker process, so with
+# several workers a client may briefly read from a replica on another one.
+recent_writers = TTLCache(max_entries=100000, ttl_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+def pool_stats() -> dict:
+    """Connections per pool ("primary", "replica0", ...) and state, for the /metrics gauges"""
+    pools = [("primary", async_engine.pool)] + [(f"replica{index}", replica.pool) for index, replica in enumerate(replica_set.engines)]
+    values = {}
+    for name, pool in pools:
+        # Pools for in-memory SQLite don't track their connections
+        if not hasattr(pool, "checkedout"):
+            continue
+        values[(name, "checked_out")] = pool.checkedout()
+        values[(name, "idle")] = pool.checkedin()
+        values[(name, "overflow")] = max(0, pool.overflow())
+        values[(name, "size")] = pool.size()
+    return values
+
+registry.register(Gauge(
+    "db_pool_connections", "Connections of the async database pools by state", ["pool", "state"], callback=pool_stats
+))
+registry.register(Gauge(
+    "db_replica_lag_seconds", "Last measured lag of each read replica", ["replica"],
+    callback=lambda: {(str(index),): lag for index, lag in enumerate(replica_set.lag_seconds)}
+))
+
 # Create base class for models
 Base = declarative_base()
 
@@ -23,4 +253,26 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+def get_client_key(request: Request) -> Optional[str]:
+    """Identify the client for read-your-writes (the bearer token, or the address for anonymous requests)"""
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return authorization
+    return request.client.host if request.client else None
+
+# Dependency to get an async DB session. GET requests read from a replica
+# when one is configured and up to date, unless the client wrote recently.
+async def get_async_db(request: Request):
+    async with AsyncSessionLocal() as db:
+        client_key = get_client_key(request)
+        db.sync_session.info["client_key"] = client_key
+        if replica_set.engines and request.method in ("GET", "HEAD"):
+            if client_key is not None and recent_writers.get(client_key) is not None:
+                replica_set.count("primary_sticky")
+            else:
+                replica = replica_set.choose()
+                replica_set.count("replica" if replica is not None else "primary_lag")
+                db.sync_session.info["replica"] = replica
+        yield db
@@ -0,0 +1,11 @@
+from datetime import datetime
+
+def parse_datetime(value: str, **kwargs) -> datetime:
+    """
+    Parse a date/time string with dateutil.parser.parse (same arguments and errors)
+
+    dateutil is imported on first use: only chat messages and model replies
+    need it, so workers don't pay for it at startup.
+    """
+    import dateutil.parser
+    return dateutil.parser.parse(value, **kwargs)
@@ -0,0 +1,234 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds, from a fast cached read to a slow LLM call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Metric:
+    """Base class: a named metric with one child per combination of label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    """Monotonically increasing count, e.g. requests served"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}" for key, value in values
+        ]
+
+class Gauge(Metric):
+    """
+    Value that goes up and down, e.g. requests in flight
+
+    With a callback, the value is read when /metrics is scraped instead of
+    being tracked (the callback returns {label values: value}).
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = (),
+                 callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None):
+        super().__init__(name, description, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self.callback = callback
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1) -> None:
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def render(self) -> List[str]:
+        if self.callback is not None:
+            try:
+                values = list(self.callback().items())
+            except Exception as e:
+                print(f"Error collecting metric {self.name}: {e}")
+                values = []
+        else:
+            with self._lock:
+                values = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{format_labels(self.label_names, key)} {format_value(value)}"
+            for key, value in values if value is not None
+        ]
+
+class Histogram(Metric):
+    """
+    Distribution of observed values (latencies) in fixed buckets
+
+    Observing is a bisect and two additions, so it is cheap enough for every
+    request; quantiles are computed by Prometheus from the bucket counts.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket (+Inf last), sum]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                bucket_labels = format_labels(self.label_names, key, 'le="' + format_value(bound) + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+class Registry:
+    """The metrics of this worker process, rendered for /metrics"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# HTTP requests, labelled by route template (not the raw path, which would
+# create a series per event id)
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled", ["method", "route", "status"]
+))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to handle an HTTP request (until the response body is sent)", ["method", "route"]
+))
+
+# Scheduler jobs (services/scheduler.py)
+scheduler_job_duration = registry.register(Histogram(
+    "scheduler_job_duration_seconds", "Run time of a scheduler job", ["job"]
+))
+scheduler_job_lag = registry.register(Histogram(
+    "scheduler_job_lag_seconds", "How late a scheduler job started after it was due", ["job"],
+    buckets=(0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+))
+scheduler_job_errors = registry.register(Counter(
+    "scheduler_job_errors_total", "Scheduler jobs that raised", ["job"]
+))
+
+# LLM API calls (services/llm_client.py)
+llm_request_duration = registry.register(Histogram(
+    "llm_request_duration_seconds", "Latency of LLM API calls, including retries", ["model", "status", "stream"]
+))
+llm_tokens = registry.register(Counter(
+    "llm_tokens_total", "Tokens reported by the LLM API", ["model", "kind"]
+))
+llm_rejected = registry.register(Counter(
+    "llm_requests_rejected_total", "LLM calls refused while the circuit breaker was open"
+))
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests
+
+    A plain ASGI middleware rather than BaseHTTPMiddleware, which would add
+    a task and a memory stream to every request.
+    """
+
+    # Requests being handled. They all run on the event loop thread, so a
+    # plain counter read at scrape time is enough (no lock per request).
+    in_flight = 0
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        MetricsMiddleware.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            MetricsMiddleware.in_flight -= 1
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(time.perf_counter() - start, scope["method"], route_path)
+            http_requests.inc(scope["method"], route_path, str(status))
+
+registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled", callback=lambda: {(): MetricsMiddleware.in_flight}
+))
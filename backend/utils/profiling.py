@@ -0,0 +1,170 @@
+import io
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from utils.auth import verify_token, is_admin, load_user
+from utils.database import AsyncSessionLocal
+
+# Header that asks for a profile of the request instead of its response:
+# "text" (or "1") for a pstats report, "pstats" for the raw stats file
+PROFILE_HEADER = b"x-profile"
+
+# cProfile hooks the interpreter of the current thread, and only one profile
+# can be active at a time
+profile_lock = threading.Lock()
+
+def get_bearer_username(scope) -> Optional[str]:
+    """Username of a valid bearer token in the request headers, or None"""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer":
+                return None
+            try:
+                return verify_token(token).get("sub")
+            except Exception:
+                return None
+    return None
+
+async def is_active_admin(username: Optional[str]) -> bool:
+    """Same check as get_current_admin_user: an admin whose account still exists and is active"""
+    if not is_admin(username):
+        return False
+    async with AsyncSessionLocal() as db:
+        user = await load_user(db, username)
+        return user is not None and user.is_active
+
+def format_stats(profile, limit: int = 60) -> str:
+    import pstats
+
+    output = io.StringIO()
+    stats = pstats.Stats(profile, stream=output)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+class ProfileRequestMiddleware:
+    """
+    Profile single requests that carry an X-Profile header (admins only)
+
+    The endpoint runs under cProfile and the client gets the profile instead
+    of the normal response: a pstats report sorted by cumulative time, or
+    with "X-Profile: pstats" the stats file for pstats/snakeviz. The profile
+    covers everything the event loop thread does meanwhile, so profile on a
+    quiet worker. Only added when PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = dict(scope["headers"]).get(PROFILE_HEADER)
+        if mode is None or not await is_active_admin(get_bearer_username(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        if not profile_lock.acquire(blocking=False):
+            await send_text(send, 409, "Another profile is in progress\n")
+            return
+
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        # Imported here so workers that never profile don't load it
+        import cProfile
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, discard)
+            finally:
+                profile.disable()
+        finally:
+            profile_lock.release()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        headers = [(b"x-profiled-status", str(status).encode()), (b"x-profiled-time-ms", f"{elapsed_ms:.1f}".encode())]
+        if mode.lower() == b"pstats":
+            profile.create_stats()
+            await send_bytes(send, 200, marshal.dumps(profile.stats), b"application/octet-stream", headers + [
+                (b"content-disposition", b'attachment; filename="request.prof"')
+            ])
+            return
+        report = f"{scope['method']} {scope['path']} -> {status} in {elapsed_ms:.1f} ms\n\n" + format_stats(profile)
+        await send_text(send, 200, report, headers)
+
+async def send_bytes(send, status: int, body: bytes, content_type: bytes, headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())] + list(headers)
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def send_text(send, status: int, text: str, headers=()):
+    await send_bytes(send, status, text.encode(), b"text/plain; charset=utf-8", headers)
+
+class SamplingProfiler:
+    """
+    Statistical profiler for every thread of this worker
+
+    A background thread records the stack of each thread (event loop,
+    scheduler, thread pools) every interval_seconds. The result is in the
+    collapsed format of flamegraph.pl / speedscope: one line per distinct
+    stack, "thread;outer;...;inner count". Threads blocked in a call show up
+    too, so the flamegraph shows wall-clock time, not only CPU time.
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            names: Dict[int, str] = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                self.stacks[collapse_stack(names.get(ident, str(ident)), frame)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+def collapse_stack(thread_name: str, frame) -> str:
+    """"thread;outermost;...;innermost", each frame as "function (file:first line)" """
+    frames = []
+    while frame is not None:
+        code = frame.f_code
+        frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    frames.append(thread_name)
+    # Semicolons separate the frames (the count follows the last space)
+    return ";".join(frame.replace(";", ":") for frame in reversed(frames))
@@ -0,0 +1,138 @@
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from utils.config import settings
+
+# Bound parameter lists such as "IN (?, ?, ?)" as expanded by SQLAlchemy
+PARAMETER_LIST_PATTERN = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|\$\d+|:\w+)\s*\)")
+NUMBER_PATTERN = re.compile(r"\b\d+\b")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised by check_budget when a block of code runs more queries than allowed"""
+
+class QueryStats:
+    """Statements executed while handling one request (or inside track_queries)"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[tuple]:
+        """(fingerprint, count) of statements run at least threshold times, most frequent first"""
+        return [(statement, count) for statement, count in self.fingerprints.most_common() if count >= threshold]
+
+    def max_repeats(self) -> int:
+        return max(self.fingerprints.values(), default=0)
+
+    def violations(self, max_queries: int, max_repeats: int) -> List[str]:
+        """Budget violations (a limit of 0 means no limit)"""
+        problems = []
+        if max_queries and self.count > max_queries:
+            problems.append(f"{self.count} queries (budget {max_queries})")
+        if max_repeats:
+            for statement, count in self.repeated(max_repeats + 1):
+                problems.append(f"{count}x {statement[:200]}")
+        return problems
+
+# Stats of the request being handled, if instrumentation is on. Async
+# sessions run their statements in greenlets that share this context.
+current_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_stats", default=None)
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions differing only in parameters compare equal"""
+    statement = PARAMETER_LIST_PATTERN.sub("(?)", statement)
+    statement = NUMBER_PATTERN.sub("?", statement)
+    return WHITESPACE_PATTERN.sub(" ", statement).strip()
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if current_stats.get() is not None:
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    stats = current_stats.get()
+    if stats is None:
+        return
+    start_times = conn.info.get("query_start_times")
+    if start_times:
+        stats.record(statement, time.perf_counter() - start_times.pop())
+
+@contextmanager
+def track_queries():
+    """
+    Collect the statements run inside the block (in this task/thread)
+
+    Usage:
+        with track_queries() as stats:
+            ...
+        check_budget(stats, max_queries=5, max_repeats=1)
+    """
+    stats = QueryStats()
+    token = current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_stats.reset(token)
+
+def check_budget(stats: QueryStats, max_queries: int = 0, max_repeats: int = 0) -> None:
+    """
+    Raise QueryBudgetExceeded if more than max_queries statements ran, or one
+    statement ran more than max_repeats times (0 disables either check)
+    """
+    problems = stats.violations(max_queries, max_repeats)
+    if problems:
+        raise QueryBudgetExceeded("Query budget exceeded: " + "; ".join(problems))
+
+class SQLInstrumentationMiddleware(BaseHTTPMiddleware):
+    """
+    Per-request query count, database time and repeated statements (debug)
+
+    Adds X-DB-Query-Count, X-DB-Time-Ms and X-DB-Max-Repeats to every
+    response and logs requests that repeat a statement SQL_REPEAT_THRESHOLD
+    times (typically an N+1 pattern) or exceed SQL_QUERY_BUDGET. With
+    SQL_BUDGET_STRICT, such requests fail with a 500 instead, so a test
+    suite notices. Statements a streaming response runs after its headers
+    are sent are not counted.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        with track_queries() as stats:
+            response = await call_next(request)
+
+        label = f"{request.method} {request.url.path}"
+        repeated = stats.repeated(settings.SQL_REPEAT_THRESHOLD)
+        for statement, count in repeated:
+            print(f"Repeated statement in {label}: {count}x {statement[:200]}")
+
+        over_budget = settings.SQL_QUERY_BUDGET and stats.count > settings.SQL_QUERY_BUDGET
+        if over_budget:
+            print(f"Query budget exceeded in {label}: {stats.count} queries (budget {settings.SQL_QUERY_BUDGET})")
+
+        if (over_budget or repeated) and settings.SQL_BUDGET_STRICT:
+            problems = stats.violations(settings.SQL_QUERY_BUDGET, settings.SQL_REPEAT_THRESHOLD - 1)
+            response = JSONResponse(
+                status_code=500,
+                content={"detail": "Query budget exceeded", "problems": problems}
+            )
+
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.seconds * 1000:.2f}"
+        response.headers["X-DB-Max-Repeats"] = str(stats.max_repeats())
+        return response